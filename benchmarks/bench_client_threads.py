@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of one ZeppelinClient shared by a thread pool, against the stub Zeppelin server with login required.
+Each thread queries note status and ticket in a loop, so a broken cookie or auth state shows up as failures.
+
+    python -m benchmarks.bench_client_threads --threads 1,2,4,8,16,32,64 --latency 0.02
+"""
+
+import argparse
+import multiprocessing
+import threading
+import time
+
+from pyzeppelin.config import ClientConfig, TransportConfig
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.zeppelin_client import ZeppelinClient
+
+
+def run(client, note_id, threads, duration):
+    stop = threading.Event()
+    counts = [0] * threads
+    failures = [0] * threads
+
+    def worker(index):
+        while not stop.is_set():
+            try:
+                client.query_note_status(note_id)
+                if client.get_ticket()['principal'] != 'user1':
+                    failures[index] += 1
+                counts[index] += 2
+            except Exception:
+                failures[index] += 1
+
+    workers = [threading.Thread(target = worker, args = (i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    time.sleep(duration)
+    stop.set()
+    for worker_thread in workers:
+        worker_thread.join()
+    return sum(counts) / (time.perf_counter() - start), sum(failures)
+
+
+def serve(latency, conn):
+    # run the stub in another process, so that it doesn't compete for the GIL with the client threads
+    with StubZeppelinServer(latency = latency, credentials = {'user1': 'password1'}) as server:
+        conn.send(server.url)
+        conn.recv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', default = '1,2,4,8,16,32,64')
+    parser.add_argument('--latency', type = float, default = 0.02, help = 'server latency per request in seconds')
+    parser.add_argument('--duration', type = float, default = 2, help = 'seconds per thread count')
+    args = parser.parse_args()
+
+    thread_counts = [int(t) for t in args.threads.split(',')]
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target = serve, args = (args.latency, child_conn), daemon = True)
+    server.start()
+    try:
+        transport = TransportConfig(pool_maxsize = max(thread_counts))
+        client = ZeppelinClient(ClientConfig(conn.recv(), transport = transport, thread_safe = True))
+        client.login('user1', 'password1')
+        note_id = client.create_note('/bench/note_1')
+        print("{:>8} {:>12} {:>10} {:>10} {:>12}".format('threads', 'req/s', 'speedup', 'failures', 'connections'))
+        base = None
+        for threads in thread_counts:
+            rate, failures = run(client, note_id, threads, args.duration)
+            base = base or rate
+            connections = sum(s['connections'] for s in client.pool_stats().values())
+            print("{:>8} {:>12.1f} {:>10.2f} {:>10} {:>12}".format(threads, rate, rate / base, failures, connections))
+        client.close()
+    finally:
+        conn.send('stop')
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+End to end statements against the stub Zeppelin server (run in another process, so that only the client is
+measured) by ZeppelinClient.execute_note, ZeppelinClient.execute_paragraph and ZSession.execute, with 1 to N
+threads. Each thread runs its statements in its own note (or session), execute_note and execute_paragraph
+share one thread safe ZeppelinClient.
+
+Reported per mode and concurrency: statements per second, p50/p99 latency, rest calls per statement (counted by
+the client instrumentation, retries included), client cpu per statement, and peak traced memory of the client
+with --memory (tracemalloc slows down the client, so the other columns are not comparable with it),
+otherwise the max rss of the process.
+
+    python -m benchmarks.bench_e2e --concurrency 1,4,16 --statements 200 --latency 0.002 --job-duration 0.01
+    python -m benchmarks.bench_e2e --result-size 1000000 --error-rate 0.01
+"""
+
+import argparse
+import multiprocessing
+import resource
+import threading
+import time
+import tracemalloc
+
+from pyzeppelin.config import ClientConfig, TransportConfig
+from pyzeppelin.metrics import Instrumentation
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.test.stub_server import StubZeppelinServer, default_result, sized_result
+from pyzeppelin.zeppelin_client import ZeppelinClient
+from pyzeppelin.zsession import ZSession
+
+MODES = ('execute_note', 'execute_paragraph', 'zsession')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def request_count(instrumentation):
+    return sum(sample['value'] for sample in instrumentation.registry.to_dict().get('zeppelin_requests_total', []))
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def serve(server_kwargs, result_size, conn):
+    result_fn = sized_result(result_size) if result_size else default_result
+    with StubZeppelinServer(result_fn = result_fn, enable_websocket = False, seed = 1, **server_kwargs) as server:
+        conn.send(server.url)
+        while True:
+            message = conn.recv()
+            if message == 'stop':
+                break
+            # errors are only injected while the statements are measured, not in setup and teardown
+            server.error_rate = message
+            conn.send('ok')
+
+
+def set_error_rate(conn, error_rate):
+    conn.send(error_rate)
+    conn.recv()
+
+
+class Workload:
+    """
+    Statements of one mode and concurrency, setup() creates the notes or sessions and isn't measured.
+    """
+    def __init__(self, mode, url, concurrency, query_interval, max_retries):
+        self.mode = mode
+        self.concurrency = concurrency
+        self.instrumentation = Instrumentation()
+        self.client_config = ClientConfig(url, poll_strategy = FixedPollStrategy(query_interval),
+                                          transport = TransportConfig(pool_maxsize = max(concurrency, 10),
+                                                                      max_retries = max_retries),
+                                          thread_safe = True, instrumentation = self.instrumentation)
+        self.client = None
+        self.sessions = []
+        self.jobs = []
+
+    def setup(self):
+        if self.mode == 'zsession':
+            for _ in range(self.concurrency):
+                session = ZSession(self.client_config, 'sh')
+                session.start()
+                self.sessions.append(session)
+            return
+        self.client = ZeppelinClient(self.client_config)
+        for i in range(self.concurrency):
+            note_id = self.client.create_note('/bench/{}/{}/note_{}'.format(self.mode, time.time_ns(), i))
+            paragraph_id = self.client.add_paragraph(note_id, '', '%sh echo ' + str(i))
+            self.jobs.append((note_id, paragraph_id))
+
+    def execute(self, worker, i):
+        if self.mode == 'execute_note':
+            note = self.client.execute_note(self.jobs[worker][0])
+            return all(p.status == 'FINISHED' for p in note.paragraphs)
+        if self.mode == 'execute_paragraph':
+            return self.client.execute_paragraph(*self.jobs[worker]).status == 'FINISHED'
+        return self.sessions[worker].execute('echo ' + str(i)).status == 'FINISHED'
+
+    def teardown(self):
+        for session in self.sessions:
+            try:
+                session.stop()
+            except Exception:
+                pass
+        if self.client is not None:
+            for note_id, _ in self.jobs:
+                self.client.delete_note(note_id)
+            self.client.close()
+
+
+def run(workload, statements, conn, error_rate):
+    """
+    Run statements split among the threads of workload, return a dict of the measurements.
+    """
+    workload.setup()
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    per_worker = [statements // workload.concurrency + (1 if i < statements % workload.concurrency else 0)
+                  for i in range(workload.concurrency)]
+
+    def worker(index):
+        for i in range(per_worker[index]):
+            start = time.perf_counter()
+            try:
+                ok = workload.execute(index, i)
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    failures[0] += 1
+
+    try:
+        calls = request_count(workload.instrumentation)
+        if error_rate:
+            set_error_rate(conn, error_rate)
+        cpu = cpu_seconds()
+        threads = [threading.Thread(target = worker, args = (i,)) for i in range(workload.concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        cpu = cpu_seconds() - cpu
+        calls = request_count(workload.instrumentation) - calls
+        if error_rate:
+            set_error_rate(conn, 0)
+    finally:
+        workload.teardown()
+    return {'stmt/s': len(latencies) / wall, 'p50 ms': percentile(latencies, 50) * 1000,
+            'p99 ms': percentile(latencies, 99) * 1000, 'calls/stmt': calls / len(latencies),
+            'cpu ms/stmt': cpu / len(latencies) * 1000, 'failures': failures[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default = ','.join(MODES))
+    parser.add_argument('--concurrency', default = '1,4,16')
+    parser.add_argument('--statements', type = int, default = 200, help = 'statements per mode and concurrency')
+    parser.add_argument('--latency', type = float, default = 0.002, help = 'server latency per request in seconds')
+    parser.add_argument('--job-duration', type = float, default = 0.01, help = 'execution time of each statement')
+    parser.add_argument('--result-size', type = int, default = 0, help = 'characters of each statement output')
+    parser.add_argument('--error-rate', type = float, default = 0, help = 'fraction of rest requests failing with 503')
+    parser.add_argument('--max-retries', type = int, default = 3)
+    parser.add_argument('--query-interval', type = float, default = 0.01, help = 'poll interval')
+    parser.add_argument('--memory', action = 'store_true', help = 'trace the peak memory allocated by the client')
+    args = parser.parse_args()
+
+    server_kwargs = {'latency': args.latency, 'job_duration': args.job_duration}
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target = serve, args = (server_kwargs, args.result_size, child_conn),
+                                     daemon = True)
+    server.start()
+    try:
+        url = conn.recv()
+        columns = ['stmt/s', 'p50 ms', 'p99 ms', 'calls/stmt', 'cpu ms/stmt', 'failures']
+        print("{:<18} {:>6} ".format('mode', 'conc') + ' '.join('{:>11}'.format(c) for c in columns) +
+              ' {:>11}'.format('peak MiB' if args.memory else 'rss MiB'))
+        for mode in args.modes.split(','):
+            for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                workload = Workload(mode, url, concurrency, args.query_interval, args.max_retries)
+                if args.memory:
+                    tracemalloc.start()
+                result = run(workload, args.statements, conn, args.error_rate)
+                if args.memory:
+                    memory = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                    tracemalloc.stop()
+                else:
+                    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                print("{:<18} {:>6} ".format(mode, concurrency) +
+                      ' '.join('{:>11.2f}'.format(result[c]) if isinstance(result[c], float)
+                               else '{:>11}'.format(result[c]) for c in columns) + ' {:>11.1f}'.format(memory))
+    finally:
+        conn.send('stop')
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro benchmarks of the model classes of pyzeppelin.notebook, on synthetic note json scaled by the number of
+paragraphs, the size and the type of their results. The last paragraph of each note is an ERROR, so get_errors
+scans the whole note. Per case:
+
+    decode_us          json.loads of the response and Note with all the paragraphs and results accessed
+    construct_us       the same without json.loads
+    execute_result_us  ExecuteResult of each paragraph with status and results accessed
+    get_errors_us      Note.get_errors()
+    repr_us            repr of the Note
+    result_repr_us     repr of the ExecuteResult of the last paragraph
+    peak_kib           peak memory traced during decode
+
+Timings are the best of --repeat samples, each sample loops enough times to last about 20ms, and the samples
+are taken in rounds over all the cases so that they are spread over the whole run. The data is generated
+deterministically, so runs are comparable with the baseline saved by --save, and --compare exits with status 1
+when the peak memory of any case grows by more than --memory-threshold, or when any timing is worse than
+the baseline by more than --threshold (fractions), and still is each time it is measured again, up to --retries
+times. Timings are compared after scaling the baseline by the time of a fixed calibration workload (json and dict
+building in pure python, without pyzeppelin) measured between the cases in both runs, so that a slower machine
+isn't taken as regression. A timing which is measured again is compared with a new calibration sampled in
+the same rounds, so that a slow period of a busy machine can't make it fail, while a real regression stays slower
+however many times it is measured. The peak memory is deterministic, it is neither scaled nor measured again.
+
+benchmarks/bench_notebook_baseline.json is the baseline of the default cases, save it again when the model classes
+get faster on purpose.
+
+    python -m benchmarks.bench_notebook --compare benchmarks/bench_notebook_baseline.json --threshold 0.3
+    python -m benchmarks.bench_notebook --save benchmarks/bench_notebook_baseline.json
+    python -m benchmarks.bench_notebook --paragraphs 10,1000 --result-sizes 100,100000 --result-types TEXT,IMG
+"""
+
+import argparse
+import base64
+import gc
+import itertools
+import json
+import sys
+import time
+import tracemalloc
+
+from pyzeppelin.notebook import ExecuteResult, Note
+
+RESULT_TYPES = ('TEXT', 'HTML', 'TABLE', 'IMG', 'mixed')
+METRICS = ('decode_us', 'construct_us', 'execute_result_us', 'get_errors_us', 'repr_us', 'result_repr_us',
+           'peak_kib')
+
+
+def result_msg(result_type, index, size):
+    """
+    One result message whose data is about size characters.
+    """
+    if result_type == 'mixed':
+        result_type = RESULT_TYPES[index % 4]
+    if result_type == 'TABLE':
+        rows = ["id\tname\tscore"]
+        row = 0
+        while sum(len(r) + 1 for r in rows) < size:
+            rows.append("{}\tname_{}\t{}".format(row, row % 100, row * 0.5))
+            row += 1
+        return {'type': 'TABLE', 'data': '\n'.join(rows) + '\n'}
+    if result_type == 'IMG':
+        # base64 of a png header followed by filler bytes
+        raw = b'\x89PNG\r\n\x1a\n' + bytes(i % 256 for i in range(max(size * 3 // 4 - 8, 0)))
+        return {'type': 'IMG', 'data': base64.b64encode(raw).decode('ascii')}
+    if result_type == 'HTML':
+        cell = "<tr><td>{}</td></tr>".format(index)
+        return {'type': 'HTML', 'data': '<table>' + cell * max(size // len(cell), 1) + '</table>'}
+    return {'type': 'TEXT', 'data': (str(index % 10) * 79 + '\n') * (size // 80) + 'x' * (size % 80)}
+
+
+def note_json(paragraphs, result_size, result_type):
+    """
+    Body of the response of Zeppelin's /api/notebook/{noteId}.
+    """
+    paragraph_jsons = []
+    for i in range(paragraphs):
+        status = 'ERROR' if i == paragraphs - 1 else 'FINISHED'
+        paragraph_jsons.append({
+            'title': 'paragraph ' + str(i), 'text': '%sh echo ' + str(i), 'user': 'anonymous',
+            'dateUpdated': 'Nov 23, 2020 3:15:14 PM', 'progress': 100, 'config': {'editorMode': 'ace/mode/sh'},
+            'settings': {'params': {}, 'forms': {}}, 'apps': [], 'progressUpdateIntervalMs': 500,
+            'runtimeInfos': {'jobUrl': {'values': [{'jobUrl': 'http://spark:4040/jobs/job?id=' + str(i)}]}},
+            'jobName': 'paragraph_' + str(i), 'id': 'paragraph_' + str(i), 'status': status,
+            'results': {'code': 'SUCCESS' if status == 'FINISHED' else 'ERROR',
+                        'msg': [result_msg(result_type, i, result_size)]}})
+    return {'id': 'NOTE_1', 'name': 'note', 'path': '/note', 'paragraphs': paragraph_jsons,
+            'info': {'isRunning': False}}
+
+
+def touch(note):
+    for paragraph in note.paragraphs:
+        for result_type, data in paragraph.results:
+            pass
+        paragraph.jobUrls
+    return note
+
+
+class Timer:
+    """
+    Best seconds per call of fn over the samples taken so far, each sample loops enough times to last
+    about 20ms like timeit's autorange, with garbage collection disabled.
+    """
+    def __init__(self, fn):
+        self.fn = fn
+        self.loops = 1
+        while True:
+            elapsed = self._run()
+            if elapsed >= 0.02 or self.loops >= 1 << 20:
+                break
+            self.loops *= 2 if elapsed * 10 > 0.02 else 10
+        self.best = elapsed / self.loops
+
+    def _run(self):
+        fn = self.fn
+        # same as timeit, the garbage collection triggered by previous samples isn't counted
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(self.loops):
+                fn()
+            return time.perf_counter() - start
+        finally:
+            gc.enable()
+
+    def sample(self):
+        self.best = min(self.best, self._run() / self.loops)
+
+
+def peak_memory(fn):
+    gc.collect()
+    tracemalloc.start()
+    obj = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del obj
+    return peak
+
+
+def calibration_workload():
+    copy = json.loads(json.dumps(_CALIBRATION_DATA))
+    return [dict(p, results = list(p['results']['msg'])) for p in copy['paragraphs']]
+
+
+_CALIBRATION_DATA = note_json(20, 100, 'TEXT')
+
+
+def prepare_case(paragraphs, result_size, result_type):
+    """
+    Return the Timers of the timing metrics of one case, and its peak memory in KiB.
+    """
+    note_dict = note_json(paragraphs, result_size, result_type)
+    body = json.dumps({'status': 'OK', 'body': note_dict})
+    note = touch(Note(note_dict))
+    last = ExecuteResult(note.paragraphs[-1])
+
+    def execute_results():
+        for paragraph in note.paragraphs:
+            result = ExecuteResult(paragraph)
+            result.status
+            result.results
+
+    assert note.get_errors().startswith("Paragraph paragraph_{} is ERROR".format(paragraphs - 1))
+    timers = {
+        'decode_us': Timer(lambda: touch(Note(json.loads(body)['body']))),
+        'construct_us': Timer(lambda: touch(Note(note_dict))),
+        'execute_result_us': Timer(execute_results),
+        'get_errors_us': Timer(note.get_errors),
+        'repr_us': Timer(lambda: repr(note)),
+        'result_repr_us': Timer(lambda: repr(last)),
+    }
+    return timers, peak_memory(lambda: touch(Note(json.loads(body)['body']))) / 1024
+
+
+def sample(prepared, calibration, rounds):
+    """
+    Sample all the Timers of the prepared cases in rounds, so that the samples of each metric are spread over
+    the whole run instead of falling in the same slow period of a busy machine. The calibration is sampled before
+    each case.
+    """
+    for _ in range(rounds):
+        for timers, _ in prepared.values():
+            calibration.sample()
+            for timer in timers.values():
+                timer.sample()
+
+
+def results_of(prepared, calibration):
+    """
+    Return {'calibration_us': us, 'cases': {case: {metric: value}}}.
+    """
+    results = {'calibration_us': calibration.best * 1e6, 'cases': {}}
+    for case, (timers, peak_kib) in prepared.items():
+        metrics = dict((metric, timer.best * 1e6) for metric, timer in timers.items())
+        metrics['peak_kib'] = peak_kib
+        results['cases'][case] = metrics
+    return results
+
+
+def remeasure(prepared, regressions, rounds):
+    """
+    Sample the timings of regressions again by new Timers, with a new calibration sampled before each of them,
+    so that they are compared with the calibration of the same period of a busy machine. Return the results
+    of these timings only.
+    """
+    calibration = Timer(calibration_workload)
+    timers = dict(((case, metric), Timer(prepared[case][0][metric].fn)) for case, metric, _, _ in regressions)
+    for _ in range(rounds - 1):
+        for timer in timers.values():
+            calibration.sample()
+            timer.sample()
+    results = {'calibration_us': calibration.best * 1e6, 'cases': {}}
+    for (case, metric), timer in timers.items():
+        results['cases'].setdefault(case, {})[metric] = timer.best * 1e6
+    return results
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """
+    Return the list of (case, metric, baseline value, value) which are worse than the baseline beyond threshold,
+    or beyond memory_threshold for peak_kib. The baseline timings are scaled by the calibration, the peak memory
+    isn't, it doesn't depend on the load of the machine.
+    """
+    scale = results['calibration_us'] / baseline['calibration_us']
+    regressions = []
+    for case, metrics in results['cases'].items():
+        for metric, value in metrics.items():
+            base = baseline['cases'].get(case, {}).get(metric)
+            if not base:
+                continue
+            if metric.endswith('_us'):
+                base *= scale
+                limit = threshold
+            else:
+                limit = memory_threshold
+            if value > base * (1 + limit):
+                regressions.append((case, metric, base, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', default = '10,500')
+    parser.add_argument('--result-sizes', default = '100,10000', help = 'characters of the result of each paragraph')
+    parser.add_argument('--result-types', default = 'TEXT,TABLE,IMG,mixed',
+                        help = 'comma separated of ' + ', '.join(RESULT_TYPES))
+    parser.add_argument('--repeat', type = int, default = 15, help = 'rounds of samples')
+    parser.add_argument('--save', help = 'save the results as baseline to this json file')
+    parser.add_argument('--compare', help = 'baseline json file to compare with')
+    parser.add_argument('--threshold', type = float, default = 0.3, help = 'allowed slowdown, 0.3 means 30%%')
+    parser.add_argument('--memory-threshold', type = float, default = 0.05,
+                        help = 'allowed growth of peak_kib, 0.05 means 5%%')
+    parser.add_argument('--retries', type = int, default = 3,
+                        help = 'times to re-measure the timings which look slower before failing')
+    args = parser.parse_args()
+
+    cases = [("{}x{}x{}".format(*params), params) for params in itertools.product(
+        [int(p) for p in args.paragraphs.split(',')], [int(s) for s in args.result_sizes.split(',')],
+        args.result_types.split(','))]
+    calibration = Timer(calibration_workload)
+    prepared = dict((case, prepare_case(*params)) for case, params in cases)
+    sample(prepared, calibration, args.repeat - 1)
+    results = results_of(prepared, calibration)
+    print("calibration_us {:.1f}".format(results['calibration_us']))
+    print("{:<24} ".format('case') + ' '.join('{:>17}'.format(metric) for metric in METRICS))
+    for case, metrics in results['cases'].items():
+        print("{:<24} ".format(case) + ' '.join('{:>17.1f}'.format(metrics[metric]) for metric in METRICS))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent = 2, sort_keys = True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for _ in range(args.retries):
+            # a noisy timing is only a regression if it is still slower when it is measured again
+            timings = [r for r in regressions if r[1].endswith('_us')]
+            if not timings:
+                break
+            print("Re-measuring {} timing(s) which look slower: {}".format(
+                len(timings), ', '.join(case + ' ' + metric for case, metric, _, _ in timings)))
+            regressions = [r for r in regressions if not r[1].endswith('_us')] + compare(
+                remeasure(prepared, timings, args.repeat), baseline, args.threshold, args.memory_threshold)
+        for case, metric, base, value in regressions:
+            print("REGRESSION {} {}: {:.1f} -> {:.1f} (+{:.0%})".format(case, metric, base, value, value / base - 1))
+        if regressions:
+            sys.exit(1)
+        print("No regression beyond {:.0%} of timings and {:.0%} of memory against {} (timings scaled by {:.2f})"
+              .format(args.threshold, args.memory_threshold, args.compare,
+                      results['calibration_us'] / baseline['calibration_us']))
+
+
+if __name__ == "__main__":
+    main()
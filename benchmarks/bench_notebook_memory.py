@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Memory retained and peak memory (measured by tracemalloc) of decoding a note response into Note,
+with all the paragraphs and their results accessed, compared to the decoded json alone.
+
+    python -m benchmarks.bench_notebook_memory --paragraphs 1000 --result-size 200
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from pyzeppelin.notebook import Note
+
+
+def note_body(paragraphs, result_size):
+    """
+    Response body of a note as returned by Zeppelin's /api/notebook/{noteId}.
+    :param paragraphs:
+    :param result_size:
+    :return:
+    """
+    paragraph_jsons = []
+    for i in range(paragraphs):
+        paragraph_jsons.append({
+            'title': 'paragraph ' + str(i), 'text': '%sh echo ' + str(i), 'user': 'anonymous',
+            'dateUpdated': 'Nov 23, 2020 3:15:14 PM', 'progress': 100, 'config': {'editorMode': 'ace/mode/sh'},
+            'settings': {'params': {}, 'forms': {}}, 'apps': [], 'progressUpdateIntervalMs': 500,
+            'runtimeInfos': {'jobUrl': {'values': [{'jobUrl': 'http://spark:4040/jobs/job?id=' + str(i)}]}},
+            'jobName': 'paragraph_' + str(i), 'id': 'paragraph_' + str(i), 'status': 'FINISHED',
+            'results': {'code': 'SUCCESS', 'msg': [{'type': 'TEXT', 'data': str(i % 10) * result_size}]}})
+    return json.dumps({'status': 'OK', 'body': {'id': 'NOTE_1', 'name': 'note', 'path': '/note',
+                                                'paragraphs': paragraph_jsons, 'info': {'isRunning': False}}})
+
+
+def touch(note):
+    for paragraph in note.paragraphs:
+        for result_type, data in paragraph.results:
+            pass
+        paragraph.jobUrls
+    return note
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type = int, default = 1000)
+    parser.add_argument('--result-size', type = int, default = 200, help = 'characters of the result of each paragraph')
+    args = parser.parse_args()
+
+    body = note_body(args.paragraphs, args.result_size)
+    modes = [('json only', lambda: json.loads(body)['body']),
+             ('Note', lambda: touch(Note(json.loads(body)['body']))),
+             ('Note keep_json=False', lambda: touch(Note(json.loads(body)['body'], keep_json = False)))]
+    print("{:<22} {:>14} {:>14}".format('mode', 'retained KiB', 'peak KiB'))
+    for mode, build in modes:
+        current, peak = measure(build)
+        print("{:<22} {:>14.1f} {:>14.1f}".format(mode, current / 1024, peak / 1024))
+
+
+if __name__ == "__main__":
+    main()
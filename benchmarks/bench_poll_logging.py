@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Logging overhead per poll of a note job status, with the message formatted eagerly at each poll
+(as pyzeppelin used to do) and with the lazy, guarded logging of pyzeppelin.poll, when info logging is disabled
+and when debug logging is enabled (to a handler which drops the records).
+
+    python -m benchmarks.bench_poll_logging --paragraphs 20 --polls 100000
+"""
+
+import argparse
+import logging
+import time
+
+from pyzeppelin.notebook import NoteJobStatus
+from pyzeppelin.poll import log_state_transition, note_job_state
+
+logger = logging.getLogger('benchmarks.bench_poll_logging')
+
+
+def note_status(paragraphs):
+    return NoteJobStatus({'id': 'note_1', 'isRunning': True,
+                          'paragraphs': [{'id': 'paragraph_{}'.format(i), 'status': 'RUNNING', 'progress': 50}
+                                         for i in range(paragraphs)]})
+
+
+def eager_logging(status, polls):
+    for _ in range(polls):
+        logging.info("note_is_running: " + str(status.is_running) + ", paragraphs: " + str(status))
+
+
+def lazy_logging(status, polls):
+    state = None
+    start_time = time.monotonic()
+    for poll_count in range(1, polls + 1):
+        if logger.isEnabledFor(logging.DEBUG):
+            state = log_state_transition(logger, status.id, None, state, note_job_state(status), poll_count,
+                                         time.monotonic() - start_time)
+
+
+def no_logging(status, polls):
+    for _ in range(polls):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type = int, default = 20)
+    parser.add_argument('--polls', type = int, default = 100000)
+    parser.add_argument('--repeat', type = int, default = 3)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    root.addHandler(logging.NullHandler())
+    status = note_status(args.paragraphs)
+    print("{:<28} {:>12}".format('mode', 'ns/poll'))
+    for mode, level, run in [('no logging', logging.WARNING, no_logging),
+                             ('eager, info disabled', logging.WARNING, eager_logging),
+                             ('lazy, info disabled', logging.WARNING, lazy_logging),
+                             ('lazy, debug enabled', logging.DEBUG, lazy_logging)]:
+        root.setLevel(level)
+        elapsed = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run(status, args.polls)
+            elapsed.append(time.perf_counter() - start)
+        print("{:<28} {:>12.0f}".format(mode, min(elapsed) / args.polls * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Time to decode a TABLE result (int, float, string, bool and nullable int columns) into typed columns,
+by the usual split loop in python and by pyzeppelin.table, with and without pandas.
+
+    python -m benchmarks.bench_table_decode --rows 1000000
+"""
+
+import argparse
+import time
+
+from pyzeppelin import table
+from pyzeppelin.table import parse_table, iter_table_chunks
+
+
+def table_data(rows):
+    lines = ["id\tscore\tname\tactive\tcount"]
+    for i in range(rows):
+        lines.append("{}\t{}\tname_{}\t{}\t{}".format(i, i * 0.5, i % 100, 'true' if i % 2 else 'false',
+                                                    '' if i % 3 else i))
+    return '\n'.join(lines) + '\n'
+
+
+def naive_split(data):
+    lines = data.split('\n')
+    header = lines[0].split('\t')
+    columns = dict((name, []) for name in header)
+    for line in lines[1:]:
+        if not line:
+            continue
+        cells = line.split('\t')
+        columns['id'].append(int(cells[0]))
+        columns['score'].append(float(cells[1]))
+        columns['name'].append(cells[2])
+        columns['active'].append(cells[3] == 'true')
+        columns['count'].append(int(cells[4]) if cells[4] else None)
+    return columns
+
+
+def chunked(data):
+    return sum(len(chunk) for chunk in iter_table_chunks(data))
+
+
+def numpy_only(data):
+    # the fallback when pandas is not installed
+    pd = table.pd
+    table.pd = None
+    try:
+        return parse_table(data)
+    finally:
+        table.pd = pd
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type = int, default = 1000000)
+    parser.add_argument('--repeat', type = int, default = 3)
+    args = parser.parse_args()
+
+    data = table_data(args.rows)
+    print("{:<24} {:>10} {:>14}".format('mode', 'best s', 'rows/s'))
+    for mode, decode in [('naive split loop', naive_split),
+                         ('parse_table', parse_table),
+                         ('iter_table_chunks', chunked),
+                         ('parse_table numpy only', numpy_only)]:
+        elapsed = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            decode(data)
+            elapsed.append(time.perf_counter() - start)
+        print("{:<24} {:>10.3f} {:>14.0f}".format(mode, min(elapsed), args.rows / min(elapsed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Round trips and latency per ZSession.execute statement against the stub Zeppelin server,
+for the default submit-and-poll path, the fast_execute path, and fast_execute with prefetched paragraphs
+(calls/stmt includes the background paragraph allocation).
+
+    python -m benchmarks.bench_zsession_execute --statements 200 --latency 0.002
+"""
+
+import argparse
+import statistics
+import time
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.zsession import ZSession
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(server, statements, query_interval, **session_kwargs):
+    client_config = ClientConfig(server.url, poll_strategy = FixedPollStrategy(query_interval))
+    session = ZSession(client_config, 'sh', **session_kwargs)
+    session.start()
+    try:
+        server.reset_counts()
+        latencies = []
+        for i in range(statements):
+            start = time.perf_counter()
+            result = session.execute("echo " + str(i))
+            latencies.append(time.perf_counter() - start)
+            assert result.status == 'FINISHED', result
+        return server.total_requests() / statements, latencies
+    finally:
+        session.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--statements', type = int, default = 100)
+    parser.add_argument('--latency', type = float, default = 0.002, help = 'server latency per request in seconds')
+    parser.add_argument('--job-duration', type = float, default = 0.005, help = 'execution time of each statement')
+    parser.add_argument('--query-interval', type = float, default = 0.01, help = 'poll interval of the default path')
+    args = parser.parse_args()
+
+    print("{:<14} {:>14} {:>10} {:>10} {:>10} {:>12}".format(
+        'mode', 'calls/stmt', 'mean ms', 'p50 ms', 'p99 ms', 'stmt/s'))
+    with StubZeppelinServer(job_duration = args.job_duration, latency = args.latency) as server:
+        modes = [('default', {}),
+                 ('fast_execute', {'fast_execute': True}),
+                 ('fast+prefetch', {'fast_execute': True, 'prefetch_paragraphs': 4})]
+        for mode, session_kwargs in modes:
+            calls, latencies = run(server, args.statements, args.query_interval, **session_kwargs)
+            print("{:<14} {:>14.2f} {:>10.2f} {:>10.2f} {:>10.2f} {:>12.1f}".format(
+                mode, calls, statistics.mean(latencies) * 1000, percentile(latencies, 50) * 1000,
+                percentile(latencies, 99) * 1000, len(latencies) / sum(latencies)))
+
+
+if __name__ == "__main__":
+    main()
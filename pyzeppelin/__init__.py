@@ -15,6 +15,14 @@
 # limitations under the License.
 
 from pyzeppelin.zeppelin_client import ZeppelinClient
-from pyzeppelin.zsession import ZSession
-from pyzeppelin.config import ClientConfig
+from pyzeppelin.async_zeppelin_client import AsyncZeppelinClient
+from pyzeppelin.zsession import ZSession, StatementFuture
+from pyzeppelin.zsession_pool import ZSessionPool
+from pyzeppelin.config import ClientConfig, TransportConfig
+from pyzeppelin.poll import PollStrategy, FixedPollStrategy, BackoffPollStrategy
+from pyzeppelin.poll_scheduler import PollScheduler
+from pyzeppelin.note_catalog import NoteCatalog, NoteEvent
+from pyzeppelin.result_store import ResultStore, StoredResult
+from pyzeppelin.metrics import Instrumentation, MetricsRegistry
+from pyzeppelin.tracing import Tracer, OpenTelemetryTracer, InMemoryTracer
 
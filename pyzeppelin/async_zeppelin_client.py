@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.notebook import Note
+from pyzeppelin.notebook import Paragraph
+from pyzeppelin.notebook import NoteJobStatus
+from pyzeppelin.notebook import ParagraphJobStatus
+from pyzeppelin.poll import log_state_transition
+from pyzeppelin.poll import note_job_state
+from pyzeppelin.zeppelin_client import SessionInfo
+import asyncio
+import json
+import logging
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNoteHandle:
+    """
+    Handle of the note returned by AsyncZeppelinClient.submit_note, await get() to fetch the note result.
+    """
+    def __init__(self, zeppelin_client, note_id):
+        self.id = note_id
+        self._zeppelin_client = zeppelin_client
+        self._note = None
+
+    async def get(self):
+        if self._note is None:
+            self._note = await self._zeppelin_client.query_note_result(self.id)
+        return self._note
+
+    async def refresh(self):
+        self._note = None
+        return await self.get()
+
+
+class AsyncParagraphHandle:
+    """
+    Handle of the paragraph returned by AsyncZeppelinClient.submit_paragraph, await get() to fetch the paragraph result.
+    """
+    def __init__(self, zeppelin_client, note_id, paragraph_id):
+        self.id = paragraph_id
+        self.note_id = note_id
+        self._zeppelin_client = zeppelin_client
+        self._paragraph = None
+
+    async def get(self):
+        if self._paragraph is None:
+            self._paragraph = await self._zeppelin_client.query_paragraph_result(self.note_id, self.id)
+        return self._paragraph
+
+    async def refresh(self):
+        self._paragraph = None
+        return await self.get()
+
+
+class AsyncZeppelinClient:
+    """
+    asyncio counterpart of ZeppelinClient, all the rest api are exposed as coroutines.
+    All the calls share one aiohttp connection pool, so one event loop can drive many note/paragraph
+    executions concurrently. Use it as an async context manager, or call close() when it is no longer needed.
+    The timeouts and retries of ClientConfig.transport apply the same way as ZeppelinClient, but pool_size is
+    used as the connection limit instead of pool_maxsize.
+    """
+    def __init__(self, client_config, pool_size = 100):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required by AsyncZeppelinClient, please install it via 'pip install aiohttp'")
+        self.client_config = client_config
+        self.zeppelin_rest_url = client_config.get_zeppelin_rest_url()
+        self.pool_size = pool_size
+        self.transport = client_config.get_transport()
+        self.session = None
+        self._auth = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self):
+        # aiohttp.ClientSession has to be created inside a running event loop, so create it lazily.
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit = self.pool_size)
+            timeout = aiohttp.ClientTimeout(sock_connect = self.transport.connect_timeout,
+                                            sock_read = self.transport.read_timeout)
+            self.session = aiohttp.ClientSession(connector = connector,
+                                                 cookie_jar = aiohttp.CookieJar(unsafe = True),
+                                                 auth = self._auth,
+                                                 timeout = timeout)
+        return self.session
+
+    async def close(self):
+        """
+        Close the underlying connection pool.
+        :return:
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _request(self, method, path, not_found = None, **kwargs):
+        instrumentation = self.client_config.instrumentation
+        if instrumentation is None:
+            return await self._send(method, path, not_found = not_found, **kwargs)
+        event = instrumentation.before_request(method, path)
+        try:
+            resp_json, status_code, bytes_received = await self._send(method, path, not_found = not_found,
+                                                                      instrumented = True, **kwargs)
+        except Exception as e:
+            instrumentation.after_request(event, error = e)
+            raise
+        body = kwargs.get('json')
+        instrumentation.after_request(event, status_code, len(json.dumps(body)) if body is not None else 0,
+                                      bytes_received)
+        return resp_json
+
+    async def _send(self, method, path, not_found = None, instrumented = False, **kwargs):
+        """
+        Send the request with retries, return the response json.
+        :param not_found: message of the Exception raised when Zeppelin replies 404
+        :param instrumented: also return the status code and the bytes of the response body
+        """
+        retry = 0
+        while True:
+            try:
+                async with self._get_session().request(method, self.zeppelin_rest_url + path, **kwargs) as resp:
+                    body = await resp.read()
+                    text = body.decode(resp.get_encoding())
+                    if retry < self.transport.max_retries and self._is_retryable(method) \
+                            and resp.status in self.transport.retry_statuses:
+                        logger.warning("Retry %s %s, status code: %s", method, path, resp.status)
+                    else:
+                        if resp.status == 404 and not_found is not None:
+                            raise Exception(not_found)
+                        self._check_response(resp, text)
+                        if instrumented:
+                            return self._parse_json(text), resp.status, len(body)
+                        return self._parse_json(text)
+            except aiohttp.ClientConnectorError as e:
+                # not connected yet, safe to retry any method
+                if retry >= self.transport.max_retries:
+                    raise
+                logger.warning("Retry %s %s: %s", method, path, e)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if retry >= self.transport.max_retries or not self._is_retryable(method):
+                    raise
+                logger.warning("Retry %s %s: %s", method, path, e)
+            retry += 1
+            await asyncio.sleep(self.transport.backoff_factor * (2 ** (retry - 1)))
+
+    def _is_retryable(self, method):
+        return method.upper() in (m.upper() for m in self.transport.retry_methods)
+
+    def _check_response(self, resp, text):
+        if resp.status != 200:
+            raise Exception("Invoke rest api failed, status code: {}, status text: {}".format(
+                resp.status, text))
+
+    def _parse_json(self, text):
+        return json.loads(text) if text else None
+
+    async def get_version(self):
+        """
+        Return Zeppelin version
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/version")
+        return resp_json['body']['version']
+
+    async def login(self, user_name, password, knox_sso = None):
+        """
+        Login to Zeppelin, use knox_sso if it is provided.
+        :param user_name:
+        :param password:
+        :param knox_sso:
+        :return:
+        """
+        if knox_sso:
+            self._auth = aiohttp.BasicAuth(user_name, password)
+            # recreate the session so that basic auth is applied to all the following requests
+            await self.close()
+            session = self._get_session()
+            async with session.get(knox_sso + "?originalUrl=" + self.zeppelin_rest_url, ssl = False) as resp:
+                if resp.status != 200:
+                    raise Exception("Knox SSO login fails, status: {}, status_text: {}"
+                                    .format(resp.status, await resp.text()))
+            async with session.get(self.zeppelin_rest_url + "/api/security/ticket") as resp:
+                if resp.status != 200:
+                    raise Exception("Fail to get ticket after Knox SSO, status: {}, status_text: {}"
+                                    .format(resp.status, await resp.text()))
+        else:
+            await self._request('POST', "/api/login", data = {'userName': user_name, 'password': password})
+
+    async def create_note(self, note_path, default_interpreter_group = 'spark'):
+        """
+        Create a new note with give note_path and default_interpreter_group
+        :param note_path:
+        :param default_interpreter_group:
+        :return:
+        """
+        resp_json = await self._request('POST', "/api/notebook",
+                                        json = {'name' : note_path, 'defaultInterpreterGroup': default_interpreter_group})
+        return resp_json['body']
+
+    async def delete_note(self, note_id):
+        """
+        Delete a note with give note_id
+        :param note_id:
+        :return:
+        """
+        await self._request('DELETE', "/api/notebook/" + note_id)
+
+    async def query_note_result(self, note_id):
+        """
+        Query note result via Zeppelin rest api and convert the returned json to NoteResult
+        :param note_id:
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/notebook/" + note_id)
+        if self.client_config.result_store is not None:
+            self.client_config.result_store.spill_note(resp_json['body'])
+        return Note(resp_json['body'], self.client_config.keep_json)
+
+    async def query_note_status(self, note_id):
+        """
+        Query the job status of note, it doesn't include paragraph text and results.
+        :param note_id:
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/notebook/job/" + note_id)
+        return NoteJobStatus(resp_json['body'])
+
+    async def execute_note(self, note_id, params = {}):
+        """
+        Execute give note with params, block until note execution is finished.
+        :param note_id:
+        :param params:
+        :return:
+        """
+        await self.submit_note(note_id, params)
+        return await self.wait_until_note_finished(note_id)
+
+    async def submit_note(self, note_id, params = {}):
+        """
+        Execute give note with params, return once submission is finished. It is non-blocking api,
+        won't wait for the completion of note execution.
+        :param note_id:
+        :param params:
+        :return:
+        """
+        logger.info("Submitting note: %s with params: %s", note_id, params)
+        await self._request('POST', "/api/notebook/job/" + note_id,
+                            params = {'blocking': 'false', 'isolated': 'true', 'reload': 'true'},
+                            json = {'params': params})
+        return AsyncNoteHandle(self, note_id)
+
+    async def wait_until_note_finished(self, note_id):
+        """
+        Wait until note execution is finished.
+        :param note_id:
+        :return:
+        """
+        poll_strategy = self.client_config.get_poll_strategy()
+        start_time = time.monotonic()
+        poll_count = 0
+        state = None
+        while True:
+            note_status = await self.query_note_status(note_id)
+            poll_count += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                state = log_state_transition(logger, note_id, None, state, note_job_state(note_status), poll_count,
+                                             time.monotonic() - start_time)
+            if not note_status.is_running:
+                note_result = await self.query_note_result(note_id)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("note is finished, jobURL: %s", [p.jobUrls for p in note_result.paragraphs if p.jobUrls])
+                note_result.poll_count = poll_count
+                return note_result
+            await asyncio.sleep(poll_strategy.next_interval(poll_count, time.monotonic() - start_time, note_status.get_progress()))
+
+    async def reload_note_list(self):
+        resp_json = await self._request('GET', "/api/notebook", params = {'reload': 'true'})
+        return resp_json['body']
+
+    async def get_note(self, note_id, reload = False):
+        """
+        Get specified note.
+        :param note_id:
+        :param reload:
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/notebook/" + note_id, params = {'reload': str(reload)})
+        return resp_json['body']
+
+    async def clone_note(self, note_id, dest_note_path):
+        """
+        Clone specific note to another location.
+        :param note_id:
+        :param dest_note_path:
+        :return:
+        """
+        resp_json = await self._request('POST', "/api/notebook/" + note_id, json = {'name': dest_note_path})
+        return resp_json['body']
+
+    async def add_paragraph(self, note_id, title, text):
+        """
+        Add paragraph to specific note at the last paragraph
+        :param note_id:
+        :param title:
+        :param text:
+        :return:
+        """
+        resp_json = await self._request('POST', "/api/notebook/" + note_id + "/paragraph", json = {'title': title, 'text': text})
+        return resp_json['body']
+
+    async def update_paragraph(self, note_id, paragraph_id, title, text):
+        """
+        update specified paragraph with given title and text
+        :param note_id:
+        :param paragraph_id:
+        :param title:
+        :param text:
+        :return:
+        """
+        await self._request('PUT', "/api/notebook/" + note_id + "/paragraph/" + paragraph_id,
+                            json = {'title' : title, 'text' : text})
+
+    async def execute_paragraph(self, note_id, paragraph_id, params = {}, session_id = "", isolated = False):
+        """
+        Blocking api, execute specified paragraph with given params
+        :param note_id:
+        :param paragraph_id:
+        :param params:
+        :param session_id:
+        :param isolated:
+        :return:
+        """
+        await self.submit_paragraph(note_id, paragraph_id, params, session_id, isolated)
+        return await self.wait_until_paragraph_finished(note_id, paragraph_id)
+
+    async def submit_paragraph(self, note_id, paragraph_id, params = {}, session_id = "", isolated = False):
+        """
+        Non-blocking api, execute specified paragraph with given params.
+        :param note_id:
+        :param paragraph_id:
+        :param params:
+        :param session_id:
+        :param isolated:
+        :return:
+        """
+        logger.info("Submitting paragraph: %s with params: %s", paragraph_id, params)
+        await self._request('POST', "/api/notebook/job/" + note_id + "/" + paragraph_id,
+                            params = {'sessionId': session_id, 'isolated': str(isolated), 'reload': 'true'},
+                            json = {'params': params})
+        return AsyncParagraphHandle(self, note_id, paragraph_id)
+
+    async def query_paragraph_result(self, note_id, paragraph_id):
+        """
+        Query specified paragraph result.
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/notebook/" + note_id + "/paragraph/" + paragraph_id)
+        if self.client_config.result_store is not None:
+            self.client_config.result_store.spill_paragraph(resp_json['body'])
+        return Paragraph(resp_json['body'], self.client_config.keep_json)
+
+    async def query_paragraph_status(self, note_id, paragraph_id):
+        """
+        Query the job status of specified paragraph, it doesn't include paragraph text and results.
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/notebook/job/" + note_id + "/" + paragraph_id)
+        return ParagraphJobStatus(resp_json['body'])
+
+    async def wait_until_paragraph_finished(self, note_id, paragraph_id):
+        """
+        Wait until specified paragraph execution is finished
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        poll_strategy = self.client_config.get_poll_strategy()
+        start_time = time.monotonic()
+        poll_count = 0
+        state = None
+        while True:
+            paragraph_status = await self.query_paragraph_status(note_id, paragraph_id)
+            poll_count += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                state = log_state_transition(logger, note_id, paragraph_id, state, paragraph_status.status, poll_count,
+                                             time.monotonic() - start_time)
+            if paragraph_status.is_completed():
+                paragraph_result = await self.query_paragraph_result(note_id, paragraph_id)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("paragraph is completed, jobURL: %s", paragraph_result.jobUrls)
+                paragraph_result.poll_count = poll_count
+                return paragraph_result
+            await asyncio.sleep(poll_strategy.next_interval(poll_count, time.monotonic() - start_time, paragraph_status.progress))
+
+    async def cancel_paragraph(self, note_id, paragraph_id):
+        """
+        Cancel specified paragraph execution.
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        await self._request('DELETE', "/api/notebook/job/" + note_id + "/" + paragraph_id)
+
+    async def cancel_note(self, note_id):
+        """
+        Cancel specified note execution. Same as ZeppelinClient.cancel_note, it is sent twice: cancelling the running
+        paragraph lets the next paragraph of the note start, the second one cancels it.
+        :param note_id:
+        :return:
+        """
+        await self._request('DELETE', "/api/notebook/job/" + note_id)
+        await self._request('DELETE', "/api/notebook/job/" + note_id)
+
+    async def new_session(self, interpreter):
+        """
+        Create new ZSession for specified interpreter
+        :param interpreter:
+        :return:
+        """
+        resp_json = await self._request('POST', "/api/session", params = {'interpreter': interpreter})
+        return SessionInfo(resp_json['body'])
+
+    async def stop_session(self, session_id):
+        """
+        Stop specified ZSession
+        :param session_id:
+        :return:
+        """
+        await self._request('DELETE', "/api/session/" + session_id)
+
+    async def get_session(self, session_id):
+        """
+        Get SessionInfo of specified session_id
+        :param session_id:
+        :return:
+        """
+        resp_json = await self._request('GET', "/api/session/" + session_id,
+                                        not_found = "No such session: " + session_id)
+        return SessionInfo(resp_json['body'])
+
+    async def next_session_paragraph(self, note_id, max_statement):
+        """
+        Create a new paragraph for specified session.
+        :param note_id:
+        :param max_statement:
+        :return:
+        """
+        resp_json = await self._request('POST', "/api/notebook/" + note_id + "/paragraph/next",
+                                        params = {'maxParagraph' : max_statement})
+        return resp_json['message']
+
+
+if __name__ == "__main__":
+
+    async def main():
+        client_config = ClientConfig("http://localhost:8080")
+        async with AsyncZeppelinClient(client_config) as client:
+            print('version:' + await client.get_version())
+            note_id = await client.create_note('/test/async_note_1', 'sh')
+            try:
+                paragraph_ids = [await client.add_paragraph(note_id, 'title', '%sh echo ' + str(i)) for i in range(3)]
+                results = await asyncio.gather(*[client.execute_paragraph(note_id, p) for p in paragraph_ids])
+                for result in results:
+                    print(result.status, result.results)
+            finally:
+                await client.delete_note(note_id)
+
+    asyncio.run(main())
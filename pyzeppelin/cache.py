@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import threading
+import time
+
+
+class CacheEntry:
+
+    def __init__(self, value, tag, expire_time, etag = None, last_modified = None):
+        self.value = value
+        self.tag = tag
+        self.expire_time = expire_time
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self):
+        return time.monotonic() < self.expire_time
+
+    def conditional_headers(self):
+        """
+        Headers to revalidate the entry with the server, empty if the server didn't return any validator.
+        :return:
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Bounded cache of the parsed responses of ZeppelinClient reads. Entries are fresh for ttl seconds, and the least
+    recently used ones are evicted beyond max_entries. Each entry has a tag (e.g. the note id) so that all the entries
+    of a note are invalidated together when the note is changed.
+
+    Expired entries which carry an ETag or Last-Modified are kept until they are evicted, so that the next read can
+    revalidate them with a conditional request and reuse the value when the server replies 304 Not Modified.
+    """
+    def __init__(self, ttl = 1, max_entries = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> CacheEntry, the least recently used one is at the front
+        self._entries = collections.OrderedDict()
+        # number of invalidations so far, and tag -> the number of its last invalidation, to drop the responses of
+        # reads which race with the invalidation. Only the max_entries recently invalidated tags are kept,
+        # the others are taken as invalidated at the last number dropped
+        self._invalidations = 0
+        self._versions = collections.OrderedDict()
+        self._dropped_version = 0
+        # number of times the whole cache is cleared
+        self._epoch = 0
+
+    def get(self, key):
+        """
+        Return the CacheEntry of key, it may be expired. Only a fresh entry counts as a hit.
+        :param key:
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.is_fresh():
+                self.hits += 1
+            else:
+                self.misses += 1
+                if not entry.etag and not entry.last_modified:
+                    # can't be revalidated
+                    del self._entries[key]
+                    return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def version(self, tag):
+        """
+        Take it before sending the read, and pass it to put.
+        :param tag:
+        :return:
+        """
+        with self._lock:
+            return self._epoch, self._invalidations
+
+    def put(self, key, value, tag, version, etag = None, last_modified = None):
+        """
+        Cache the value of key, unless its tag is invalidated since version is taken.
+        :param key:
+        :param value:
+        :param tag:
+        :param version:
+        :param etag:
+        :param last_modified:
+        :return:
+        """
+        with self._lock:
+            if self._invalidated_since(tag, version):
+                return
+            self._entries[key] = CacheEntry(value, tag, time.monotonic() + self.ttl, etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+
+    def revalidated(self, key, entry, version):
+        """
+        The server replied 304 to the conditional request of entry, keep it fresh for another ttl seconds.
+        :param key:
+        :param entry:
+        :param version:
+        :return:
+        """
+        with self._lock:
+            self.revalidations += 1
+            if not self._invalidated_since(entry.tag, version) and self._entries.get(key) is entry:
+                entry.expire_time = time.monotonic() + self.ttl
+
+    def _invalidated_since(self, tag, version):
+        epoch, invalidations = version
+        return epoch != self._epoch or self._versions.get(tag, self._dropped_version) > invalidations
+
+    def invalidate(self, tag):
+        """
+        Drop all the entries of tag.
+        :param tag:
+        :return:
+        """
+        with self._lock:
+            self._invalidations += 1
+            self._versions[tag] = self._invalidations
+            self._versions.move_to_end(tag)
+            while len(self._versions) > self.max_entries:
+                self._dropped_version = self._versions.popitem(last = False)[1]
+            for key in [key for key, entry in self._entries.items() if entry.tag == tag]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._versions.clear()
+            self._dropped_version = 0
+            self._entries.clear()
+
+    def stats(self):
+        """
+        hits: reads served from the cache, misses: reads sent to the server, revalidations: misses answered by
+        304 Not Modified, evictions: entries dropped by the size limit, size: current number of entries.
+        :return:
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations,
+                    'evictions': self.evictions, 'size': len(self._entries)}
@@ -16,15 +16,117 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.tracing import Tracer
+
+from urllib3.util.retry import Retry
+
+
+class TransportConfig:
+    """
+    Http transport policy of ZeppelinClient.
+
+    pool_maxsize is the number of connections kept alive per host, it should be no less than the number of
+    threads sharing the client, otherwise connections are discarded and reopened. Set pool_block to True to make
+    threads wait for a free connection instead of opening extra ones.
+
+    Requests are retried with exponential backoff (backoff_factor * 2^(retry - 1) seconds) on connection errors,
+    and on read errors and retry_statuses only for idempotent methods. 500 is not retried by default, because
+    Zeppelin uses it to report errors of the request itself (e.g. note already exists, paragraph fails).
+
+    tcp_keepalive enables TCP keepalive probes on the connections so that idle connections are not silently
+    dropped by firewalls or load balancers in between.
+    """
+    def __init__(self, pool_connections = 10, pool_maxsize = 10, pool_block = False, connect_timeout = 10,
+                 read_timeout = 60, max_retries = 3, backoff_factor = 0.2, retry_statuses = (502, 503, 504),
+                 retry_methods = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'), tcp_keepalive = True,
+                 tcp_keepalive_idle = 60, tcp_keepalive_interval = 10, tcp_keepalive_count = 6):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = retry_statuses
+        self.retry_methods = retry_methods
+        self.tcp_keepalive = tcp_keepalive
+        self.tcp_keepalive_idle = tcp_keepalive_idle
+        self.tcp_keepalive_interval = tcp_keepalive_interval
+        self.tcp_keepalive_count = tcp_keepalive_count
+
+    def get_timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    def get_retry(self):
+        kwargs = dict(total = self.max_retries,
+                      connect = self.max_retries,
+                      read = self.max_retries,
+                      status = self.max_retries,
+                      status_forcelist = self.retry_statuses,
+                      backoff_factor = self.backoff_factor,
+                      raise_on_status = False)
+        methods = frozenset(m.upper() for m in self.retry_methods)
+        try:
+            return Retry(other = 0, allowed_methods = methods, **kwargs)
+        except TypeError:
+            # urllib3 before 1.26 (required by requests 2.22) names it method_whitelist and has no other
+            return Retry(method_whitelist = methods, **kwargs)
+
 
 class ClientConfig:
     """
-    Client side configuration of Zeppelin SDK
+    Client side configuration of Zeppelin SDK.
+    poll_strategy decides how often the wait_until_* apis query Zeppelin, by default it queries
+    every query_interval seconds (see pyzeppelin.poll for other strategies).
+
+    When use_websocket is True, the wait_until_* apis listen to the status pushed by the Zeppelin notebook
+    websocket (requires websocket-client) and only query Zeppelin when something is completed, or every
+    websocket_check_interval seconds as a safety net. They fall back to polling when the websocket is not available.
+
+    transport is the TransportConfig of connection pool, timeouts and retries, TransportConfig() by default.
+    Set thread_safe to True when one ZeppelinClient is shared by multiple threads, its pool_maxsize should be
+    no less than the number of threads.
+
+    When coalesce_reads is True, concurrent identical read queries share one http call, and the result is reused
+    for coalesce_window seconds after it is returned, which absorbs bursts of the same query from many threads.
+
+    When cache_ttl > 0, notes, paragraphs, the note list and sessions read by the client are cached for cache_ttl
+    seconds (at most cache_size entries, least recently used ones are evicted), see ResponseCache. The cached entries
+    of a note are invalidated by the writes of the same client, but not by the changes made by others.
+
+    Set keep_json to False to not keep the raw json in the Note and Paragraph returned by the client, which saves
+    the memory of the fields not used by pyzeppelin, see Note.
+
+    Set result_store to a ResultStore to spill the large result data of the notes and paragraphs read by the client
+    to local files, the data of those result messages is then StoredResult instead of str.
+
+    Set instrumentation to an Instrumentation to record the latency, bytes and decode time of the rest api calls
+    and the polls of the waits in its MetricsRegistry, and to invoke its pre and post request hooks.
+
+    tracer traces the phases of ZSession start and statement execution as nested spans, nothing is traced by default,
+    see pyzeppelin.tracing.
     """
-    def __init__(self, zeppelin_rest_url, query_interval = 1, knox_sso_url = None):
+    def __init__(self, zeppelin_rest_url, query_interval = 1, knox_sso_url = None, poll_strategy = None,
+                 use_websocket = False, websocket_check_interval = 30, transport = None, thread_safe = False,
+                 coalesce_reads = False, coalesce_window = 0, cache_ttl = 0, cache_size = 256, keep_json = True,
+                 result_store = None, instrumentation = None, tracer = None):
         self.zeppelin_rest_url = zeppelin_rest_url
         self.query_interval = query_interval
         self.knox_sso_url = knox_sso_url
+        self.poll_strategy = poll_strategy
+        self.use_websocket = use_websocket
+        self.websocket_check_interval = websocket_check_interval
+        self.transport = transport
+        self.thread_safe = thread_safe
+        self.coalesce_reads = coalesce_reads
+        self.coalesce_window = coalesce_window
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.keep_json = keep_json
+        self.result_store = result_store
+        self.instrumentation = instrumentation
+        self.tracer = tracer
 
     def get_zeppelin_rest_url(self):
         return self.zeppelin_rest_url
@@ -32,4 +134,24 @@ class ClientConfig:
     def get_query_interval(self):
         return self.query_interval
 
+    def get_poll_strategy(self):
+        if self.poll_strategy is None:
+            return FixedPollStrategy(self.query_interval)
+        return self.poll_strategy
+
+    def get_transport(self):
+        if self.transport is None:
+            return TransportConfig()
+        return self.transport
+
+    def get_tracer(self):
+        if self.tracer is None:
+            return Tracer()
+        return self.tracer
+
+    def get_websocket_url(self):
+        if self.zeppelin_rest_url.startswith('https://'):
+            return 'wss://' + self.zeppelin_rest_url[len('https://'):].rstrip('/') + '/ws'
+        return 'ws://' + self.zeppelin_rest_url[len('http://'):].rstrip('/') + '/ws'
+
 
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pyzeppelin.notebook import Paragraph, ResultMessage
+
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# the characters which end or escape a string
+_STRING_SPECIAL = re.compile(r'["\\]')
+# the characters which change the nesting of a container
+_CONTAINER_SPECIAL = re.compile(r'["{}\[\]]')
+_SCALAR_END = re.compile(r'[,}\] \t\n\r]')
+
+
+class JsonScanner:
+    """
+    Pull parser of a json document which arrives in chunks of bytes (e.g. requests' iter_content), so that the
+    document doesn't need to be in memory at once. Walk it with iter_object / iter_array, and consume each member
+    with read_value (decode it), skip_value (drop it without decoding) or by walking into it.
+    Only the value being read and the current chunk are held in memory.
+    """
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        # pieces of the value being captured by read_value, and its start in the buffer
+        self._capture = None
+        self._mark = 0
+
+    def _more(self):
+        """
+        Load the next chunk once the buffer is consumed, return False at the end of the document.
+        :return:
+        """
+        while True:
+            if self._capture is not None:
+                self._capture.append(self._buffer[self._mark:])
+                self._mark = 0
+            if self._eof:
+                self._buffer = ''
+                self._pos = 0
+                return False
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._decoder.decode(b'', final = True)
+            else:
+                text = self._decoder.decode(chunk)
+            self._buffer = text
+            self._pos = 0
+            if text:
+                return True
+
+    def peek(self):
+        """
+        Skip whitespaces and return the next character without consuming it, '' at the end of the document.
+        :return:
+        """
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._more():
+                return ''
+
+    def _expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError("Invalid json, expect one of '{}' but get '{}'".format(chars, c))
+        self._pos += 1
+        return c
+
+    def _scan_string(self):
+        # the opening quote is consumed
+        while True:
+            match = _STRING_SPECIAL.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = len(self._buffer)
+                if not self._more():
+                    raise ValueError("Invalid json, unterminated string")
+                continue
+            self._pos = match.end()
+            if match.group() == '"':
+                return
+            # skip the escaped character
+            if self._pos >= len(self._buffer) and not self._more():
+                raise ValueError("Invalid json, unterminated string")
+            self._pos += 1
+
+    def _scan_value(self):
+        c = self.peek()
+        if c == '"':
+            self._pos += 1
+            self._scan_string()
+        elif c in ('{', '['):
+            self._pos += 1
+            depth = 1
+            while depth:
+                match = _CONTAINER_SPECIAL.search(self._buffer, self._pos)
+                if match is None:
+                    self._pos = len(self._buffer)
+                    if not self._more():
+                        raise ValueError("Invalid json, unterminated " + ('object' if c == '{' else 'array'))
+                    continue
+                self._pos = match.end()
+                special = match.group()
+                if special == '"':
+                    self._scan_string()
+                elif special in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+        elif c:
+            while True:
+                match = _SCALAR_END.search(self._buffer, self._pos)
+                if match is not None:
+                    self._pos = match.start()
+                    return
+                self._pos = len(self._buffer)
+                if not self._more():
+                    return
+        else:
+            raise ValueError("Invalid json, unexpected end of document")
+
+    def skip_value(self):
+        """
+        Consume the next value without decoding it.
+        :return:
+        """
+        self._scan_value()
+
+    def read_value(self):
+        """
+        Consume and decode the next value.
+        :return:
+        """
+        self.peek()
+        self._capture = []
+        self._mark = self._pos
+        try:
+            self._scan_value()
+            self._capture.append(self._buffer[self._mark:self._pos])
+            raw = ''.join(self._capture)
+        finally:
+            self._capture = None
+        return json.loads(raw)
+
+    def iter_object(self):
+        """
+        Walk into the next value which must be an object, yield its keys. Each member value must be consumed
+        before asking for the next key.
+        :return:
+        """
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError("Invalid json, expect key of object")
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            if self._expect(',}') == '}':
+                return
+
+    def iter_array(self):
+        """
+        Walk into the next value which must be an array, yield the index of each element. Each element must be
+        consumed before asking for the next one.
+        :return:
+        """
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self._expect(',]') == ']':
+                return
+
+
+def _iter_body(scanner):
+    """
+    Walk into the body of Zeppelin's rest response {"status": ..., "message": ..., "body": ...}, yield once
+    the scanner is at the body, the rest of the response is skipped.
+    :param scanner:
+    :return:
+    """
+    for key in scanner.iter_object():
+        if key == 'body':
+            yield
+        else:
+            scanner.skip_value()
+
+
+def _iter_messages(scanner, result_types, result_store):
+    """
+    Yield the ResultMessage of each result message of the results json at the scanner, the data of the messages
+    whose type is not in result_types is skipped without decoding.
+    :param scanner:
+    :param result_types:
+    :param result_store: ResultStore to spill the large data, or None
+    :return:
+    """
+    for key in scanner.iter_object():
+        if key != 'msg' or scanner.peek() != '[':
+            scanner.skip_value()
+            continue
+        for _ in scanner.iter_array():
+            msg = {}
+            for msg_key in scanner.iter_object():
+                if msg_key == 'data' and result_types is not None and msg.get('type') not in result_types:
+                    # Zeppelin writes the type before the data
+                    if 'type' in msg:
+                        scanner.skip_value()
+                        continue
+                msg[msg_key] = scanner.read_value()
+            if result_types is None or msg.get('type') in result_types:
+                data = msg.get('data')
+                yield ResultMessage(msg.get('type'), data if result_store is None else result_store.put(data))
+
+
+def _read_paragraph(scanner, result_types, keep_json, result_store):
+    paragraph_json = {}
+    for key in scanner.iter_object():
+        if key == 'results' and scanner.peek() == '{':
+            msgs = [{'type': t, 'data': d} for t, d in _iter_messages(scanner, result_types, result_store)]
+            paragraph_json['results'] = {'msg': msgs}
+        else:
+            paragraph_json[key] = scanner.read_value()
+    return Paragraph(paragraph_json, keep_json)
+
+
+def iter_note_paragraphs(chunks, result_types = None, keep_json = True, result_store = None):
+    """
+    Yield the Paragraphs of the note response one by one while it is being received.
+    :param chunks: bytes of the response of /api/notebook/{noteId}
+    :param result_types: only keep the result messages of these types (e.g. ['TEXT']), None to keep all
+    :param keep_json:
+    :param result_store: ResultStore to spill the large result data, or None
+    :return:
+    """
+    scanner = JsonScanner(chunks)
+    for _ in _iter_body(scanner):
+        for key in scanner.iter_object():
+            if key == 'paragraphs' and scanner.peek() == '[':
+                for _ in scanner.iter_array():
+                    yield _read_paragraph(scanner, result_types, keep_json, result_store)
+            else:
+                scanner.skip_value()
+
+
+def iter_paragraph_messages(chunks, result_types = None, result_store = None):
+    """
+    Yield the ResultMessage (type, data) of each result message of the paragraph response one by one while it is
+    being received.
+    :param chunks: bytes of the response of /api/notebook/{noteId}/paragraph/{paragraphId}
+    :param result_types: only keep the result messages of these types (e.g. ['TEXT']), None to keep all
+    :param result_store: ResultStore to spill the large result data, or None
+    :return:
+    """
+    scanner = JsonScanner(chunks)
+    for _ in _iter_body(scanner):
+        for key in scanner.iter_object():
+            if key == 'results' and scanner.peek() == '{':
+                yield from _iter_messages(scanner, result_types, result_store)
+            else:
+                scanner.skip_value()
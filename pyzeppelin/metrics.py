@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+POLL_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# rest api paths with their ids replaced, so that the metrics of all the notes share the same labels
+_ENDPOINTS = [(re.compile(pattern), endpoint) for pattern, endpoint in [
+    (r'^/api/notebook/job/[^/]+/[^/]+$', '/api/notebook/job/{noteId}/{paragraphId}'),
+    (r'^/api/notebook/job/[^/]+$', '/api/notebook/job/{noteId}'),
+    (r'^/api/notebook/run/[^/]+/[^/]+$', '/api/notebook/run/{noteId}/{paragraphId}'),
+    (r'^/api/notebook/[^/]+/paragraph/next$', '/api/notebook/{noteId}/paragraph/next'),
+    (r'^/api/notebook/[^/]+/paragraph/[^/]+$', '/api/notebook/{noteId}/paragraph/{paragraphId}'),
+    (r'^/api/notebook/[^/]+/paragraph$', '/api/notebook/{noteId}/paragraph'),
+    (r'^/api/notebook/[^/]+$', '/api/notebook/{noteId}'),
+    (r'^/api/session/[^/]+$', '/api/session/{sessionId}'),
+]]
+
+
+def endpoint_of(path):
+    """
+    Return the endpoint of the rest api path, e.g. /api/notebook/{noteId} for /api/notebook/2FXYZ.
+    :param path:
+    :return:
+    """
+    path = path.split('?', 1)[0]
+    for pattern, endpoint in _ENDPOINTS:
+        if pattern.match(path):
+            return endpoint
+    return path
+
+
+class Counter:
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Count of the observed values per bucket, bucket i counts the values in (buckets[i - 1], buckets[i]]
+    and the last one counts the values larger than all the buckets.
+    """
+    def __init__(self, buckets = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimate the q quantile (0 <= q <= 1) by linear interpolation in its bucket, None if nothing is observed.
+        :param q:
+        :return:
+        """
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def cumulative_counts(self):
+        with self._lock:
+            counts = list(self.counts)
+        total = 0
+        cumulative = []
+        for bucket_count in counts:
+            total += bucket_count
+            cumulative.append(total)
+        return cumulative
+
+
+def _format_labels(labels, extra = None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                                           .replace('\n', '\\n')) for name, value in items) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    In-process registry of counters and histograms, identified by name and labels. Dump it by to_dict, or by
+    to_prometheus in the Prometheus text exposition format.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (type, help)
+        self._descriptions = {}
+        # (name, sorted label items) -> Counter / Histogram
+        self._metrics = {}
+
+    def _get(self, metric_type, name, description, labels, factory):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())) if labels else ())
+        metric = self._metrics.get(key)
+        if metric is None or self._descriptions[name][0] != metric_type:
+            with self._lock:
+                known_type = self._descriptions.setdefault(name, (metric_type, description))[0]
+                if known_type != metric_type:
+                    raise Exception("Metric {} is already registered as {}".format(name, known_type))
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = factory()
+                    self._metrics[key] = metric
+        return metric
+
+    def counter(self, name, description = '', labels = None):
+        """
+        Return the Counter of name and labels, it is created at the first call.
+        :param name:
+        :param description:
+        :param labels: dict of label name to value, the values are converted to str
+        :return:
+        """
+        return self._get('counter', name, description, labels, Counter)
+
+    def histogram(self, name, description = '', labels = None, buckets = DEFAULT_BUCKETS):
+        """
+        Return the Histogram of name and labels, it is created at the first call with buckets.
+        :param name:
+        :param description:
+        :param labels: dict of label name to value
+        :param buckets:
+        :return:
+        """
+        return self._get('histogram', name, description, labels, lambda: Histogram(buckets))
+
+    def _sorted_metrics(self):
+        with self._lock:
+            return sorted(self._metrics.items(), key = lambda item: item[0]), dict(self._descriptions)
+
+    def to_dict(self):
+        """
+        Return {name: [{'labels': dict, 'value': number}]} for counters, and
+        {name: [{'labels': dict, 'count': n, 'sum': s, 'buckets': {upper bound: cumulative count}}]} for histograms.
+        :return:
+        """
+        metrics, _ = self._sorted_metrics()
+        result = {}
+        for (name, labels), metric in metrics:
+            if isinstance(metric, Counter):
+                sample = {'labels': dict(labels), 'value': metric.value}
+            else:
+                bounds = list(metric.buckets) + [float('inf')]
+                sample = {'labels': dict(labels), 'count': metric.count, 'sum': metric.sum,
+                          'buckets': dict(zip(bounds, metric.cumulative_counts()))}
+            result.setdefault(name, []).append(sample)
+        return result
+
+    def to_prometheus(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        :return:
+        """
+        metrics, descriptions = self._sorted_metrics()
+        lines = []
+        last_name = None
+        for (name, labels), metric in metrics:
+            if name != last_name:
+                metric_type, description = descriptions[name]
+                if description:
+                    lines.append("# HELP {} {}".format(name, description))
+                lines.append("# TYPE {} {}".format(name, metric_type))
+                last_name = name
+            if isinstance(metric, Counter):
+                lines.append("{}{} {}".format(name, _format_labels(labels), _format_value(metric.value)))
+                continue
+            bounds = list(metric.buckets) + [float('inf')]
+            for bound, cumulative in zip(bounds, metric.cumulative_counts()):
+                lines.append("{}_bucket{} {}".format(name, _format_labels(labels, ('le', _format_value(bound))),
+                                                     cumulative))
+            lines.append("{}_sum{} {}".format(name, _format_labels(labels), _format_value(metric.sum)))
+            lines.append("{}_count{} {}".format(name, _format_labels(labels), metric.count))
+        return '\n'.join(lines) + '\n'
+
+
+class RequestEvent:
+    """
+    One rest api call, passed to the pre request hooks before it is sent (only method, path, endpoint and
+    start_time are set) and to the post request hooks after it is done. error is the exception if it fails
+    without response.
+    """
+    __slots__ = ('method', 'path', 'endpoint', 'start_time', 'elapsed', 'status_code', 'bytes_sent',
+                 'bytes_received', 'error')
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint_of(path)
+        self.start_time = time.perf_counter()
+        self.elapsed = None
+        self.status_code = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.error = None
+
+
+class Instrumentation:
+    """
+    Instrumentation of ZeppelinClient, set it as ClientConfig.instrumentation. Each rest api call is passed to the
+    pre and post request hooks as RequestEvent, and recorded in registry:
+
+        zeppelin_requests_total{method, endpoint, status}      counter of calls, status is 'error' without response
+        zeppelin_request_duration_seconds{method, endpoint}    histogram of latency
+        zeppelin_request_bytes_total{method, endpoint}         bytes of request bodies
+        zeppelin_response_bytes_total{method, endpoint}        bytes of response bodies
+        zeppelin_decode_duration_seconds{endpoint}             histogram of json decoding and result construction
+        zeppelin_wait_polls{kind}                              histogram of status queries per wait of note/paragraph
+        zeppelin_wait_duration_seconds{kind}                   histogram of the time waiting for note/paragraph
+
+    Without instrumentation the client only checks that it is None.
+    """
+    def __init__(self, registry = None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self._pre_request_hooks = []
+        self._post_request_hooks = []
+
+    def add_pre_request_hook(self, hook):
+        """
+        Register hook(event) which is invoked before each rest api call, in the calling thread.
+        :param hook:
+        :return:
+        """
+        self._pre_request_hooks.append(hook)
+
+    def add_post_request_hook(self, hook):
+        """
+        Register hook(event) which is invoked after each rest api call, in the calling thread.
+        :param hook:
+        :return:
+        """
+        self._post_request_hooks.append(hook)
+
+    def _run_hooks(self, hooks, event):
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.warning("Fail to run request hook: %s", e)
+
+    def before_request(self, method, path):
+        event = RequestEvent(method, path)
+        if self._pre_request_hooks:
+            self._run_hooks(self._pre_request_hooks, event)
+        return event
+
+    def after_request(self, event, status_code = None, bytes_sent = 0, bytes_received = 0, error = None):
+        event.elapsed = time.perf_counter() - event.start_time
+        event.status_code = status_code
+        event.bytes_sent = bytes_sent
+        event.bytes_received = bytes_received
+        event.error = error
+        labels = {'method': event.method, 'endpoint': event.endpoint}
+        registry = self.registry
+        registry.counter('zeppelin_requests_total', "Rest api calls",
+                         dict(labels, status = 'error' if status_code is None else status_code)).inc()
+        registry.histogram('zeppelin_request_duration_seconds', "Latency of rest api calls", labels) \
+            .observe(event.elapsed)
+        registry.counter('zeppelin_request_bytes_total', "Bytes of request bodies", labels).inc(bytes_sent)
+        registry.counter('zeppelin_response_bytes_total', "Bytes of response bodies", labels).inc(bytes_received)
+        if self._post_request_hooks:
+            self._run_hooks(self._post_request_hooks, event)
+
+    def observe_decode(self, path, seconds):
+        self.registry.histogram('zeppelin_decode_duration_seconds', "Time of decoding responses into results",
+                                {'endpoint': endpoint_of(path)}).observe(seconds)
+
+    def observe_wait(self, kind, polls, seconds):
+        """
+        Record one wait of note or paragraph.
+        :param kind: 'note' or 'paragraph'
+        :param polls: number of status queries
+        :param seconds:
+        :return:
+        """
+        labels = {'kind': kind}
+        self.registry.histogram('zeppelin_wait_polls', "Status queries per wait", labels, POLL_BUCKETS) \
+            .observe(polls)
+        self.registry.histogram('zeppelin_wait_duration_seconds', "Time of waiting for note or paragraph",
+                                labels).observe(seconds)
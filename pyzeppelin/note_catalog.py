@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class NoteEvent:
+    """
+    Change of the note list found by NoteCatalog.refresh, kind is one of 'added', 'removed' and 'renamed'.
+    old_path is only set for 'renamed', path is the last known path for 'removed'.
+    """
+    ADDED = 'added'
+    REMOVED = 'removed'
+    RENAMED = 'renamed'
+
+    def __init__(self, kind, note_id, path, old_path = None):
+        self.kind = kind
+        self.note_id = note_id
+        self.path = path
+        self.old_path = old_path
+
+    def __repr__(self):
+        return "NoteEvent(kind={}, note_id={}, path={}, old_path={})".format(
+            self.kind, self.note_id, self.path, self.old_path)
+
+
+class _Folder:
+
+    def __init__(self, parent = None, name = None):
+        self.parent = parent
+        self.name = name
+        # name -> _Folder
+        self.children = {}
+        # ids of the notes directly in this folder
+        self.note_ids = set()
+
+    def is_empty(self):
+        return not self.children and not self.note_ids
+
+
+def _split_path(path):
+    return [name for name in path.split('/') if name]
+
+
+class NoteCatalog:
+    """
+    Index of the note list of Zeppelin, built on ZeppelinClient.reload_note_list. Notes are indexed by id, by path,
+    and by folder in a trie, so that get_path and get_id are O(1) and list_notes is O(depth of folder + result)
+    instead of scanning the whole note list.
+
+    refresh reloads the note list and diffs it with the index, only the added, removed and renamed notes are updated,
+    and each of them is emitted as NoteEvent to the listeners. Call start to refresh every refresh_interval seconds
+    in a background thread.
+
+        catalog = NoteCatalog(zeppelin_client, refresh_interval = 60)
+        catalog.add_listener(lambda event: print(event))
+        catalog.start()
+        note_id = catalog.get_id('/team/report')
+        catalog.close()
+    """
+    def __init__(self, zeppelin_client, refresh_interval = 60):
+        self.zeppelin_client = zeppelin_client
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        # note_id -> path
+        self._paths = {}
+        # path -> note_id
+        self._ids = {}
+        self._root = _Folder()
+        self._listeners = []
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._paths)
+
+    def __contains__(self, note_id):
+        with self._lock:
+            return note_id in self._paths
+
+    def add_listener(self, listener):
+        """
+        Register listener(event) which is invoked with each NoteEvent of refresh, in the refresh thread.
+        :param listener:
+        :return:
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def get_path(self, note_id):
+        """
+        Return the path of note_id, None if it is not in the catalog.
+        :param note_id:
+        :return:
+        """
+        with self._lock:
+            return self._paths.get(note_id)
+
+    def get_id(self, note_path):
+        """
+        Return the id of the note at note_path, None if it is not in the catalog.
+        :param note_path:
+        :return:
+        """
+        with self._lock:
+            return self._ids.get(self._normalize(note_path))
+
+    def list_notes(self, folder = '/', recursive = True):
+        """
+        Return the notes under folder as list of {'id', 'path'}, in the same format as reload_note_list.
+        :param folder:
+        :param recursive: include the notes of the sub folders
+        :return:
+        """
+        with self._lock:
+            node = self._find_folder(folder)
+            if node is None:
+                return []
+            notes = []
+            nodes = [node]
+            while nodes:
+                node = nodes.pop()
+                notes.extend({'id': note_id, 'path': self._paths[note_id]} for note_id in node.note_ids)
+                if recursive:
+                    nodes.extend(node.children.values())
+            return notes
+
+    def list_folders(self, folder = '/'):
+        """
+        Return the names of the direct sub folders of folder.
+        :param folder:
+        :return:
+        """
+        with self._lock:
+            node = self._find_folder(folder)
+            return sorted(node.children) if node is not None else []
+
+    def refresh(self):
+        """
+        Reload the note list from Zeppelin and apply the difference to the index, return the list of NoteEvent.
+        :return:
+        """
+        note_list = self.zeppelin_client.reload_note_list(fresh = True)
+        paths = dict((note['id'], self._normalize(note['path'])) for note in note_list)
+        events = []
+        with self._lock:
+            # remove all the renamed notes before adding them back, paths may be swapped between notes
+            old_paths = {}
+            for note_id, old_path in list(self._paths.items()):
+                path = paths.get(note_id)
+                if path is None:
+                    self._remove(note_id)
+                    events.append(NoteEvent(NoteEvent.REMOVED, note_id, old_path))
+                elif path != old_path:
+                    self._remove(note_id)
+                    old_paths[note_id] = old_path
+            for note_id, path in paths.items():
+                if note_id in self._paths:
+                    continue
+                self._add(note_id, path)
+                if note_id in old_paths:
+                    events.append(NoteEvent(NoteEvent.RENAMED, note_id, path, old_paths[note_id]))
+                else:
+                    events.append(NoteEvent(NoteEvent.ADDED, note_id, path))
+            listeners = list(self._listeners)
+        for event in events:
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.warning("Fail to notify note catalog listener: %s", e)
+        return events
+
+    def start(self):
+        """
+        Refresh now, then every refresh_interval seconds in a background thread until close is called.
+        :return:
+        """
+        self.refresh()
+        with self._lock:
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target = self._refresh_periodically, name = "zeppelin-note-catalog",
+                                                daemon = True)
+                self._thread.start()
+
+    def close(self):
+        """
+        Stop the background refresh.
+        :return:
+        """
+        self._stopped.set()
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _refresh_periodically(self):
+        while not self._stopped.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Fail to refresh note catalog: %s", e)
+
+    def _normalize(self, path):
+        return '/' + '/'.join(_split_path(path))
+
+    def _find_folder(self, folder):
+        node = self._root
+        for name in _split_path(folder):
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    def _add(self, note_id, path):
+        # Zeppelin doesn't allow two notes of the same path, the latest one wins in case of inconsistent note list
+        existing_id = self._ids.get(path)
+        if existing_id is not None and existing_id != note_id:
+            self._remove(existing_id)
+        self._paths[note_id] = path
+        self._ids[path] = note_id
+        node = self._root
+        for name in _split_path(path)[:-1]:
+            child = node.children.get(name)
+            if child is None:
+                child = _Folder(node, name)
+                node.children[name] = child
+            node = child
+        node.note_ids.add(note_id)
+
+    def _remove(self, note_id):
+        path = self._paths.pop(note_id)
+        if self._ids.get(path) == note_id:
+            del self._ids[path]
+        node = self._find_folder('/'.join(_split_path(path)[:-1]))
+        node.note_ids.discard(note_id)
+        # prune the empty folders
+        while node.parent is not None and node.is_empty():
+            del node.parent.children[node.name]
+            node = node.parent
@@ -16,26 +16,243 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import binascii
+import collections.abc
 import json
 
+# types of the result messages whose data is base64 encoded
+BINARY_TYPES = ('IMG',)
+# leading bytes of the image formats
+_IMAGE_SIGNATURES = ((b'\x89PNG', 'png'), (b'\xff\xd8\xff', 'jpeg'), (b'GIF8', 'gif'), (b'<svg', 'svg'),
+                     (b'<?xml', 'svg'))
+
+
+class ResultMessage(tuple):
+    """
+    (type, data) of one result message, it is a tuple so it can be unpacked and compared as before.
+    The data of binary messages (e.g. IMG) is base64 encoded, bytes() decodes it at the first call and caches it,
+    size and image_format are computed from the encoded data without decoding it.
+    """
+    def __new__(cls, result_type, data):
+        return tuple.__new__(cls, (result_type, data))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def type(self):
+        return self[0]
+
+    @property
+    def data(self):
+        return self[1]
+
+    @property
+    def is_binary(self):
+        return self[0] in BINARY_TYPES
+
+    def _encoded(self):
+        # data spilled to ResultStore is decoded from its buffer without reading it into str
+        data = self[1]
+        return data if isinstance(data, str) else data.buffer()
+
+    @property
+    def size(self):
+        """
+        Number of bytes of the decoded data for binary messages, number of bytes of the utf-8 encoded data for
+        the others, whether the data is in memory or spilled to ResultStore.
+        :return:
+        """
+        data = self[1]
+        if not self.is_binary:
+            if not isinstance(data, str):
+                return data.size
+            decoded = self.__dict__.get('_decoded')
+            if decoded is not None:
+                return len(decoded)
+            # ascii is known without scanning the str
+            return len(data) if data.isascii() else len(data.encode('utf-8'))
+        decoded = self.__dict__.get('_decoded')
+        if decoded is not None:
+            return len(decoded)
+        encoded = self._encoded()
+        tail = encoded[-4:]
+        if not isinstance(tail, str):
+            tail = tail.tobytes().decode('ascii')
+        stripped_tail = tail.rstrip()
+        if isinstance(encoded, str) and '\n' in encoded[:100]:
+            # base64 with line breaks (e.g. MIME), which are not in the decoded data
+            length = len(encoded) - encoded.count('\n') - encoded.count('\r')
+        else:
+            length = len(encoded) - (len(tail) - len(stripped_tail))
+        return length * 3 // 4 - stripped_tail[-2:].count('=')
+
+    @property
+    def image_format(self):
+        """
+        'png', 'jpeg', 'gif' or 'svg' by the leading bytes of IMG data, None if it is unknown or not IMG.
+        :return:
+        """
+        if self[0] != 'IMG':
+            return None
+        head = self._encoded()[:16]
+        try:
+            head = binascii.a2b_base64(head if isinstance(head, str) else head.tobytes())
+        except binascii.Error:
+            return None
+        for signature, image_format in _IMAGE_SIGNATURES:
+            if head.startswith(signature):
+                return image_format
+        return None
+
+    def bytes(self):
+        """
+        The decoded data of binary messages or the utf-8 encoded data of the others, it is cached.
+        :return:
+        """
+        decoded = self.__dict__.get('_decoded')
+        if decoded is None:
+            if self.is_binary:
+                decoded = binascii.a2b_base64(self._encoded())
+            elif isinstance(self[1], str):
+                decoded = self[1].encode('utf-8')
+            else:
+                # StoredResult is utf-8 already
+                decoded = self[1].buffer().tobytes()
+            self._decoded = decoded
+        return decoded
+
+    def memoryview(self):
+        return memoryview(self.bytes())
+
+
+class ResultList(collections.abc.Sequence):
+    """
+    Read only list of the result messages of paragraph, each one is a ResultMessage (type, data) tuple. It refers to
+    the messages of the paragraph json instead of copying them, the ResultMessages are built when they are accessed
+    and kept, so that the decoded data is shared by all the readers of the paragraph.
+    """
+    __slots__ = ('_msgs', '_messages')
+
+    def __init__(self, msgs = ()):
+        self._msgs = msgs
+        self._messages = None
+
+    def __len__(self):
+        return len(self._msgs)
+
+    def _message(self, index):
+        if self._messages is None:
+            self._messages = [None] * len(self._msgs)
+        message = self._messages[index]
+        if message is None:
+            msg = self._msgs[index]
+            message = ResultMessage(msg['type'], msg['data'])
+            self._messages[index] = message
+        return message
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._message(i) for i in range(*index.indices(len(self._msgs)))]
+        return self._message(index)
+
+    def __eq__(self, other):
+        if isinstance(other, collections.abc.Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class TableResults:
+    """
+    Helpers to decode the TABLE messages of results into pyzeppelin.table.Table, they require numpy
+    (and pandas for get_dataframe).
+    """
+    __slots__ = ()
+
+    def _table_data(self, index):
+        tables = [data for result_type, data in self.results if result_type == 'TABLE']
+        if index >= len(tables):
+            raise Exception("There're only {} TABLE results".format(len(tables)))
+        return str(tables[index])
+
+    def get_tables(self, types = None):
+        """
+        Decode all the TABLE results into Tables.
+        :param types: dict of column name to its type, see pyzeppelin.table.parse_table
+        :return:
+        """
+        # imported here so that numpy is only loaded when it is used
+        from pyzeppelin.table import parse_table
+        return [parse_table(str(data), types) for result_type, data in self.results if result_type == 'TABLE']
+
+    def get_table(self, index = 0, types = None):
+        """
+        Decode the index-th TABLE result into Table.
+        :param index:
+        :param types: dict of column name to its type, see pyzeppelin.table.parse_table
+        :return:
+        """
+        from pyzeppelin.table import parse_table
+        return parse_table(self._table_data(index), types)
+
+    def get_dataframe(self, index = 0, types = None):
+        """
+        Decode the index-th TABLE result into pandas DataFrame.
+        :param index:
+        :param types: dict of column name to its type, see pyzeppelin.table.parse_table
+        :return:
+        """
+        return self.get_table(index, types).to_pandas()
+
+    def iter_table_chunks(self, index = 0, chunk_rows = 100000, types = None):
+        """
+        Decode the index-th TABLE result into Tables of at most chunk_rows rows, one chunk at a time.
+        :param index:
+        :param chunk_rows:
+        :param types: dict of column name to its type, see pyzeppelin.table.parse_table
+        :return:
+        """
+        from pyzeppelin.table import iter_table_chunks
+        return iter_table_chunks(self._table_data(index), chunk_rows, types)
+
 
 class Note:
     """
-    Json format note result which include list of paragraph result, this is returned by Zeppelin rest api
+    Json format note result which include list of paragraph result, this is returned by Zeppelin rest api.
+    Paragraphs are only built when they are accessed for the first time. When keep_json is False, the note json
+    is not kept in note_json (and neither is the paragraph json in its paragraphs), so the fields of the response
+    which are not used by pyzeppelin (e.g. config, settings) can be garbage collected.
     """
-    def __init__(self, note_json):
-        self.note_json = note_json
+    __slots__ = ('note_json', 'id', 'name', 'is_running', 'poll_count', 'keep_json', '_paragraph_jsons', '_paragraphs')
+
+    def __init__(self, note_json, keep_json = True):
+        self.note_json = note_json if keep_json else None
+        self.keep_json = keep_json
         self.id = note_json['id']
         self.name = note_json['name']
         self.is_running = False
+        # number of queries the wait_until_note_finished api took to get this result
+        self.poll_count = 0
         if 'info' in note_json:
             info_json = note_json['info']
             self.is_running = bool(info_json.get('isRunning', 'False'))
+        self._paragraph_jsons = note_json.get('paragraphs') or []
+        self._paragraphs = None
 
-        self.paragraphs = []
-        if 'paragraphs' in note_json:
-            paragraph_json_array = note_json['paragraphs']
-            self.paragraphs = list(map(lambda x : Paragraph(x), paragraph_json_array))
+    @property
+    def paragraphs(self):
+        if self._paragraphs is None:
+            self._paragraphs = [Paragraph(x, self.keep_json) for x in self._paragraph_jsons]
+            self._paragraph_jsons = None
+        return self._paragraphs
+
+    @paragraphs.setter
+    def paragraphs(self, paragraphs):
+        self._paragraphs = paragraphs
+        self._paragraph_jsons = None
 
     def is_success(self):
         for p in self.paragraphs:
@@ -43,44 +260,68 @@ class Note:
                 return False
         return True
 
+    def get_progress(self):
+        """
+        Average progress of all paragraphs, completed paragraphs count as 100.
+        :return:
+        """
+        if not self.paragraphs:
+            return 0
+        return sum(100 if p.is_completed() else p.progress for p in self.paragraphs) / len(self.paragraphs)
+
     def get_errors(self):
         for p in self.paragraphs:
             if p.status != 'FINISHED':
                 return "Paragraph {0} is {1}.\n\nText: {2}\n\nResults:{3}\n\nAssociated job urls: {4}\n\nJson:{5}"\
-                    .format(p.id, p.status, p.text, '\n'.join(list(map(lambda x: x[1], p.results))), str(p.jobUrls), p.paragraph_json)
+                    .format(p.id, p.status, p.text, '\n'.join(list(map(lambda x: str(x[1]), p.results))), str(p.jobUrls), p.get_json())
         return "All paragraphs are finished successfully!"
 
+    def get_json(self):
+        """
+        The note json, or the json of the parsed fields when keep_json is False.
+        :return:
+        """
+        if self.note_json is not None:
+            return self.note_json
+        return {'id': self.id, 'name': self.name, 'info': {'isRunning': self.is_running},
+                'paragraphs': [p.get_json() for p in self.paragraphs]}
+
     def __repr__(self):
-        return json.dumps(self.note_json, indent=2)
+        return json.dumps(self.get_json(), indent=2, default=repr)
 
 
-class Paragraph:
+class Paragraph(TableResults):
     """
     Json format of paragraph result which returned by Zeppelin rest api.
+    results and jobUrls refer to the paragraph json instead of copying it. When keep_json is False,
+    paragraph_json is None and only the fields below are kept.
     """
-    def __init__(self, paragraph_json):
-        self.paragraph_json = paragraph_json
+    __slots__ = ('paragraph_json', 'id', 'text', 'status', 'progress', 'poll_count', 'results', '_runtime_infos')
+
+    def __init__(self, paragraph_json, keep_json = True):
+        self.paragraph_json = paragraph_json if keep_json else None
         self.id = paragraph_json['id']
         self.text = paragraph_json.get('text')
         self.status = paragraph_json.get('status')
         self.progress = 0
+        # number of queries the wait_until_paragraph_finished api took to get this result
+        self.poll_count = 0
         if 'progress' in paragraph_json:
             self.progress = int(paragraph_json['progress'])
         if 'results' in paragraph_json:
-            results_json = paragraph_json['results']
-            msg_array = results_json['msg']
-            self.results = list(map(lambda x : (x['type'], x['data']), msg_array))
+            self.results = ResultList(paragraph_json['results'].get('msg') or [])
         else:
-            self.results = []
+            self.results = _EMPTY_RESULTS
+        self._runtime_infos = paragraph_json.get('runtimeInfos')
 
-        self.jobUrls = []
-        if 'runtimeInfos' in paragraph_json:
-            runtimeInfos_json = paragraph_json['runtimeInfos']
-            if 'jobUrl' in runtimeInfos_json:
-                jobUrl_json = runtimeInfos_json['jobUrl']
-                if 'values' in jobUrl_json:
-                    jobUrl_values = jobUrl_json['values']
-                    self.jobUrls = list(map(lambda x: x['jobUrl'], filter(lambda x : 'jobUrl' in x, jobUrl_values)))
+    @property
+    def jobUrls(self):
+        if not self._runtime_infos or 'jobUrl' not in self._runtime_infos:
+            return []
+        jobUrl_json = self._runtime_infos['jobUrl']
+        if 'values' not in jobUrl_json:
+            return []
+        return [x['jobUrl'] for x in jobUrl_json['values'] if 'jobUrl' in x]
 
     def is_completed(self):
         return self.status in ['FINISHED', 'ERROR', 'ABORTED']
@@ -94,26 +335,119 @@ class Paragraph:
     def get_errors(self):
         if self.status != 'FINISHED':
             return "Paragraph {0} is failed.\n\nText: {1}\n\nResults:{2}\n\nAssociated job urls: {3}\n\nJson:{4}"\
-                .format(self.id, self.text, '\n'.join(list(map(lambda x: x[1], self.results))), str(self.jobUrls), self.paragraph_json)
+                .format(self.id, self.text, '\n'.join(list(map(lambda x: str(x[1]), self.results))), str(self.jobUrls), self.get_json())
         return "Paragraph is finished successfully!"
 
+    def get_json(self):
+        """
+        The paragraph json, or the json of the parsed fields when keep_json is False.
+        :return:
+        """
+        if self.paragraph_json is not None:
+            return self.paragraph_json
+        paragraph_json = {'id': self.id, 'text': self.text, 'status': self.status, 'progress': self.progress}
+        if self.results:
+            paragraph_json['results'] = {'msg': [{'type': t, 'data': d} for t, d in self.results]}
+        if self._runtime_infos:
+            paragraph_json['runtimeInfos'] = self._runtime_infos
+        return paragraph_json
+
+    def __repr__(self):
+        # the data spilled to ResultStore is shown as its repr
+        return json.dumps(self.get_json(), indent=2, default=repr)
+
+
+_EMPTY_RESULTS = ResultList()
+
+
+class NoteJobStatus:
+    """
+    Job status of note returned by Zeppelin rest api /api/notebook/job/{noteId}. Unlike Note, it only contains
+    the status and progress of each paragraph without text and results, so it is cheap to query repeatedly.
+    """
+    __slots__ = ('id', 'paragraphs', 'is_running')
+
+    def __init__(self, status_json):
+        # Zeppelin before 0.9 only returns the list of paragraph status
+        if isinstance(status_json, list):
+            status_json = {'paragraphs': status_json}
+        self.id = status_json.get('id')
+        self.paragraphs = list(map(lambda x : ParagraphJobStatus(x), status_json.get('paragraphs', [])))
+        if 'isRunning' in status_json:
+            self.is_running = bool(status_json['isRunning'])
+        else:
+            self.is_running = any(p.status in ['PENDING', 'RUNNING'] for p in self.paragraphs)
+
+    def get_progress(self):
+        """
+        Average progress of all paragraphs, completed paragraphs count as 100.
+        :return:
+        """
+        if not self.paragraphs:
+            return 0
+        return sum(100 if p.is_completed() else p.progress for p in self.paragraphs) / len(self.paragraphs)
+
     def __repr__(self):
-        return json.dumps(self.paragraph_json, indent=2)
+        return str(list(map(lambda p: (p.id, p.status, p.progress), self.paragraphs)))
 
 
-class ExecuteResult:
+class ParagraphJobStatus:
     """
-    Paragraph result.
+    Job status of paragraph returned by Zeppelin rest api /api/notebook/job/{noteId}/{paragraphId}.
     """
+    __slots__ = ('id', 'status', 'progress', 'started', 'finished')
+
+    def __init__(self, status_json):
+        self.id = status_json['id']
+        self.status = status_json.get('status')
+        self.progress = int(status_json.get('progress') or 0)
+        self.started = status_json.get('started')
+        self.finished = status_json.get('finished')
+
+    def is_completed(self):
+        return self.status in ['FINISHED', 'ERROR', 'ABORTED']
+
+    def is_running(self):
+        return self.status == 'RUNNING'
+
+    def __repr__(self):
+        return str(dict((name, getattr(self, name)) for name in self.__slots__))
+
+
+class ExecuteResult(TableResults):
+    """
+    Paragraph result. The fields are read from the paragraph result when they are accessed,
+    so wrapping a ParagraphHandle doesn't query Zeppelin until it is needed.
+    """
+    __slots__ = ('statement_id', '_paragraph_result')
+
     def __init__(self, paragraph_result):
         self.statement_id = paragraph_result.id
-        self.status = paragraph_result.status
-        self.progress = paragraph_result.progress
-        self.results = paragraph_result.results
-        self.jobUrls = paragraph_result.jobUrls
+        self._paragraph_result = paragraph_result
+
+    @property
+    def status(self):
+        return self._paragraph_result.status
+
+    @property
+    def progress(self):
+        return self._paragraph_result.progress
+
+    @property
+    def results(self):
+        return self._paragraph_result.results
+
+    @property
+    def jobUrls(self):
+        return self._paragraph_result.jobUrls
+
+    @property
+    def poll_count(self):
+        return self._paragraph_result.poll_count
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str({'statement_id': self.statement_id, 'status': self.status, 'progress': self.progress,
+                    'results': self.results, 'jobUrls': self.jobUrls, 'poll_count': self.poll_count})
 
     def is_success(self):
         return self.status == 'FINISHED'
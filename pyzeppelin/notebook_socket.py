@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import threading
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+logger = logging.getLogger(__name__)
+
+
+COMPLETED_STATUSES = ('FINISHED', 'ERROR', 'ABORTED')
+
+
+class NotebookSocket:
+    """
+    Listener of the Zeppelin notebook websocket (/ws). Zeppelin pushes paragraph status to every
+    connection which has opened (GET_NOTE) a note, this class notifies the listeners of the completion events
+    per paragraph and per note, so that callers can wait until something is completed instead of polling
+    the rest api.
+
+    The socket only tells when it is worth to query again, the result itself is still fetched via rest api.
+    """
+    def __init__(self, websocket_url, ticket, cookie = None, connect_timeout = 5, ping_interval = 10):
+        """
+
+        :param websocket_url: e.g. ws://localhost:8080/ws
+        :param ticket: dict of principal, ticket and roles returned by /api/security/ticket
+        :param cookie: cookie header sent in the websocket handshake
+        :param connect_timeout:
+        :param ping_interval:
+        """
+        if websocket is None:
+            raise ImportError("websocket-client is required to use websocket, please install it via 'pip install websocket-client'")
+        self.websocket_url = websocket_url
+        self.ticket = ticket
+        self.cookie = cookie
+        self.connect_timeout = connect_timeout
+        self.ping_interval = ping_interval
+        self._condition = threading.Condition()
+        self._ws = None
+        self._connected = False
+        # note ids opened on current connection, and the ones whose content has been sent back by Zeppelin
+        self._subscribed = set()
+        self._loaded = set()
+        self._note_paragraphs = {}
+        self._listeners = []
+
+    def is_connected(self):
+        return self._connected
+
+    def connect(self):
+        """
+        Connect to Zeppelin, block until the connection is established.
+        :return:
+        """
+        with self._condition:
+            if self._connected:
+                return
+            ws = websocket.WebSocketApp(self.websocket_url,
+                                        cookie = self.cookie,
+                                        on_open = self._on_open,
+                                        on_message = self._on_message,
+                                        on_error = self._on_error,
+                                        on_close = self._on_close)
+            self._ws = ws
+            thread = threading.Thread(target = ws.run_forever, kwargs = {'ping_interval': self.ping_interval},
+                                      name = "zeppelin-notebook-socket", daemon = True)
+            thread.start()
+            self._condition.wait_for(lambda: self._connected or self._ws is not ws, self.connect_timeout)
+            if not self._connected:
+                self._ws = None
+                ws.close()
+                raise Exception("Fail to connect to Zeppelin websocket: " + self.websocket_url)
+
+    def close(self):
+        with self._condition:
+            ws = self._ws
+            self._reset()
+        if ws:
+            ws.close()
+
+    def subscribe(self, note_id, timeout = 5):
+        """
+        Open the note on this connection so that Zeppelin pushes its paragraph updates here,
+        block until Zeppelin has sent the note back. Return False if it is not subscribed.
+        :param note_id:
+        :param timeout:
+        :return:
+        """
+        with self._condition:
+            if not self._connected:
+                return False
+            if note_id not in self._subscribed:
+                self._subscribed.add(note_id)
+                self._send('GET_NOTE', {'id': note_id})
+            return self._condition.wait_for(lambda: note_id in self._loaded or not self._connected, timeout) \
+                and self._connected
+
+    def unsubscribe(self, note_id):
+        """
+        Forget the note once nobody waits for it. Zeppelin can't be told to stop pushing its updates on this
+        connection, they're taken as the updates of unknown paragraphs.
+        :param note_id:
+        :return:
+        """
+        with self._condition:
+            self._subscribed.discard(note_id)
+            self._loaded.discard(note_id)
+            self._note_paragraphs.pop(note_id, None)
+
+    def add_listener(self, listener):
+        """
+        Register listener(key) which is invoked for each completion event of note id or paragraph id,
+        and with key None when the connection is lost. It is invoked in the websocket thread with the lock of this socket held, so it must not block.
+        :param listener:
+        :return:
+        """
+        with self._condition:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def _send(self, op, data):
+        message = {'op': op, 'data': data,
+                   'principal': self.ticket.get('principal', 'anonymous'),
+                   'ticket': self.ticket.get('ticket', 'anonymous'),
+                   'roles': self.ticket.get('roles', '[]')}
+        self._ws.send(json.dumps(message))
+
+    def _reset(self):
+        self._ws = None
+        self._connected = False
+        self._subscribed.clear()
+        self._loaded.clear()
+        self._note_paragraphs.clear()
+        self._condition.notify_all()
+
+    def _notify_listeners(self, key):
+        for listener in self._listeners:
+            try:
+                listener(key)
+            except Exception as e:
+                logger.warning("Fail to notify listener of websocket event: %s", e)
+
+    def _on_open(self, ws):
+        with self._condition:
+            if ws is self._ws:
+                self._connected = True
+                self._condition.notify_all()
+
+    def _on_error(self, ws, error):
+        logger.warning("Zeppelin websocket error: %s", error)
+
+    def _on_close(self, ws, close_status_code = None, close_msg = None):
+        with self._condition:
+            if ws is self._ws:
+                logger.warning("Zeppelin websocket is closed, fall back to polling")
+                self._reset()
+                self._notify_listeners(None)
+
+    def _on_message(self, ws, message):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        op = msg.get('op')
+        data = msg.get('data') or {}
+        with self._condition:
+            if op == 'NOTE':
+                note = data.get('note') or {}
+                note_id = note.get('id')
+                if note_id:
+                    self._note_paragraphs[note_id] = set(p.get('id') for p in note.get('paragraphs') or [])
+                    self._loaded.add(note_id)
+            elif op == 'PARAGRAPH':
+                paragraph = data.get('paragraph') or {}
+                if paragraph.get('status') in COMPLETED_STATUSES:
+                    paragraph_id = paragraph.get('id')
+                    self._notify_listeners(paragraph_id)
+                    note_ids = [note_id for note_id in self._subscribed
+                                if paragraph_id in self._note_paragraphs.get(note_id, ())]
+                    # unknown paragraph, wake up all the waiters of notes to query again
+                    for note_id in note_ids or self._subscribed:
+                        self._notify_listeners(note_id)
+            elif op == 'NOTE_RUNNING_STATUS':
+                # this message doesn't carry note id
+                if not data.get('status'):
+                    for note_id in self._subscribed:
+                        self._notify_listeners(note_id)
+            else:
+                return
+            self._condition.notify_all()
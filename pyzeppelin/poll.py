@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import random
+
+
+class PollStrategy:
+    """
+    Decide how long to sleep before the next status query while waiting for a note/paragraph.
+    """
+    def next_interval(self, poll_count, elapsed, progress = None):
+        """
+        Return the seconds to sleep before the next query.
+        :param poll_count: number of queries done so far in this wait
+        :param elapsed: seconds since the wait started
+        :param progress: latest progress (0-100) reported by Zeppelin, None if unknown
+        :return:
+        """
+        raise NotImplementedError
+
+
+class FixedPollStrategy(PollStrategy):
+    """
+    Query at a fixed interval, this is the default behavior.
+    """
+    def __init__(self, interval = 1):
+        self.interval = interval
+
+    def next_interval(self, poll_count, elapsed, progress = None):
+        return self.interval
+
+
+class BackoffPollStrategy(PollStrategy):
+    """
+    Start with a short interval and back off exponentially up to max_interval, so short statements
+    are detected quickly while long jobs are not queried too often. Each interval is randomized by
+    +/- jitter (a fraction of the interval) so that many waiters don't query at the same moment, the randomized
+    interval is still bounded by initial_interval and max_interval.
+
+    When use_progress is True and Zeppelin reports a progress between 0 and 100, the remaining time
+    is estimated from the elapsed time and the progress, and the next query is scheduled at half of it
+    (still bounded by initial_interval and max_interval).
+    """
+    def __init__(self, initial_interval = 0.05, multiplier = 2, max_interval = 5, jitter = 0.1, use_progress = False):
+        if initial_interval <= 0 or max_interval < initial_interval:
+            raise ValueError("Invalid poll intervals, initial_interval: {}, max_interval: {}"
+                             .format(initial_interval, max_interval))
+        self.initial_interval = initial_interval
+        self.multiplier = multiplier
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.use_progress = use_progress
+
+    def next_interval(self, poll_count, elapsed, progress = None):
+        if self.use_progress and progress and 0 < progress < 100 and elapsed > 0:
+            remaining = elapsed * (100 - progress) / progress
+            interval = remaining / 2
+        else:
+            interval = self.initial_interval * (self.multiplier ** max(poll_count - 1, 0))
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        # clamped after the jitter, so the bounds hold for every interval
+        return min(max(interval, self.initial_interval), self.max_interval)
+
+
+def note_job_state(note_status):
+    """
+    State of the note job in the transition logs, RUNNING or IDLE.
+    :param note_status: NoteJobStatus
+    :return:
+    """
+    return 'RUNNING' if note_status.is_running else 'IDLE'
+
+
+def log_state_transition(logger, note_id, paragraph_id, old_state, state, poll_count, elapsed):
+    """
+    Log the change of the job state of note (paragraph_id is None) or paragraph seen by a wait at debug level,
+    with the ids, states, poll_count and elapsed seconds also as the extra attributes of the record. Nothing is
+    logged if the state is unchanged, callers check logger.isEnabledFor(logging.DEBUG) first so that polling
+    doesn't pay for it when debug logging is off. Return state, which is old_state of the next call.
+    :param logger:
+    :param note_id:
+    :param paragraph_id:
+    :param old_state: None before the first poll
+    :param state:
+    :param poll_count:
+    :param elapsed:
+    :return:
+    """
+    if state != old_state:
+        logger.debug("Job state of note %s paragraph %s: %s -> %s after %d polls in %.3fs",
+                     note_id, paragraph_id, old_state, state, poll_count, elapsed,
+                     extra = {'note_id': note_id, 'paragraph_id': paragraph_id, 'old_state': old_state,
+                              'state': state, 'poll_count': poll_count, 'elapsed': elapsed})
+    return state
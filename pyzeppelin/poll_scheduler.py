@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import Future, InvalidStateError
+import copy
+from pyzeppelin.poll import log_state_transition
+from pyzeppelin.poll import note_job_state
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Wait:
+    """
+    Poll count and start time of one waiting future, the poll strategy applies to each wait separately.
+    """
+    def __init__(self):
+        self.poll_count = 0
+        self.start_time = time.monotonic()
+
+
+class _NoteWatch:
+    """
+    Futures waiting for the note itself or its paragraphs, they're all served by the same status query.
+    """
+    def __init__(self, note_id):
+        self.note_id = note_id
+        self.note_futures = []
+        # paragraph_id -> list of futures
+        self.paragraph_futures = {}
+        # future -> _Wait
+        self.waits = {}
+        # number of status queries of the note, and the time of the first one
+        self.poll_count = 0
+        self.start_time = time.monotonic()
+        self.next_poll_time = 0
+        # number of websocket events received for this note
+        self.events = 0
+        # paragraph_id (None for the note) -> last job state, only tracked when debug logging is enabled
+        self.states = {}
+
+    def is_empty(self):
+        return not self.note_futures and not self.paragraph_futures
+
+
+class PollScheduler:
+    """
+    Wait for the note and paragraph jobs of one ZeppelinClient in a single background thread.
+    Jobs are grouped per note, each round queries the job status of the note once for all the paragraphs
+    waited in that note, and fetches the full result of each job once it is completed. Each note is polled
+    according to the poll strategy of the client, or when websocket is enabled, when Zeppelin pushes
+    a completion event of the note (and every websocket_check_interval seconds in case an event is missed).
+
+    watch_note and watch_paragraph return concurrent.futures.Future, use add_done_callback to be notified.
+    """
+    def __init__(self, zeppelin_client):
+        self.zeppelin_client = zeppelin_client
+        self.client_config = zeppelin_client.client_config
+        self.poll_strategy = self.client_config.get_poll_strategy()
+        self._condition = threading.Condition()
+        # note_id -> _NoteWatch
+        self._watches = {}
+        self._thread = None
+        self._closed = False
+
+    def watch_note(self, note_id):
+        """
+        Return the future of the Note, which is completed once the note is not running.
+        :param note_id:
+        :return:
+        """
+        future = Future()
+        with self._condition:
+            watch = self._get_watch(note_id)
+            watch.note_futures.append(future)
+            watch.waits[future] = _Wait()
+        return future
+
+    def watch_paragraph(self, note_id, paragraph_id):
+        """
+        Return the future of the Paragraph, which is completed once the paragraph is completed.
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        future = Future()
+        with self._condition:
+            watch = self._get_watch(note_id)
+            watch.paragraph_futures.setdefault(paragraph_id, []).append(future)
+            watch.waits[future] = _Wait()
+        return future
+
+    def pending_count(self):
+        """
+        Number of futures which are not completed yet.
+        :return:
+        """
+        with self._condition:
+            return sum(len(watch.note_futures) + sum(len(f) for f in watch.paragraph_futures.values())
+                       for watch in self._watches.values())
+
+    def close(self):
+        """
+        Stop the poller thread, the pending futures fail.
+        :return:
+        """
+        with self._condition:
+            self._closed = True
+            watches = list(self._watches.values())
+            self._watches.clear()
+            self._condition.notify_all()
+        for watch in watches:
+            for future in watch.note_futures + [f for fs in watch.paragraph_futures.values() for f in fs]:
+                self._complete(future, exception = Exception("ZeppelinClient is closed"))
+
+    def _get_watch(self, note_id):
+        """
+        Must be called with the lock held.
+        :param note_id:
+        :return:
+        """
+        if self._closed:
+            raise Exception("ZeppelinClient is closed")
+        now = time.monotonic()
+        watch = self._watches.get(note_id)
+        if watch is None:
+            watch = _NoteWatch(note_id)
+            self._watches[note_id] = watch
+        else:
+            # the new wait starts its poll strategy over, but keeps sharing the scheduled query
+            watch.next_poll_time = min(watch.next_poll_time, now + self.poll_strategy.next_interval(0, 0))
+        if self._thread is None:
+            self._thread = threading.Thread(target = self._run, name = "zeppelin-poll-scheduler", daemon = True)
+            self._thread.start()
+        self._condition.notify_all()
+        return watch
+
+    def _on_socket_event(self, note_id):
+        # invoked by NotebookSocket when there's completion event of note, or note_id is None when it is disconnected
+        with self._condition:
+            watches = self._watches.values() if note_id is None else [self._watches.get(note_id)]
+            for watch in watches:
+                if watch is not None:
+                    watch.events += 1
+                    watch.next_poll_time = 0
+            self._condition.notify_all()
+
+    def _complete(self, future, result = None, exception = None):
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            # cancelled by caller
+            pass
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed or not self._watches:
+                        # _get_watch starts the thread again, an idle thread would keep the client alive
+                        self._thread = None
+                        return
+                    now = time.monotonic()
+                    due_watches = [watch for watch in self._watches.values() if watch.next_poll_time <= now]
+                    if due_watches:
+                        break
+                    self._condition.wait(min(watch.next_poll_time for watch in self._watches.values()) - now)
+            for watch in due_watches:
+                try:
+                    self._poll(watch)
+                except Exception as e:
+                    logger.warning("Fail to poll note %s: %s", watch.note_id, e)
+                    # don't poll it again immediately
+                    with self._condition:
+                        now = time.monotonic()
+                        watch.next_poll_time = max(watch.next_poll_time, now + self.poll_strategy.next_interval(
+                            watch.poll_count, now - watch.start_time))
+
+    def _log_transitions(self, watch, note_status, paragraph_status, paragraph_futures):
+        elapsed = time.monotonic() - watch.start_time
+        if note_status is not None:
+            watch.states[None] = log_state_transition(logger, watch.note_id, None, watch.states.get(None),
+                                                      note_job_state(note_status), watch.poll_count, elapsed)
+        for paragraph_id in paragraph_futures:
+            status = paragraph_status.get(paragraph_id)
+            if status is not None:
+                watch.states[paragraph_id] = log_state_transition(logger, watch.note_id, paragraph_id,
+                                                                  watch.states.get(paragraph_id), status.status,
+                                                                  watch.poll_count, elapsed)
+
+    def _poll(self, watch):
+        note_id = watch.note_id
+        try:
+            notebook_socket = self.zeppelin_client._subscribe_note(note_id)
+            if notebook_socket:
+                notebook_socket.add_listener(self._on_socket_event)
+        except Exception as e:
+            logger.warning("Fail to subscribe note %s, fall back to polling: %s", note_id, e)
+            notebook_socket = None
+        with self._condition:
+            events = watch.events
+            # done futures are the cancelled ones, they're just dropped
+            completed = dict((id(f), (f, None, None)) for f in watch.note_futures if f.done())
+            completed.update((id(f), (f, None, None)) for fs in watch.paragraph_futures.values() for f in fs if f.done())
+            note_futures = [f for f in watch.note_futures if not f.done()]
+            paragraph_futures = {}
+            for paragraph_id, futures in watch.paragraph_futures.items():
+                futures = [f for f in futures if not f.done()]
+                if futures:
+                    paragraph_futures[paragraph_id] = futures
+            waits = [watch.waits[f] for f in note_futures + [f for fs in paragraph_futures.values() for f in fs]]
+
+        progress = None
+        try:
+            if not note_futures and len(paragraph_futures) == 1:
+                # the status of single paragraph is cheaper than the status of the whole note
+                paragraph_status = [self.zeppelin_client.query_paragraph_status(note_id, list(paragraph_futures)[0])]
+                note_status = None
+            else:
+                note_status = self.zeppelin_client.query_note_status(note_id)
+                paragraph_status = note_status.paragraphs
+            watch.poll_count += 1
+            for wait in waits:
+                wait.poll_count += 1
+            paragraph_status = dict((p.id, p) for p in paragraph_status)
+            if logger.isEnabledFor(logging.DEBUG):
+                self._log_transitions(watch, note_status if note_futures else None, paragraph_status,
+                                      paragraph_futures)
+            for paragraph_id, futures in paragraph_futures.items():
+                status = paragraph_status.get(paragraph_id)
+                if status is None:
+                    error = Exception("Paragraph {} is not found in note {}".format(paragraph_id, note_id))
+                    completed.update((id(f), (f, None, error)) for f in futures)
+                elif status.is_completed():
+                    result, error = self._fetch(self.zeppelin_client.query_paragraph_result, note_id, paragraph_id,
+                                                fresh = True)
+                    if result is not None:
+                        logger.info("paragraph is completed, jobURL: %s", result.jobUrls)
+                    completed.update(self._complete_waits('paragraph', watch, futures, result, error))
+                else:
+                    progress = status.progress if progress is None else min(progress, status.progress)
+            if note_futures:
+                if not note_status.is_running:
+                    result, error = self._fetch(self.zeppelin_client.query_note_result, note_id, fresh = True)
+                    completed.update(self._complete_waits('note', watch, note_futures, result, error))
+                else:
+                    progress = note_status.get_progress()
+        except Exception as e:
+            # same as the blocking wait, the failure of query is raised to all the callers
+            completed.update((id(f), (f, None, e)) for f in note_futures)
+            completed.update((id(f), (f, None, e)) for fs in paragraph_futures.values() for f in fs)
+
+        with self._condition:
+            for future, _, _ in completed.values():
+                watch.waits.pop(future, None)
+            watch.note_futures = [f for f in watch.note_futures if id(f) not in completed]
+            for paragraph_id in list(watch.paragraph_futures):
+                futures = [f for f in watch.paragraph_futures[paragraph_id] if id(f) not in completed]
+                if futures:
+                    watch.paragraph_futures[paragraph_id] = futures
+                else:
+                    del watch.paragraph_futures[paragraph_id]
+            now = time.monotonic()
+            unsubscribe = False
+            if watch.is_empty():
+                if self._watches.get(note_id) is watch:
+                    del self._watches[note_id]
+                    unsubscribe = notebook_socket is not None
+            elif notebook_socket and notebook_socket.is_connected():
+                # poll immediately if there's event during the query
+                watch.next_poll_time = 0 if watch.events != events else now + self.client_config.websocket_check_interval
+            elif watch.next_poll_time <= now:
+                # the query is shared, it is due as soon as one of the waits is due
+                watch.next_poll_time = now + min(self.poll_strategy.next_interval(wait.poll_count, now - wait.start_time,
+                                                                                  progress)
+                                                 for wait in watch.waits.values())
+        if unsubscribe:
+            # outside of the lock, the socket notifies _on_socket_event with its own lock held
+            notebook_socket.unsubscribe(note_id)
+        for future, result, error in completed.values():
+            if future.done():
+                continue
+            self._complete(future, result, error)
+
+    def _complete_waits(self, kind, watch, futures, result, error):
+        """
+        Yield (id(future), (future, result, error)) of futures, each result has the poll count of its own wait,
+        it is copied when several futures wait for the same job.
+        :return:
+        """
+        instrumentation = self.client_config.instrumentation
+        for i, future in enumerate(futures):
+            wait = watch.waits[future]
+            future_result = result
+            if result is not None:
+                if i > 0:
+                    future_result = copy.copy(result)
+                future_result.poll_count = wait.poll_count
+            if instrumentation is not None:
+                instrumentation.observe_wait(kind, wait.poll_count, time.monotonic() - wait.start_time)
+            yield id(future), (future, future_result, error)
+
+    def _fetch(self, query, *args, **kwargs):
+        # the final result is always fetched again, the coalesced one might be taken before completion
+        try:
+            return query(*args, **kwargs), None
+        except Exception as e:
+            return None, e
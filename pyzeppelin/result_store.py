@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+class StoredResult:
+    """
+    Result data spilled to a file by ResultStore, it takes the place of the str data in the (type, data) result
+    messages. size is the number of bytes of the utf-8 encoded data.
+
+    buffer() maps the file and returns a zero-copy memoryview of the utf-8 bytes, read() (or str()) decodes it
+    into str, open() returns a text file to read it incrementally. The file is deleted when the StoredResult is
+    garbage collected, or when it is evicted by the disk budget of the store, reading it afterwards raises Exception.
+    """
+    def __init__(self, store, path, size):
+        self.size = size
+        self._store = store
+        self._path = path
+        self._mmap = None
+        self._evicted = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._path
+
+    def _check(self):
+        if self._evicted:
+            raise Exception("Result {} is evicted from the result store".format(self._path))
+        self._store._touch(self._path)
+
+    def buffer(self):
+        """
+        Return the memoryview of the utf-8 bytes of the data, the file is mapped in memory at the first call.
+        :return:
+        """
+        with self._lock:
+            if self._mmap is None:
+                self._check()
+                with open(self._path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            else:
+                self._store._touch(self._path)
+            return memoryview(self._mmap)
+
+    def read(self):
+        """
+        Read the whole data as str, it isn't kept by StoredResult.
+        :return:
+        """
+        return str(self.buffer(), 'utf-8')
+
+    def open(self):
+        """
+        Open the data as text file.
+        :return:
+        """
+        self._check()
+        return open(self._path, 'r', encoding = 'utf-8', newline = '')
+
+    def _evict(self):
+        with self._lock:
+            self._evicted = True
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                    self._mmap = None
+                except BufferError:
+                    # the memoryviews returned by buffer() are still in use, the mapping stays valid until
+                    # they are released even after the file is deleted
+                    pass
+
+    def __str__(self):
+        return self.read()
+
+    def __eq__(self, other):
+        if isinstance(other, StoredResult):
+            return self is other or self.read() == other.read()
+        if isinstance(other, str):
+            return self.read() == other
+        return NotImplemented
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return "StoredResult(path={}, size={})".format(self._path, self.size)
+
+
+class ResultStore:
+    """
+    Spill the large result data of paragraphs to local files, so that they don't stay in the memory of the process.
+    Set it as ClientConfig.result_store, then the data of the result messages which are no shorter than threshold
+    characters is replaced by StoredResult when the client parses notes and paragraphs.
+
+    Files are written under directory (a temporary directory by default), their total size is bounded by max_bytes,
+    the least recently read results are evicted (their files are deleted) beyond it. Data larger than max_bytes
+    is kept in memory.
+    """
+    def __init__(self, directory = None, threshold = 1024 * 1024, max_bytes = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.spills = 0
+        self.evictions = 0
+        self._bytes = 0
+        # finalizers of StoredResult may run in any thread, even the one holding the lock
+        self._lock = threading.RLock()
+        # path -> (size, weakref of StoredResult), the least recently used one is at the front
+        self._results = collections.OrderedDict()
+        self._owns_directory = False
+
+    def _get_directory(self):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix = 'pyzeppelin-results-')
+            self._owns_directory = True
+        return self.directory
+
+    def put(self, data):
+        """
+        Return StoredResult of data if it is no shorter than threshold, otherwise data itself.
+        :param data:
+        :return:
+        """
+        if not isinstance(data, str) or len(data) < self.threshold or len(data) > self.max_bytes:
+            return data
+        with self._lock:
+            directory = self._get_directory()
+        fd, path = tempfile.mkstemp(prefix = 'result-', suffix = '.txt', dir = directory)
+        try:
+            with os.fdopen(fd, 'w', encoding = 'utf-8', newline = '') as f:
+                f.write(data)
+                size = f.tell()
+        except Exception:
+            os.remove(path)
+            raise
+        if size > self.max_bytes:
+            os.remove(path)
+            return data
+        result = StoredResult(self, path, size)
+        with self._lock:
+            self._results[path] = (size, weakref.ref(result))
+            self._bytes += size
+            self.spills += 1
+            evicted = []
+            while self._bytes > self.max_bytes:
+                evicted_path, (evicted_size, ref) = self._results.popitem(last = False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+                evicted.append((evicted_path, ref()))
+        weakref.finalize(result, self._discard, path)
+        for evicted_path, evicted_result in evicted:
+            if evicted_result is not None:
+                evicted_result._evict()
+            self._remove_file(evicted_path)
+        return result
+
+    def spill_paragraph(self, paragraph_json):
+        """
+        Replace the large data of the result messages in paragraph_json by StoredResult, return paragraph_json.
+        :param paragraph_json:
+        :return:
+        """
+        results = paragraph_json.get('results')
+        if isinstance(results, dict):
+            for msg in results.get('msg') or []:
+                if 'data' in msg:
+                    msg['data'] = self.put(msg['data'])
+        return paragraph_json
+
+    def spill_note(self, note_json):
+        """
+        Replace the large data of the result messages of all the paragraphs in note_json by StoredResult,
+        return note_json.
+        :param note_json:
+        :return:
+        """
+        for paragraph_json in note_json.get('paragraphs') or []:
+            self.spill_paragraph(paragraph_json)
+        return note_json
+
+    def _touch(self, path):
+        with self._lock:
+            if path in self._results:
+                self._results.move_to_end(path)
+
+    def _discard(self, path):
+        # the StoredResult is garbage collected
+        with self._lock:
+            entry = self._results.pop(path, None)
+            if entry is None:
+                return
+            self._bytes -= entry[0]
+        self._remove_file(path)
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning("Fail to remove result file %s: %s", path, e)
+
+    def close(self):
+        """
+        Delete all the files, the StoredResults can't be read afterwards.
+        :return:
+        """
+        with self._lock:
+            entries = list(self._results.items())
+            self._results.clear()
+            self._bytes = 0
+        for path, (size, ref) in entries:
+            result = ref()
+            if result is not None:
+                result._evict()
+            self._remove_file(path)
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors = True)
+            self.directory = None
+            self._owns_directory = False
+
+    def stats(self):
+        """
+        spills: data written to files, evictions: files deleted by the disk budget, count and bytes: current
+        number and total size of files.
+        :return:
+        """
+        with self._lock:
+            return {'spills': self.spills, 'evictions': self.evictions, 'count': len(self._results),
+                    'bytes': self._bytes}
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+
+class _Call:
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finish_time = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls of the same key: the first caller runs the function, the callers which come while
+    it is running wait for it and get the same result (or exception) instead of running it again.
+    The result is also returned to the callers which come within freshness seconds after it is finished.
+    Only use it for idempotent reads, the result object is shared by all the callers.
+    """
+    def __init__(self, freshness = 0):
+        self.freshness = freshness
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        # key -> _Call, in flight or finished within freshness seconds
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Return fn(), or the result of the call of the same key which is in flight or still fresh.
+        :param key:
+        :param fn:
+        :return:
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.finish_time is not None \
+                    and time.monotonic() - call.finish_time > self.freshness:
+                call = None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            except BaseException as e:
+                # e.g. KeyboardInterrupt, it is raised in this thread only, the waiters fail with Exception
+                call.error = Exception("Coalesced call is interrupted: {!r}".format(e))
+                raise
+            finally:
+                with self._lock:
+                    call.finish_time = time.monotonic()
+                    # failures are not kept, the next caller retries
+                    if self.freshness <= 0 or call.error is not None:
+                        if self._calls.get(key) is call:
+                            del self._calls[key]
+                    else:
+                        self._evict_expired()
+                call.event.set()
+        else:
+            call.event.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def forget(self, predicate):
+        """
+        Don't share the calls whose key matches predicate with the later callers, e.g. after the data is changed.
+        The callers already waiting for them still get their result.
+        :param predicate:
+        :return:
+        """
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [key for key, call in self._calls.items()
+                   if call.finish_time is not None and now - call.finish_time > self.freshness]
+        for key in expired:
+            del self._calls[key]
+
+    def stats(self):
+        """
+        calls: number of times the function is actually run, shared: number of callers which reused a result.
+        :return:
+        """
+        with self._lock:
+            return {'calls': self.calls, 'shared': self.shared}
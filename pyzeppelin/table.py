@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import io
+import itertools
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# cell values which are decoded as null
+NULL_VALUES = ('', 'null', 'NULL', 'None')
+TRUE_VALUES = ('true', 'True', 'TRUE')
+FALSE_VALUES = ('false', 'False', 'FALSE')
+# column types, from the narrowest to the widest one
+TYPES = ('bool', 'int', 'float', 'str')
+
+
+def _check_numpy():
+    if np is None:
+        raise Exception("numpy is required to decode TABLE result, please install it via 'pip install pyzeppelin[table]'")
+
+
+class Table:
+    """
+    TABLE result decoded into columns. columns is the list of column names, types maps each column to one of
+    'bool', 'int', 'float', 'str', and each column is a numpy array:
+    int64 / float64 / bool for numeric and boolean columns, object array of str for the others.
+    Null cells are NaN in float columns and None in the others, so int columns with nulls are decoded as float,
+    bool columns with nulls as object arrays, and columns of nulls only as float.
+    """
+    def __init__(self, columns, arrays, types):
+        self.columns = columns
+        self.arrays = arrays
+        self.types = types
+
+    def __len__(self):
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def __getitem__(self, column):
+        return self.arrays[self.columns.index(column)]
+
+    def to_dict(self):
+        return dict(zip(self.columns, self.arrays))
+
+    def to_pandas(self):
+        """
+        Convert to pandas DataFrame, requires pandas.
+        :return:
+        """
+        if pd is None:
+            raise Exception("pandas is required to convert TABLE result to DataFrame, "
+                            "please install it via 'pip install pyzeppelin[table]'")
+        return pd.DataFrame(self.to_dict(), columns = self.columns)
+
+    def __repr__(self):
+        return "Table(columns={}, types={}, rows={})".format(self.columns, self.types, len(self))
+
+
+def _decode_column(cells, column_type, null_values):
+    """
+    Decode the cells (list of str) of one column, column_type None means infer it. Return (array, type).
+    :param cells:
+    :param column_type:
+    :param null_values:
+    :return:
+    """
+    null_set = frozenset(null_values)
+    # most of the columns don't have null, tell it by a set lookup instead of checking each cell
+    has_null = not null_set.isdisjoint(cells)
+    nulls = None
+    values = cells
+    if has_null:
+        nulls = np.fromiter(map(null_set.__contains__, cells), dtype = bool, count = len(cells))
+        values = np.array(cells, dtype = object)[~nulls]
+        if len(values) == 0 and column_type is None:
+            return np.full(len(cells), np.nan), 'float'
+    for candidate in TYPES[TYPES.index(column_type or TYPES[0]):]:
+        if candidate == 'bool':
+            # most of the columns are not bool, tell it by the first value
+            if len(values) == 0 or values[0] not in TRUE_VALUES + FALSE_VALUES:
+                continue
+            is_true = np.fromiter(map(frozenset(TRUE_VALUES).__contains__, values), dtype = bool, count = len(values))
+            if not frozenset(TRUE_VALUES + FALSE_VALUES).issuperset(values):
+                continue
+            if not has_null:
+                return is_true, 'bool'
+            array = np.full(len(cells), None, dtype = object)
+            array[~nulls] = is_true
+            return array, 'bool'
+        if candidate in ('int', 'float'):
+            dtype = np.int64 if candidate == 'int' else np.float64
+            try:
+                # reject the candidate by a sample before converting the whole column
+                np.array(values[:64], dtype = dtype)
+                decoded = np.array(values, dtype = dtype)
+            except (ValueError, TypeError, OverflowError):
+                continue
+            if not has_null:
+                return decoded, candidate
+            array = np.full(len(cells), np.nan)
+            array[~nulls] = decoded
+            return array, 'float'
+        array = np.array(cells, dtype = object)
+        if has_null:
+            array[nulls] = None
+        return array, 'str'
+
+
+def _parse_with_pandas(columns, body, types, null_values):
+    """
+    Decode the rows by the C parser of pandas, which infers the types without creating python objects for the
+    numeric cells. The columns which pandas leaves as str are inferred again in the same way as the numpy path
+    (e.g. 'nan'). Return None if pandas can't parse them in the same way as the numpy path, e.g. rows with extra
+    cells, duplicated column names, integers beyond int64.
+    :param columns:
+    :param body:
+    :param types:
+    :param null_values:
+    :return:
+    """
+    try:
+        with warnings.catch_warnings():
+            # e.g. the cells beyond the header are dropped with a warning
+            warnings.simplefilter('error', pd.errors.ParserWarning)
+            frame = pd.read_csv(io.StringIO(body), sep = '\t', header = None, names = columns, index_col = False,
+                                quoting = csv.QUOTE_NONE, na_values = list(null_values), keep_default_na = False,
+                                true_values = list(TRUE_VALUES), false_values = list(FALSE_VALUES),
+                                skip_blank_lines = False, dtype = dict((c, str) for c in types))
+    except (ValueError, pd.errors.ParserWarning):
+        # ParserError and EmptyDataError are ValueError
+        return None
+    arrays = []
+    decoded_types = {}
+    for index, column in enumerate(columns):
+        series = frame.iloc[:, index]
+        nulls = series.isna().to_numpy()
+        if column in types:
+            # decode the given type in the same way as the numpy path
+            cells = series.to_numpy(dtype = object)
+            if nulls.any():
+                cells[nulls] = null_values[0] if null_values else ''
+            array, decoded_types[column] = _decode_column(list(cells), types[column], null_values)
+        elif series.dtype.kind == 'b':
+            array, decoded_types[column] = series.to_numpy(), 'bool'
+        elif series.dtype.kind == 'i':
+            array, decoded_types[column] = series.to_numpy(dtype = np.int64), 'int'
+        elif series.dtype.kind == 'f':
+            array, decoded_types[column] = series.to_numpy(), 'float'
+        elif series.dtype.kind == 'u':
+            # beyond int64, the numpy path decodes it as float
+            return None
+        else:
+            cells = series.to_numpy(dtype = object, copy = True)
+            values = cells[~nulls]
+            if len(values) and all(isinstance(value, (bool, np.bool_)) for value in values):
+                # pandas keeps bool column with nulls as object of True / False
+                cells[nulls] = None
+                array, decoded_types[column] = cells, 'bool'
+            elif all(isinstance(value, str) for value in values):
+                cells[nulls] = null_values[0] if null_values else ''
+                array, decoded_types[column] = _decode_column(list(cells), None, null_values)
+            else:
+                # e.g. python int of the integers beyond uint64, or bool mixed with str
+                return None
+        arrays.append(array)
+    return Table(columns, arrays, decoded_types)
+
+
+def _split_rows(lines, column_count):
+    """
+    Split the rows into the flat list of cells, row by row.
+    :param lines:
+    :param column_count:
+    :return:
+    """
+    if not lines:
+        return []
+    if set(map(str.count, lines, itertools.repeat('\t'))) == {column_count - 1}:
+        return '\t'.join(lines).split('\t')
+    # some rows have missing or extra cells, pad or truncate them to the header
+    cells = []
+    for line in lines:
+        row = line.split('\t')
+        cells.extend(row[:column_count] + [''] * (column_count - len(row)))
+    return cells
+
+
+def _decode(columns, body, types, null_values):
+    """
+    Decode the rows (without header) into Table.
+    :param columns:
+    :param body:
+    :param types:
+    :param null_values:
+    :return:
+    """
+    if pd is not None and body:
+        table = _parse_with_pandas(columns, body, types, null_values)
+        if table is not None:
+            return table
+    lines = body.split('\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    cells = _split_rows(lines, len(columns))
+    arrays = []
+    decoded_types = {}
+    for index, column in enumerate(columns):
+        array, decoded_types[column] = _decode_column(cells[index::len(columns)], types.get(column), null_values)
+        arrays.append(array)
+    return Table(columns, arrays, decoded_types)
+
+
+def _header(data):
+    end = data.find('\n')
+    if end < 0:
+        end = len(data)
+    return data[:end].split('\t'), end + 1
+
+
+def parse_table(data, types = None, null_values = NULL_VALUES):
+    """
+    Decode the data of TABLE result (tab separated cells, one row per line and the first line is the header)
+    into Table. The cells are split and converted by the C parser of pandas when it is installed, otherwise
+    they are split at once and converted per column by numpy, instead of row by row in python.
+    :param data:
+    :param types: dict of column name to its type ('bool', 'int', 'float' or 'str'), the column types which are
+                  not given are inferred as the narrowest type which can decode all the cells
+    :param null_values:
+    :return:
+    """
+    _check_numpy()
+    columns, start = _header(data)
+    return _decode(columns, data[start:], types or {}, null_values)
+
+
+def iter_table_chunks(data, chunk_rows = 100000, types = None, null_values = NULL_VALUES):
+    """
+    Decode the data of TABLE result into Tables of at most chunk_rows rows, so that only one chunk of rows
+    is decoded in memory at once. Column types are inferred from the first chunk, and widened (e.g. int to float)
+    for the following chunks when they can't be decoded as the type.
+    :param data:
+    :param chunk_rows:
+    :param types: see parse_table
+    :param null_values:
+    :return:
+    """
+    _check_numpy()
+    columns, start = _header(data)
+    given_types = dict(types or {})
+    types = dict(given_types)
+    while start < len(data):
+        end = start
+        for _ in range(chunk_rows):
+            end = data.find('\n', end) + 1
+            if end == 0:
+                end = len(data)
+                break
+        body = data[start:end]
+        table = _decode(columns, body, given_types, null_values)
+        narrower_types = {}
+        for index, column in enumerate(columns):
+            column_type = types.get(column)
+            if column_type is None or TYPES.index(table.types[column]) >= TYPES.index(column_type):
+                continue
+            if column_type == 'float' and table.types[column] == 'int':
+                table.arrays[index] = table.arrays[index].astype(np.float64)
+                table.types[column] = 'float'
+            else:
+                narrower_types[column] = column_type
+        if narrower_types:
+            # decode the chunk again as the wider types of the previous chunks
+            table = _decode(columns, body, dict(given_types, **narrower_types), null_values)
+        types.update(table.types)
+        yield table
+        start = end
@@ -0,0 +1,654 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import collections
+import hashlib
+import itertools
+import json
+import random
+import re
+import socket
+import struct
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def default_result(text):
+    """
+    Default paragraph output of StubZeppelinServer: the paragraph text without the interpreter
+    directive, paragraphs whose code contains 'invalid' end with ERROR.
+    :param text:
+    :return:
+    """
+    code = text or ""
+    if code.startswith("%"):
+        parts = code.split(None, 1)
+        code = parts[1] if len(parts) > 1 else ""
+    if 'invalid' in code:
+        return 'ERROR', [{'type': 'TEXT', 'data': code + ": command not found\n"}]
+    return 'FINISHED', [{'type': 'TEXT', 'data': code + "\n"}]
+
+
+def sized_result(size, result_type = 'TEXT'):
+    """
+    Return result_fn of StubZeppelinServer whose output is one message of size characters,
+    e.g. to measure the cost of large results. Paragraphs whose code contains 'invalid' still end with ERROR.
+    :param size:
+    :param result_type:
+    :return:
+    """
+    data = ('x' * 99 + '\n') * (size // 100) + 'x' * (size % 100)
+
+    def result_fn(text):
+        status, msgs = default_result(text)
+        if status != 'FINISHED':
+            return status, msgs
+        return status, [{'type': result_type, 'data': data}]
+    return result_fn
+
+
+class StubZeppelinServer:
+    """
+    In-process fake of the Zeppelin rest api and notebook websocket which is used by the tests and benchmarks,
+    so that they don't need a running Zeppelin. Paragraphs are not really executed, each job takes
+    job_duration seconds (or job_duration(text) seconds if it is callable) and its output is computed by
+    result_fn(text) which returns (status, msgs), see sized_result for outputs of a given size.
+
+    Every rest request is delayed by latency seconds, and counted in request_counts keyed by (method, route name).
+    max_in_flight is the largest number of rest requests which were handled at the same time.
+    Use inject_errors to make the next requests of a route fail, or error_rate to make a random fraction
+    of all the rest requests (except login) fail with error_status, the random choices are reproducible by seed.
+
+    When credentials (dict of user name to password) is given, all the rest api except version and login
+    reply 401 unless the request has the JSESSIONID cookie returned by /api/login.
+
+    When etags is True, GET replies carry an ETag of the body, and the requests whose If-None-Match
+    matches it get 304 Not Modified without body.
+    """
+    def __init__(self, job_duration = 0.1, result_fn = default_result, enable_websocket = True, latency = 0,
+                 credentials = None, etags = False, error_rate = 0, error_status = 503, seed = None):
+        self.job_duration = job_duration
+        self.result_fn = result_fn
+        self.enable_websocket = enable_websocket
+        self.latency = latency
+        self.credentials = credentials
+        self.etags = etags
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        # JSESSIONID -> user name
+        self.logins = {}
+        self.notes = {}
+        self.sessions = {}
+        self.request_counts = collections.Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # route name -> list of error status codes returned by the next requests
+        self.injected_errors = {}
+        self.lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._websockets = set()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        server = self
+
+        class Handler(_StubRequestHandler):
+            stub = server
+
+        self._httpd = _StubHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target = self._httpd.serve_forever, daemon = True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.close_websockets()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _count_request(self, method, name):
+        with self.lock:
+            self.request_counts[(method, name)] += 1
+
+    def inject_errors(self, name, status, count = 1):
+        """
+        Reply status to the next count requests of route name.
+        :param name:
+        :param status:
+        :param count:
+        :return:
+        """
+        with self.lock:
+            self.injected_errors.setdefault(name, []).extend([status] * count)
+
+    def _take_error(self, name):
+        with self.lock:
+            errors = self.injected_errors.get(name)
+            if errors:
+                return errors.pop(0)
+            if self.error_rate and name not in ('login', 'version') and self._random.random() < self.error_rate:
+                return self.error_status
+            return None
+
+    def total_requests(self):
+        return sum(self.request_counts.values())
+
+    def reset_counts(self):
+        with self.lock:
+            self.request_counts.clear()
+            self.max_in_flight = self.in_flight
+
+    def _enter_request(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit_request(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def close_websockets(self):
+        """
+        Drop all the connected websockets, used to simulate network failure.
+        :return:
+        """
+        with self.lock:
+            connections = list(self._websockets)
+            self._websockets.clear()
+        for connection in connections:
+            connection.close()
+
+    # ---------------------------------------------------------------- notebook model
+
+    def _next_id(self, prefix):
+        return "{}_{}".format(prefix, next(self._ids))
+
+    def create_note(self, path, paragraph_texts = ()):
+        with self.lock:
+            note_id = self._next_id("NOTE")
+            self.notes[note_id] = {'id': note_id, 'name': path.split('/')[-1], 'path': path,
+                                   'paragraphs': [], 'info': {'isRunning': False}}
+            for text in paragraph_texts:
+                self.add_paragraph(note_id, "", text)
+            return note_id
+
+    def add_paragraph(self, note_id, title, text):
+        with self.lock:
+            paragraph = {'id': self._next_id("paragraph"), 'title': title, 'text': text,
+                         'status': 'READY', 'progress': 0}
+            self.notes[note_id]['paragraphs'].append(paragraph)
+            return paragraph
+
+    def new_session(self, interpreter):
+        with self.lock:
+            session_id = self._next_id(interpreter)
+            note_id = self.create_note('/_ZSession/' + interpreter + '/' + session_id)
+            self.sessions[session_id] = {'sessionId': session_id, 'noteId': note_id, 'interpreter': interpreter,
+                                         'state': 'RUNNING', 'weburl': None, 'startTime': time.ctime()}
+            return self.sessions[session_id]
+
+    def find_paragraph(self, note_id, paragraph_id):
+        for paragraph in self.notes[note_id]['paragraphs']:
+            if paragraph['id'] == paragraph_id:
+                return paragraph
+        return None
+
+    def run_paragraph(self, note_id, paragraph_id):
+        """
+        Start the job of the given paragraph, return the event which is set once it is completed.
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        done = threading.Event()
+        with self.lock:
+            paragraph = self.find_paragraph(note_id, paragraph_id)
+            paragraph['status'] = 'RUNNING'
+            paragraph['progress'] = 0
+            paragraph.pop('results', None)
+            self._broadcast(note_id, 'PARAGRAPH', {'paragraph': paragraph})
+
+        def finish():
+            with self.lock:
+                if paragraph['status'] != 'RUNNING':
+                    # cancelled
+                    done.set()
+                    return
+                status, msgs = self.result_fn(paragraph.get('text'))
+                paragraph['status'] = status
+                paragraph['progress'] = 100
+                paragraph['results'] = {'code': 'SUCCESS' if status == 'FINISHED' else 'ERROR', 'msg': msgs}
+                self._broadcast(note_id, 'PARAGRAPH', {'paragraph': paragraph})
+            done.set()
+
+        job_duration = self.job_duration(paragraph.get('text')) if callable(self.job_duration) else self.job_duration
+        timer = threading.Timer(job_duration, finish)
+        timer.daemon = True
+        timer.start()
+        return done
+
+    def run_note(self, note_id):
+        note = self.notes[note_id]
+        with self.lock:
+            note['info']['isRunning'] = True
+            self._broadcast(note_id, 'NOTE_RUNNING_STATUS', {'status': True})
+
+        def run_all():
+            for paragraph in list(note['paragraphs']):
+                self.run_paragraph(note_id, paragraph['id']).wait()
+            with self.lock:
+                note['info']['isRunning'] = False
+                self._broadcast(note_id, 'NOTE_RUNNING_STATUS', {'status': False})
+
+        threading.Thread(target = run_all, daemon = True).start()
+
+    # ---------------------------------------------------------------- websocket
+
+    def _register_websocket(self, connection):
+        with self.lock:
+            self._websockets.add(connection)
+
+    def _unregister_websocket(self, connection):
+        with self.lock:
+            self._websockets.discard(connection)
+
+    def _broadcast(self, note_id, op, data):
+        message = json.dumps({'op': op, 'data': data})
+        with self.lock:
+            connections = [c for c in self._websockets if note_id in c.note_ids]
+        for connection in connections:
+            connection.send(message)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # many client threads may connect at the same time
+    request_queue_size = 256
+
+
+class _WebSocketConnection:
+    """
+    Minimal server side of RFC 6455, only unfragmented text frames, ping and close are supported.
+    """
+    def __init__(self, sock):
+        self.sock = sock
+        self.note_ids = set()
+        self.send_lock = threading.Lock()
+
+    def _recv_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise EOFError()
+            data += chunk
+        return data
+
+    def receive(self):
+        """
+        Return the next text message, None if the connection is closed.
+        :return:
+        """
+        try:
+            while True:
+                b1, b2 = self._recv_exactly(2)
+                opcode = b1 & 0x0f
+                length = b2 & 0x7f
+                if length == 126:
+                    length = struct.unpack('!H', self._recv_exactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', self._recv_exactly(8))[0]
+                mask = self._recv_exactly(4) if b2 & 0x80 else None
+                payload = self._recv_exactly(length)
+                if mask:
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+                if opcode == 0x8:
+                    return None
+                if opcode == 0x9:
+                    self._send_frame(0xA, payload)
+                elif opcode == 0x1:
+                    return payload.decode('utf-8')
+        except (EOFError, OSError):
+            return None
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack('!H', len(payload))
+        else:
+            header += bytes([127]) + struct.pack('!Q', len(payload))
+        with self.send_lock:
+            try:
+                self.sock.sendall(header + payload)
+            except OSError:
+                pass
+
+    def send(self, message):
+        self._send_frame(0x1, message.encode('utf-8'))
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, don't let Nagle delay the body
+    disable_nagle_algorithm = True
+    stub = None
+    # headers besides content type and length of current reply
+    extra_headers = ()
+
+    routes = [
+        ('GET', r'/api/version', 'version'),
+        ('POST', r'/api/login', 'login'),
+        ('GET', r'/api/security/ticket', 'ticket'),
+        ('GET', r'/api/notebook', 'list_notes'),
+        ('POST', r'/api/notebook', 'create_note'),
+        ('GET', r'/api/notebook/(?P<note_id>[^/]+)', 'get_note'),
+        ('DELETE', r'/api/notebook/(?P<note_id>[^/]+)', 'delete_note'),
+        ('POST', r'/api/notebook/(?P<note_id>[^/]+)/paragraph', 'add_paragraph'),
+        ('POST', r'/api/notebook/(?P<note_id>[^/]+)/paragraph/next', 'next_paragraph'),
+        ('GET', r'/api/notebook/(?P<note_id>[^/]+)/paragraph/(?P<paragraph_id>[^/]+)', 'get_paragraph'),
+        ('PUT', r'/api/notebook/(?P<note_id>[^/]+)/paragraph/(?P<paragraph_id>[^/]+)', 'update_paragraph'),
+        ('GET', r'/api/notebook/job/(?P<note_id>[^/]+)', 'note_status'),
+        ('GET', r'/api/notebook/job/(?P<note_id>[^/]+)/(?P<paragraph_id>[^/]+)', 'paragraph_status'),
+        ('POST', r'/api/notebook/job/(?P<note_id>[^/]+)', 'run_note'),
+        ('DELETE', r'/api/notebook/job/(?P<note_id>[^/]+)', 'cancel_note'),
+        ('POST', r'/api/notebook/job/(?P<note_id>[^/]+)/(?P<paragraph_id>[^/]+)', 'run_paragraph'),
+        ('DELETE', r'/api/notebook/job/(?P<note_id>[^/]+)/(?P<paragraph_id>[^/]+)', 'cancel_paragraph'),
+        ('POST', r'/api/notebook/run/(?P<note_id>[^/]+)/(?P<paragraph_id>[^/]+)', 'run_paragraph_sync'),
+        ('POST', r'/api/session', 'new_session'),
+        ('GET', r'/api/session/(?P<session_id>[^/]+)', 'get_session'),
+        ('DELETE', r'/api/session/(?P<session_id>[^/]+)', 'stop_session'),
+    ]
+
+    # routes which wait for paragraph execution, they must not hold the stub lock
+    blocking_routes = ('run_paragraph_sync',)
+    # routes which don't require login
+    anonymous_routes = ('version', 'login')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/ws':
+            self._handle_websocket()
+        else:
+            self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        self.extra_headers = []
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match:
+                self.stub._enter_request()
+                try:
+                    self._handle_route(method, name, match)
+                finally:
+                    self.stub._exit_request()
+                return
+        self._reply(404, json.dumps({'status': 'NOT_FOUND', 'message': 'No such api: ' + url.path}))
+
+    def _handle_route(self, method, name, match):
+        if self.stub.latency:
+            time.sleep(self.stub.latency)
+        handler = getattr(self, 'handle_' + name)
+        self.user = self._login_user()
+        if self.stub.credentials and self.user is None and name not in self.anonymous_routes:
+            self.stub._count_request(method, name)
+            self._reply(401, json.dumps({'status': 'UNAUTHORIZED', 'message': 'Login is required'}))
+            return
+        error = self.stub._take_error(name)
+        if error is not None:
+            self.stub._count_request(method, name)
+            self._reply(error, json.dumps({'status': 'ERROR', 'message': 'Injected error'}))
+            return
+        try:
+            if name in self.blocking_routes:
+                self.stub._count_request(method, name)
+                code, payload = handler(**match.groupdict())
+                data = json.dumps(payload, ensure_ascii = False)
+            else:
+                # serialize inside the lock as the notes are updated by the job threads
+                with self.stub.lock:
+                    self.stub._count_request(method, name)
+                    code, payload = handler(**match.groupdict())
+                    data = json.dumps(payload, ensure_ascii = False)
+        except KeyError as e:
+            code, data = 404, json.dumps({'status': 'NOT_FOUND', 'message': 'No such note: ' + str(e)})
+        if self.stub.etags and method == 'GET' and code == 200:
+            etag = '"' + hashlib.sha1(data.encode('utf-8')).hexdigest() + '"'
+            self.extra_headers.append(('ETag', etag))
+            if self.headers.get('If-None-Match') == etag:
+                code, data = 304, ''
+        self._reply(code, data)
+
+    def _json_body(self):
+        return json.loads(self.body) if self.body else {}
+
+    def _reply(self, code, data):
+        data = data.encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in self.extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client has gone, e.g. it stopped reading a streamed result
+            self.close_connection = True
+
+    def _ok(self, body = None, message = ""):
+        payload = {'status': 'OK', 'message': message}
+        if body is not None:
+            payload['body'] = body
+        return 200, payload
+
+    def handle_version(self):
+        return self._ok({'version': '0.10.0'})
+
+    def _login_user(self):
+        cookie = SimpleCookie(self.headers.get('Cookie') or '')
+        if 'JSESSIONID' not in cookie:
+            return None
+        with self.stub.lock:
+            return self.stub.logins.get(cookie['JSESSIONID'].value)
+
+    def handle_login(self):
+        form = {k: v[0] for k, v in parse_qs(self.body.decode('utf-8')).items()}
+        user_name = form.get('userName')
+        if not self.stub.credentials or self.stub.credentials.get(user_name) != form.get('password'):
+            return 403, {'status': 'FORBIDDEN', 'message': 'Invalid user name or password'}
+        token = 'session-' + str(next(self.stub._ids))
+        self.stub.logins[token] = user_name
+        self.extra_headers.append(('Set-Cookie', 'JSESSIONID=' + token + '; Path=/; HttpOnly'))
+        return self._ok({'principal': user_name, 'ticket': token, 'roles': '[]'})
+
+    def handle_ticket(self):
+        principal = self.user or 'anonymous'
+        return self._ok({'principal': principal, 'ticket': principal, 'roles': '[]'})
+
+    def handle_list_notes(self):
+        return self._ok([{'id': note['id'], 'path': note['path']} for note in self.stub.notes.values()])
+
+    def handle_create_note(self):
+        request = self._json_body()
+        path = request['name']
+        if any(note['path'] == path for note in self.stub.notes.values()):
+            return 500, {'status': 'INTERNAL_SERVER_ERROR', 'message': 'Note ' + path + ' existed'}
+        return self._ok(self.stub.create_note(path))
+
+    def handle_get_note(self, note_id):
+        return self._ok(self.stub.notes[note_id])
+
+    def handle_delete_note(self, note_id):
+        del self.stub.notes[note_id]
+        return self._ok()
+
+    def handle_add_paragraph(self, note_id):
+        request = self._json_body()
+        return self._ok(self.stub.add_paragraph(note_id, request.get('title'), request.get('text'))['id'])
+
+    def handle_next_paragraph(self, note_id):
+        max_paragraph = int(self.query.get('maxParagraph', 100))
+        paragraphs = self.stub.notes[note_id]['paragraphs']
+        if len(paragraphs) >= max_paragraph:
+            # same as Zeppelin, remove the first completed paragraph except the first one
+            completed = [p for p in paragraphs[1:] if p['status'] in ('FINISHED', 'ERROR', 'ABORTED')]
+            if not completed:
+                return 500, {'status': 'INTERNAL_SERVER_ERROR',
+                             'message': 'All the paragraphs are not completed, unable to find available paragraph'}
+            paragraphs.remove(completed[0])
+        return self._ok(message = self.stub.add_paragraph(note_id, "", "")['id'])
+
+    def handle_get_paragraph(self, note_id, paragraph_id):
+        return self._ok(self.stub.find_paragraph(note_id, paragraph_id))
+
+    def handle_update_paragraph(self, note_id, paragraph_id):
+        request = self._json_body()
+        paragraph = self.stub.find_paragraph(note_id, paragraph_id)
+        paragraph['title'] = request.get('title')
+        paragraph['text'] = request.get('text')
+        return self._ok()
+
+    def _paragraph_status(self, paragraph):
+        return {'id': paragraph['id'], 'status': paragraph['status'], 'progress': paragraph['progress']}
+
+    def handle_note_status(self, note_id):
+        note = self.stub.notes[note_id]
+        return self._ok({'id': note_id, 'isRunning': note['info']['isRunning'],
+                         'paragraphs': [self._paragraph_status(p) for p in note['paragraphs']]})
+
+    def handle_paragraph_status(self, note_id, paragraph_id):
+        return self._ok(self._paragraph_status(self.stub.find_paragraph(note_id, paragraph_id)))
+
+    def handle_run_note(self, note_id):
+        self.stub.run_note(note_id)
+        return self._ok()
+
+    def handle_run_paragraph(self, note_id, paragraph_id):
+        self.stub.run_paragraph(note_id, paragraph_id)
+        return self._ok()
+
+    def handle_cancel_note(self, note_id):
+        # like Zeppelin, only the running paragraph is aborted, the next one of the note is started after it
+        for paragraph in self.stub.notes[note_id]['paragraphs']:
+            if paragraph['status'] == 'RUNNING':
+                paragraph['status'] = 'ABORTED'
+                self.stub._broadcast(note_id, 'PARAGRAPH', {'paragraph': paragraph})
+        return self._ok()
+
+    def handle_cancel_paragraph(self, note_id, paragraph_id):
+        paragraph = self.stub.find_paragraph(note_id, paragraph_id)
+        if paragraph['status'] in ('PENDING', 'RUNNING'):
+            paragraph['status'] = 'ABORTED'
+            self.stub._broadcast(note_id, 'PARAGRAPH', {'paragraph': paragraph})
+        return self._ok()
+
+    def handle_run_paragraph_sync(self, note_id, paragraph_id):
+        self.stub.run_paragraph(note_id, paragraph_id).wait()
+        with self.stub.lock:
+            paragraph = self.stub.find_paragraph(note_id, paragraph_id)
+            code = 200 if paragraph['status'] == 'FINISHED' else 500
+            return code, {'status': 'OK' if code == 200 else 'INTERNAL_SERVER_ERROR', 'message': '',
+                          'body': paragraph['results']}
+
+    def handle_new_session(self):
+        return self._ok(self.stub.new_session(self.query['interpreter']))
+
+    def handle_get_session(self, session_id):
+        session = self.stub.sessions.get(session_id)
+        if session is None:
+            return 404, {'status': 'NOT_FOUND', 'message': 'No such session: ' + session_id}
+        return self._ok(session)
+
+    def handle_stop_session(self, session_id):
+        self.stub.sessions[session_id]['state'] = 'STOPPED'
+        return self._ok()
+
+    def _handle_websocket(self):
+        self.stub._count_request('GET', 'websocket')
+        key = self.headers.get('Sec-WebSocket-Key')
+        if not self.stub.enable_websocket or not key:
+            self._reply(404, json.dumps({'status': 'NOT_FOUND', 'message': 'websocket is disabled'}))
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        connection = _WebSocketConnection(self.connection)
+        self.stub._register_websocket(connection)
+        try:
+            while True:
+                message = connection.receive()
+                if message is None:
+                    break
+                request = json.loads(message)
+                if request.get('op') == 'GET_NOTE':
+                    note_id = request['data']['id']
+                    with self.stub.lock:
+                        connection.note_ids.add(note_id)
+                        note = self.stub.notes.get(note_id)
+                        if note is not None:
+                            connection.send(json.dumps({'op': 'NOTE', 'data': {'note': note}}))
+        finally:
+            self.stub._unregister_websocket(connection)
+            self.close_connection = True
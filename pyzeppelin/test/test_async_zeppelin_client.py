@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.async_zeppelin_client import AsyncZeppelinClient
+
+
+class TestAsyncZeppelinClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_note_operation(self):
+        client_config = ClientConfig("http://localhost:8080")
+        async with AsyncZeppelinClient(client_config) as client:
+            await client.get_version()
+            note_id = await client.create_note('/pyzeppelin/test/async_note_1')
+            await client.delete_note(note_id)
+
+            with self.assertRaises(Exception) as context:
+                await client.delete_note('invalid_note_id')
+            self.assertTrue('No such note' in str(context.exception))
+
+    async def test_execute_paragraph(self):
+        client_config = ClientConfig("http://localhost:8080")
+        async with AsyncZeppelinClient(client_config) as client:
+            note_id = None
+            try:
+                note_id = await client.create_note('/pyzeppelin/test/async_note_1')
+                paragraph_id = await client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+                paragraph_result = await client.execute_paragraph(note_id, paragraph_id)
+                self.assertEqual('FINISHED', paragraph_result.status)
+                self.assertEqual(1, len(paragraph_result.results))
+                self.assertEqual('TEXT', paragraph_result.results[0][0])
+                self.assertEqual('hello world\n', paragraph_result.results[0][1])
+
+                # run paragraph with parameters
+                paragraph_id = await client.add_paragraph(note_id, "dynamic form example", "%sh echo 'hello ${name=abc}'")
+                paragraph_result = await client.execute_paragraph(note_id, paragraph_id, params = {'name': 'zeppelin'})
+                self.assertEqual('FINISHED', paragraph_result.status)
+                self.assertEqual('hello zeppelin\n', paragraph_result.results[0][1])
+            finally:
+                if note_id:
+                    await client.delete_note(note_id)
+
+    async def test_execute_paragraphs_concurrently(self):
+        client_config = ClientConfig("http://localhost:8080")
+        async with AsyncZeppelinClient(client_config) as client:
+            note_ids = []
+            try:
+                for i in range(3):
+                    note_id = await client.create_note('/pyzeppelin/test/async_note_' + str(i))
+                    note_ids.append(note_id)
+                    await client.add_paragraph(note_id, 'shell example', "%sh echo 'hello " + str(i) + "'")
+
+                note_results = await asyncio.gather(*[client.execute_note(note_id) for note_id in note_ids])
+                for i, note_result in enumerate(note_results):
+                    self.assertEqual(False, note_result.is_running)
+                    self.assertEqual('hello ' + str(i) + '\n', note_result.paragraphs[0].results[0][1])
+            finally:
+                for note_id in note_ids:
+                    await client.delete_note(note_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+
+import requests
+
+from pyzeppelin.config import ClientConfig, TransportConfig
+from pyzeppelin.metrics import Instrumentation
+from pyzeppelin.async_zeppelin_client import AsyncZeppelinClient, aiohttp
+from pyzeppelin.test.stub_server import StubZeppelinServer
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncZeppelinClientWithStub(unittest.IsolatedAsyncioTestCase):
+    """
+    AsyncZeppelinClient tests which run against StubZeppelinServer instead of a real Zeppelin.
+    """
+
+    def setUp(self):
+        self.server = StubZeppelinServer(job_duration = 0.05).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def create_client(self, **transport_kwargs):
+        transport = TransportConfig(backoff_factor = 0.01, **transport_kwargs)
+        return AsyncZeppelinClient(ClientConfig(self.server.url, query_interval = 0.02, transport = transport))
+
+    async def test_execute_paragraph(self):
+        async with self.create_client() as client:
+            note_id = await client.create_note('/pyzeppelin/test/note_1')
+            paragraph_id = await client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+            paragraph_result = await client.execute_paragraph(note_id, paragraph_id)
+            self.assertEqual('FINISHED', paragraph_result.status)
+            self.assertEqual("echo 'hello world'\n", paragraph_result.results[0][1])
+
+    async def test_cancel_note(self):
+        async with self.create_client() as client:
+            note_id = await client.create_note('/pyzeppelin/test/note_1')
+            for i in range(2):
+                await client.add_paragraph(note_id, 'p' + str(i), "%sh echo " + str(i))
+            self.server.job_duration = 1
+            await client.submit_note(note_id)
+            await asyncio.sleep(0.1)
+            self.server.reset_counts()
+            await client.cancel_note(note_id)
+            # same as ZeppelinClient, the second one cancels the paragraph started after the first one
+            self.assertEqual(2, self.server.request_counts[('DELETE', 'cancel_note')])
+            self.assertEqual('ABORTED', self.server.notes[note_id]['paragraphs'][0]['status'])
+
+    async def test_retry(self):
+        async with self.create_client() as client:
+            note_id = await client.create_note('/pyzeppelin/test/note_1')
+            self.server.reset_counts()
+            self.server.inject_errors('get_note', 502, 2)
+            self.assertEqual(note_id, (await client.query_note_result(note_id)).id)
+            self.assertEqual(3, self.server.request_counts[('GET', 'get_note')])
+
+            self.server.inject_errors('create_note', 503, 1)
+            with self.assertRaises(Exception):
+                await client.create_note('/pyzeppelin/test/note_2')
+            self.assertEqual(1, self.server.request_counts[('POST', 'create_note')])
+
+    async def test_get_session(self):
+        instrumentation = Instrumentation()
+        transport = TransportConfig(backoff_factor = 0.01)
+        client_config = ClientConfig(self.server.url, transport = transport, instrumentation = instrumentation)
+        async with AsyncZeppelinClient(client_config) as client:
+            session_id = (await client.new_session('sh')).session_id
+            self.server.inject_errors('get_session', 503, 1)
+            self.assertEqual(session_id, (await client.get_session(session_id)).session_id)
+            with self.assertRaises(Exception) as context:
+                await client.get_session('invalid_session_id')
+            self.assertTrue('No such session' in str(context.exception))
+
+            self.assertEqual(2, sum(sample['value'] for sample in
+                                    instrumentation.registry.to_dict()['zeppelin_requests_total']
+                                    if sample['labels']['endpoint'] == '/api/session/{sessionId}'))
+
+            note_id = await client.create_note('/pyzeppelin/test/note_1')
+            paragraph_id = await client.add_paragraph(note_id, 'shell example', "%sh echo '你好'")
+            path = "/api/notebook/" + note_id + "/paragraph/" + paragraph_id
+            await client.query_paragraph_result(note_id, paragraph_id)
+        # bytes of the utf-8 body, not characters
+        body = requests.get(self.server.url + path).content
+        self.assertNotEqual(len(body), len(body.decode('utf-8')))
+        self.assertEqual(len(body), [sample['value'] for sample in
+                                     instrumentation.registry.to_dict()['zeppelin_response_bytes_total']
+                                     if sample['labels']['endpoint'] == '/api/notebook/{noteId}/paragraph/{paragraphId}'][0])
+
+    async def test_read_timeout(self):
+        async with self.create_client(read_timeout = 0.1, max_retries = 0) as client:
+            self.server.latency = 0.5
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.get_version()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import unittest
+
+from pyzeppelin.cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl = 0.2)
+        self.assertIsNone(cache.get('key'))
+        cache.put('key', 'value', 'note_1', cache.version('note_1'))
+        self.assertEqual('value', cache.get('key').value)
+        time.sleep(0.3)
+        # expired entry without validator is dropped
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual({'hits': 1, 'misses': 2, 'revalidations': 0, 'evictions': 0, 'size': 0}, cache.stats())
+
+    def test_revalidate(self):
+        cache = ResponseCache(ttl = 0.1)
+        cache.put('key', 'value', 'note_1', cache.version('note_1'), etag = '"v1"')
+        time.sleep(0.2)
+        entry = cache.get('key')
+        self.assertFalse(entry.is_fresh())
+        self.assertEqual({'If-None-Match': '"v1"'}, entry.conditional_headers())
+        cache.revalidated('key', entry, cache.version('note_1'))
+        self.assertTrue(cache.get('key').is_fresh())
+        self.assertEqual(1, cache.stats()['revalidations'])
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(ttl = 10, max_entries = 2)
+        for key in ['a', 'b']:
+            cache.put(key, key, 'note_1', cache.version('note_1'))
+        cache.get('a')
+        cache.put('c', 'c', 'note_1', cache.version('note_1'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual('a', cache.get('a').value)
+        self.assertEqual(1, cache.stats()['evictions'])
+
+    def test_invalidate(self):
+        cache = ResponseCache(ttl = 10)
+        cache.put('a', 'a', 'note_1', cache.version('note_1'))
+        cache.put('b', 'b', 'note_2', cache.version('note_2'))
+        # the read which is sent before the invalidation is not cached
+        version = cache.version('note_1')
+        cache.invalidate('note_1')
+        cache.put('c', 'c', 'note_1', version)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual('b', cache.get('b').value)
+
+        version = cache.version('note_2')
+        cache.clear()
+        cache.put('b', 'b', 'note_2', version)
+        self.assertEqual(0, cache.stats()['size'])
+
+    def test_invalidated_tags_bounded(self):
+        cache = ResponseCache(ttl = 10, max_entries = 4)
+        version = cache.version('note_0')
+        for i in range(100):
+            cache.invalidate('note_' + str(i))
+        self.assertEqual(4, len(cache._versions))
+        # the invalidation of a dropped tag still drops the read which races with it
+        cache.put('a', 'a', 'note_0', version)
+        self.assertIsNone(cache.get('a'))
+        # the reads sent afterwards are cached
+        cache.put('a', 'a', 'note_0', cache.version('note_0'))
+        cache.put('b', 'b', 'note_99', cache.version('note_99'))
+        self.assertEqual(['a', 'b'], [cache.get('a').value, cache.get('b').value])
+
+
+if __name__ == '__main__':
+    unittest.main()
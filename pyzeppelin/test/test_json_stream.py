@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import tracemalloc
+import unittest
+
+from pyzeppelin.json_stream import JsonScanner, iter_note_paragraphs, iter_paragraph_messages
+
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def note_response(paragraphs, result_size):
+    paragraph_jsons = [{'id': 'paragraph_' + str(i), 'text': '%sh echo ' + str(i), 'status': 'FINISHED',
+                        'progress': 100, 'config': {'editorMode': 'ace/mode/sh'},
+                        'results': {'code': 'SUCCESS', 'msg': [{'type': 'TEXT', 'data': str(i % 10) * result_size},
+                                                               {'type': 'HTML', 'data': '<b>' + str(i) + '</b>'}]}}
+                       for i in range(paragraphs)]
+    return json.dumps({'status': 'OK', 'message': '',
+                       'body': {'paragraphs': paragraph_jsons, 'id': 'NOTE_1', 'name': 'note'}}).encode('utf-8')
+
+
+class TestJsonStream(unittest.TestCase):
+
+    def test_read_value_across_chunks(self):
+        document = {'text': 'quote " backslash \\ unicode é中 \U0001f600 escaped \\" }]',
+                    'nested': [{'a': [1, 2.5, -3e2, True, False, None]}, [], {}], 'empty': '', 'number': 42}
+        data = json.dumps(document, ensure_ascii = False).encode('utf-8')
+        for size in (1, 2, 3, 7, len(data)):
+            scanner = JsonScanner(chunked(data, size))
+            decoded = {}
+            for key in scanner.iter_object():
+                if key == 'nested':
+                    scanner.skip_value()
+                else:
+                    decoded[key] = scanner.read_value()
+            self.assertEqual({k: v for k, v in document.items() if k != 'nested'}, decoded)
+            self.assertEqual('', scanner.peek())
+            self.assertEqual(document, JsonScanner(chunked(data, size)).read_value())
+
+    def test_invalid_json(self):
+        with self.assertRaises(ValueError):
+            list(JsonScanner([b'{"a": "unterminated']).iter_object())
+        with self.assertRaises(ValueError):
+            list(iter_note_paragraphs([b'{"body": [1, 2]}']))
+
+    def test_note_paragraphs(self):
+        data = note_response(3, 10)
+        paragraphs = list(iter_note_paragraphs(chunked(data, 16)))
+        self.assertEqual(['paragraph_0', 'paragraph_1', 'paragraph_2'], [p.id for p in paragraphs])
+        self.assertEqual([('TEXT', '1' * 10), ('HTML', '<b>1</b>')], paragraphs[1].results)
+        self.assertEqual('FINISHED', paragraphs[1].status)
+
+        paragraphs = list(iter_note_paragraphs(chunked(data, 16), result_types = ['HTML'], keep_json = False))
+        self.assertEqual([('HTML', '<b>2</b>')], paragraphs[2].results)
+        self.assertIsNone(paragraphs[2].paragraph_json)
+
+        # data before type
+        data = b'{"body": {"results": {"msg": [{"data": "x", "type": "TEXT"}, {"data": "y", "type": "IMG"}]}}}'
+        self.assertEqual([('TEXT', 'x')], list(iter_paragraph_messages(chunked(data, 5), result_types = ['TEXT'])))
+        self.assertEqual([('TEXT', 'x'), ('IMG', 'y')], list(iter_paragraph_messages(chunked(data, 5))))
+
+    def test_peak_memory(self):
+        result_size = 512 * 1024
+        data = note_response(20, result_size)
+        # a few copies of the largest message (raw and decoded) or of the chunk, instead of the 10MB response
+        for result_types, max_peak in ((None, 4 * result_size), ([], 4 * 65536)):
+            tracemalloc.start()
+            count = sum(1 for _ in iter_note_paragraphs(chunked(data, 65536), result_types))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.assertEqual(20, count)
+            self.assertLess(peak, max_peak, (result_types, peak, len(data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from pyzeppelin.metrics import MetricsRegistry, endpoint_of
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_endpoint(self):
+        self.assertEqual('/api/notebook/{noteId}', endpoint_of('/api/notebook/2FXYZ'))
+        self.assertEqual('/api/notebook/{noteId}/paragraph/{paragraphId}',
+                         endpoint_of('/api/notebook/2FXYZ/paragraph/paragraph_1'))
+        self.assertEqual('/api/notebook/job/{noteId}/{paragraphId}', endpoint_of('/api/notebook/job/2FXYZ/p_1'))
+        self.assertEqual('/api/notebook', endpoint_of('/api/notebook?reload=true'))
+
+    def test_registry(self):
+        registry = MetricsRegistry()
+        registry.counter('requests_total', "Requests", {'method': 'GET'}).inc()
+        registry.counter('requests_total', "Requests", {'method': 'GET'}).inc(2)
+        histogram = registry.histogram('latency_seconds', "Latency", buckets = (0.1, 1))
+        for value in [0.05, 0.05, 0.5, 5]:
+            histogram.observe(value)
+        self.assertEqual(0.05, histogram.quantile(0.25))
+        self.assertEqual(0.55, round(histogram.quantile(0.625), 6))
+        self.assertEqual(1, histogram.quantile(1))
+        with self.assertRaises(Exception):
+            registry.counter('latency_seconds')
+
+        self.assertEqual({'requests_total': [{'labels': {'method': 'GET'}, 'value': 3}],
+                          'latency_seconds': [{'labels': {}, 'count': 4, 'sum': 5.6,
+                                               'buckets': {0.1: 2, 1: 3, float('inf'): 4}}]},
+                         registry.to_dict())
+        self.assertEqual("# HELP latency_seconds Latency\n"
+                         "# TYPE latency_seconds histogram\n"
+                         "latency_seconds_bucket{le=\"0.1\"} 2\n"
+                         "latency_seconds_bucket{le=\"1\"} 3\n"
+                         "latency_seconds_bucket{le=\"+Inf\"} 4\n"
+                         "latency_seconds_sum 5.6\n"
+                         "latency_seconds_count 4\n"
+                         "# HELP requests_total Requests\n"
+                         "# TYPE requests_total counter\n"
+                         "requests_total{method=\"GET\"} 3\n", registry.to_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,7 +17,7 @@
 # limitations under the License.
 
 import unittest
-from pyzeppelin.notebook import Note
+from pyzeppelin.notebook import Note, NoteJobStatus
 import json
 
 class TestNoteResult(unittest.TestCase):
@@ -41,6 +41,41 @@ class TestNoteResult(unittest.TestCase):
         self.assertEqual(0, note.paragraphs[0].progress)
         self.assertEqual('paragraph_1606115714058_1880824475', note.paragraphs[0].id)
         self.assertEqual(0, len(note.paragraphs[0].results))
+        self.assertEqual(0, note.get_progress())
+
+    def test_lazy_paragraphs(self):
+        note_json = {"id": "NOTE_1", "name": "note", "info": {"isRunning": False}, "config": {},
+                     "paragraphs": [{"id": "paragraph_" + str(i), "status": "FINISHED", "progress": 100,
+                                     "results": {"code": "SUCCESS", "msg": [{"type": "TEXT", "data": str(i)}]}}
+                                    for i in range(3)]}
+        note = Note(note_json, keep_json = False)
+        self.assertIsNone(note._paragraphs)
+        self.assertIsNone(note.note_json)
+        self.assertTrue(note.is_success())
+        self.assertEqual(['0', '1', '2'], [p.results[0][1] for p in note.paragraphs])
+        self.assertIs(note.paragraphs, note.paragraphs)
+        self.assertIsNone(note.paragraphs[0].paragraph_json)
+        self.assertNotIn('config', json.loads(repr(note)))
+        self.assertEqual(3, len(json.loads(repr(note))['paragraphs']))
+
+    def test_note_job_status(self):
+        status_json = """
+        {"id":"2FRY2GX26","isRunning":true,"paragraphs":[
+        {"id":"paragraph_1","status":"FINISHED","progress":100,"started":"Nov 23, 2020 3:15:14 PM"},
+        {"id":"paragraph_2","status":"RUNNING","progress":50}]}
+        """
+        status = NoteJobStatus(json.loads(status_json))
+        self.assertEqual('2FRY2GX26', status.id)
+        self.assertEqual(True, status.is_running)
+        self.assertEqual(2, len(status.paragraphs))
+        self.assertEqual('RUNNING', status.paragraphs[1].status)
+        self.assertEqual(75, status.get_progress())
+
+        # Zeppelin before 0.9 only returns the paragraph list
+        status = NoteJobStatus([{"id": "paragraph_1", "status": "FINISHED", "progress": 100},
+                                {"id": "paragraph_2", "status": "ERROR"}])
+        self.assertEqual(False, status.is_running)
+        self.assertEqual(0, status.paragraphs[1].progress)
 
 
 if __name__ == '__main__':
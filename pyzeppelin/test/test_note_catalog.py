@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.note_catalog import NoteCatalog, NoteEvent
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.zeppelin_client import ZeppelinClient
+
+
+class TestNoteCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubZeppelinServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = ZeppelinClient(ClientConfig(self.server.url))
+        self.addCleanup(self.client.close)
+        self.catalog = NoteCatalog(self.client, refresh_interval = 0.05)
+        self.addCleanup(self.catalog.close)
+
+    def paths(self, notes):
+        return sorted(note['path'] for note in notes)
+
+    def test_lookup(self):
+        note_1 = self.server.create_note('/team_a/report/daily')
+        note_2 = self.server.create_note('/team_a/report/weekly')
+        note_3 = self.server.create_note('/team_a/etl')
+        note_4 = self.server.create_note('/team_b/etl')
+        events = self.catalog.refresh()
+        self.assertEqual(4, len(events))
+        self.assertTrue(all(event.kind == NoteEvent.ADDED for event in events))
+
+        self.assertEqual(4, len(self.catalog))
+        self.assertEqual('/team_a/report/daily', self.catalog.get_path(note_1))
+        self.assertEqual(note_2, self.catalog.get_id('/team_a/report/weekly'))
+        self.assertEqual(note_3, self.catalog.get_id('team_a/etl/'))
+        self.assertIsNone(self.catalog.get_id('/team_a/report'))
+        self.assertEqual(['/team_a/etl', '/team_a/report/daily', '/team_a/report/weekly'],
+                         self.paths(self.catalog.list_notes('/team_a')))
+        self.assertEqual(['/team_a/etl'], self.paths(self.catalog.list_notes('/team_a', recursive = False)))
+        self.assertEqual([{'id': note_4, 'path': '/team_b/etl'}], self.catalog.list_notes('/team_b'))
+        self.assertEqual([], self.catalog.list_notes('/team_c'))
+        self.assertEqual(['team_a', 'team_b'], self.catalog.list_folders())
+        self.assertEqual(['report'], self.catalog.list_folders('/team_a'))
+
+    def test_incremental_refresh(self):
+        note_1 = self.server.create_note('/team_a/note_1')
+        note_2 = self.server.create_note('/team_a/note_2')
+        note_3 = self.server.create_note('/team_b/note_3')
+        self.catalog.refresh()
+        received = []
+        self.catalog.add_listener(received.append)
+
+        self.assertEqual([], self.catalog.refresh())
+        # rename, swap the paths, delete and create
+        self.server.notes[note_1]['path'] = '/team_c/note_1'
+        self.server.notes[note_2]['path'] = '/team_b/note_3'
+        del self.server.notes[note_3]
+        note_4 = self.server.create_note('/team_a/note_4')
+        events = self.catalog.refresh()
+        self.assertEqual(received, events)
+        self.assertEqual(sorted([('removed', note_3, '/team_b/note_3', None),
+                                 ('renamed', note_1, '/team_c/note_1', '/team_a/note_1'),
+                                 ('renamed', note_2, '/team_b/note_3', '/team_a/note_2'),
+                                 ('added', note_4, '/team_a/note_4', None)]),
+                         sorted((e.kind, e.note_id, e.path, e.old_path) for e in events))
+        self.assertEqual(note_2, self.catalog.get_id('/team_b/note_3'))
+        self.assertNotIn(note_3, self.catalog)
+        self.assertEqual(['/team_a/note_4'], self.paths(self.catalog.list_notes('/team_a')))
+        self.assertEqual(['team_a', 'team_b', 'team_c'], self.catalog.list_folders())
+
+        del self.server.notes[note_1]
+        self.catalog.refresh()
+        # empty folders are pruned
+        self.assertEqual(['team_a', 'team_b'], self.catalog.list_folders())
+
+    def test_background_refresh(self):
+        self.catalog.start()
+        added = threading.Event()
+        self.catalog.add_listener(lambda event: added.set())
+        note_id = self.server.create_note('/team_a/note_1')
+        self.assertTrue(added.wait(5))
+        self.assertEqual('/team_a/note_1', self.catalog.get_path(note_id))
+        self.catalog.close()
+        self.assertFalse(any(t.name == "zeppelin-note-catalog" for t in threading.enumerate()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.notebook_socket import websocket
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.zeppelin_client import ZeppelinClient
+
+
+@unittest.skipIf(websocket is None, "websocket-client is not installed")
+class TestNotebookSocket(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubZeppelinServer(job_duration = 0.5).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def create_client(self, interval):
+        # polling alone would take interval seconds to detect the completion
+        client_config = ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(interval),
+                                     use_websocket = True, websocket_check_interval = 10)
+        client = ZeppelinClient(client_config)
+        self.addCleanup(client.close)
+        return client
+
+    def test_paragraph_completion_pushed(self):
+        client = self.create_client(10)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+
+        start = time.monotonic()
+        paragraph_result = client.execute_paragraph(note_id, paragraph_id)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual('FINISHED', paragraph_result.status)
+        self.assertEqual("echo 'hello world'\n", paragraph_result.results[0][1])
+        self.assertEqual(2, paragraph_result.poll_count)
+        # the note is forgotten once nothing waits for it
+        self.assertEqual(set(), client._notebook_socket._subscribed)
+        self.assertEqual({}, client._notebook_socket._note_paragraphs)
+
+        # run the same paragraph again, the completion event of last run should not be reused
+        paragraph_result = client.execute_paragraph(note_id, paragraph_id)
+        self.assertEqual('FINISHED', paragraph_result.status)
+        self.assertEqual(2, paragraph_result.poll_count)
+
+    def test_note_completion_pushed(self):
+        client = self.create_client(10)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        client.add_paragraph(note_id, 'p1', "%sh echo 1")
+        client.add_paragraph(note_id, 'p2', "%sh invalid_command")
+
+        start = time.monotonic()
+        note_result = client.execute_note(note_id)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(False, note_result.is_running)
+        self.assertEqual(['FINISHED', 'ERROR'], [p.status for p in note_result.paragraphs])
+        self.assertLessEqual(note_result.poll_count, 4)
+
+    def test_fall_back_to_polling(self):
+        self.server.enable_websocket = False
+        client = self.create_client(0.05)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+
+        paragraph_result = client.execute_paragraph(note_id, paragraph_id)
+        self.assertEqual('FINISHED', paragraph_result.status)
+        self.assertGreater(paragraph_result.poll_count, 2)
+
+    def test_websocket_dropped(self):
+        self.server.job_duration = 1
+        client = self.create_client(0.05)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+
+        def drop_websocket():
+            self.server.enable_websocket = False
+            self.server.close_websockets()
+
+        timer = threading.Timer(0.3, drop_websocket)
+        timer.start()
+        start = time.monotonic()
+        paragraph_result = client.execute_paragraph(note_id, paragraph_id)
+        timer.join()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual('FINISHED', paragraph_result.status)
+        self.assertGreater(paragraph_result.poll_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import pickle
 import unittest
 from pyzeppelin.notebook import Paragraph
 import json
@@ -43,6 +45,46 @@ class TestParagraphResult(unittest.TestCase):
         self.assertEqual('hello world', p.results[0][1])
         self.assertEqual(0, len(p.jobUrls))
 
+    def test_paragraph_without_json(self):
+        paragraph_json = {"id": "paragraph_1", "text": "%sh echo hello", "status": "FINISHED", "progress": 100,
+                          "config": {}, "settings": {"params": {}, "forms": {}},
+                          "results": {"code": "SUCCESS", "msg": [{"type": "TEXT", "data": "hello\n"},
+                                                                 {"type": "HTML", "data": "<h1>hello</h1>"}]},
+                          "runtimeInfos": {"jobUrl": {"values": [{"jobUrl": "http://spark:4040/jobs/job?id=1"}]}}}
+        p = Paragraph(paragraph_json, keep_json = False)
+        self.assertIsNone(p.paragraph_json)
+        self.assertEqual([('TEXT', 'hello\n'), ('HTML', '<h1>hello</h1>')], p.results)
+        self.assertEqual([('HTML', '<h1>hello</h1>')], p.results[1:])
+        self.assertEqual(['http://spark:4040/jobs/job?id=1'], p.jobUrls)
+        # results refer to the messages of the json instead of copying them
+        self.assertIs(paragraph_json['results']['msg'][0]['data'], p.results[0][1])
+        self.assertNotIn('config', json.loads(repr(p)))
+        self.assertEqual('hello\n', json.loads(repr(p))['results']['msg'][0]['data'])
+        with self.assertRaises(AttributeError):
+            p.unknown_field = 1
+
+    def test_binary_results(self):
+        png = b'\x89PNG\r\n\x1a\n' + bytes(range(100))
+        data = base64.b64encode(png).decode('ascii')
+        p = Paragraph({"id": "paragraph_1", "status": "FINISHED",
+                       "results": {"msg": [{"type": "IMG", "data": data}, {"type": "TEXT", "data": "hello"}]}})
+        image = p.results[0]
+        # still a (type, data) tuple
+        result_type, result_data = image
+        self.assertEqual(('IMG', data), (result_type, result_data))
+        self.assertEqual([('IMG', data), ('TEXT', 'hello')], p.results)
+        self.assertTrue(image.is_binary)
+        self.assertEqual(len(png), image.size)
+        self.assertEqual('png', image.image_format)
+        self.assertEqual(png, image.bytes())
+        # decoded once and shared by the readers of the paragraph
+        self.assertIs(image.bytes(), p.results[0].bytes())
+        self.assertEqual(png, image.memoryview().tobytes())
+        self.assertFalse(p.results[1].is_binary)
+        self.assertEqual(5, p.results[1].size)
+        self.assertIsNone(p.results[1].image_format)
+        self.assertEqual(p.results[0], pickle.loads(pickle.dumps(p.results[0])))
+
 
 if __name__ == '__main__':
     unittest.main()
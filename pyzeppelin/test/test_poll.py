@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.poll import FixedPollStrategy, BackoffPollStrategy
+
+
+class TestPollStrategy(unittest.TestCase):
+
+    def test_default_strategy(self):
+        strategy = ClientConfig("http://localhost:8080", query_interval = 2).get_poll_strategy()
+        self.assertIsInstance(strategy, FixedPollStrategy)
+        self.assertEqual(2, strategy.next_interval(1, 0))
+        self.assertEqual(2, strategy.next_interval(100, 1000, 50))
+
+    def test_backoff(self):
+        strategy = BackoffPollStrategy(initial_interval = 0.1, multiplier = 2, max_interval = 1, jitter = 0)
+        intervals = [strategy.next_interval(i, 0) for i in range(1, 7)]
+        self.assertEqual([0.1, 0.2, 0.4, 0.8, 1, 1], intervals)
+
+    def test_backoff_jitter(self):
+        strategy = BackoffPollStrategy(initial_interval = 0.5, max_interval = 2, jitter = 0.2)
+        # 0.5 * 2^(3 - 1) = 2 before jitter, jitter never exceeds max_interval
+        intervals = [strategy.next_interval(3, 0) for _ in range(100)]
+        self.assertTrue(all(1.6 <= interval <= 2 for interval in intervals))
+        self.assertTrue(any(interval < 2 for interval in intervals))
+        # nor goes below initial_interval
+        self.assertTrue(all(0.5 <= strategy.next_interval(1, 0) <= 0.6 for _ in range(100)))
+
+    def test_progress(self):
+        strategy = BackoffPollStrategy(initial_interval = 0.1, max_interval = 60, jitter = 0, use_progress = True)
+        # 50% done after 10 seconds, so about 10 seconds remaining, check again in half of it.
+        self.assertEqual(5, strategy.next_interval(10, 10, 50))
+        # nearly done, bounded by the initial interval
+        self.assertEqual(0.1, strategy.next_interval(10, 10, 99.9))
+        # no progress reported, fall back to backoff
+        self.assertEqual(0.1, strategy.next_interval(1, 10, 0))
+
+    def test_invalid_intervals(self):
+        with self.assertRaises(ValueError):
+            BackoffPollStrategy(initial_interval = 2, max_interval = 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
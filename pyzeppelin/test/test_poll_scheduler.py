@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+import gc
+import threading
+import time
+import unittest
+import weakref
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.zeppelin_client import ZeppelinClient
+
+
+class TestPollScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubZeppelinServer(job_duration = 0.2).start()
+        self.client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.05)))
+        self.scheduler = self.client.get_poll_scheduler()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def create_note(self, name, paragraph_count):
+        note_id = self.server.create_note('/pyzeppelin/test/' + name)
+        paragraph_ids = [self.server.add_paragraph(note_id, '', "%sh echo " + str(i))['id']
+                         for i in range(paragraph_count)]
+        return note_id, paragraph_ids
+
+    def test_paragraphs_share_note_status_query(self):
+        jobs = []
+        for name in ['note_1', 'note_2']:
+            note_id, paragraph_ids = self.create_note(name, 100)
+            for paragraph_id in paragraph_ids:
+                self.server.run_paragraph(note_id, paragraph_id)
+                jobs.append((note_id, paragraph_id))
+        self.server.reset_counts()
+
+        completed = []
+        paragraph_futures = [self.scheduler.watch_paragraph(note_id, paragraph_id) for note_id, paragraph_id in jobs]
+        for future in paragraph_futures:
+            future.add_done_callback(completed.append)
+        self.assertEqual(200, self.scheduler.pending_count())
+        # one poller thread for all the jobs
+        self.assertEqual(1, len([t for t in threading.enumerate() if t.name == 'zeppelin-poll-scheduler']))
+
+        for (note_id, paragraph_id), future in zip(jobs, paragraph_futures):
+            paragraph = future.result(timeout = 5)
+            self.assertEqual(paragraph_id, paragraph.id)
+            self.assertEqual('FINISHED', paragraph.status)
+        self.assertEqual(200, len(completed))
+        self.assertEqual(0, self.scheduler.pending_count())
+        self.assertEqual(200, self.server.request_counts[('GET', 'get_paragraph')])
+        # the job duration is 4 times of the poll interval
+        self.assertLessEqual(self.server.request_counts[('GET', 'note_status')] +
+                             self.server.request_counts[('GET', 'paragraph_status')], 2 * 10)
+
+    def test_watch_note_and_paragraph(self):
+        note_id, paragraph_ids = self.create_note('note_1', 2)
+        self.server.run_note(note_id)
+        note_future = self.scheduler.watch_note(note_id)
+        paragraph_future = self.scheduler.watch_paragraph(note_id, paragraph_ids[0])
+        note = note_future.result(timeout = 5)
+        self.assertFalse(note.is_running)
+        self.assertEqual(['FINISHED', 'FINISHED'], [p.status for p in note.paragraphs])
+        self.assertEqual('FINISHED', paragraph_future.result(timeout = 5).status)
+
+    def test_poll_count_per_wait(self):
+        note_id, paragraph_ids = self.create_note('note_1', 2)
+        self.server.job_duration = 1
+        self.server.run_paragraph(note_id, paragraph_ids[0])
+        first = self.scheduler.watch_paragraph(note_id, paragraph_ids[0])
+        time.sleep(0.5)
+        # a later wait in the same note, and a later wait for the same paragraph, don't reset the first one
+        self.server.job_duration = 0.2
+        self.server.run_paragraph(note_id, paragraph_ids[1])
+        other = self.scheduler.watch_paragraph(note_id, paragraph_ids[1])
+        same = self.scheduler.watch_paragraph(note_id, paragraph_ids[0])
+        first, other, same = [f.result(timeout = 5) for f in [first, other, same]]
+        # about 1 / 0.05 polls for the first wait, about half of it for the later ones
+        self.assertGreaterEqual(first.poll_count, 14)
+        self.assertLess(other.poll_count, first.poll_count - 4)
+        self.assertLess(same.poll_count, first.poll_count - 4)
+        self.assertEqual(first.id, same.id)
+
+    def test_idle_thread_exits(self):
+        client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.05)))
+        note_id, paragraph_ids = self.create_note('note_1', 1)
+        for _ in range(2):
+            self.server.run_paragraph(note_id, paragraph_ids[0])
+            scheduler = client.get_poll_scheduler()
+            self.assertEqual('FINISHED', scheduler.watch_paragraph(note_id, paragraph_ids[0]).result(timeout = 5).status)
+            thread = scheduler._thread
+            if thread is not None:
+                thread.join(timeout = 5)
+            self.assertIsNone(scheduler._thread)
+
+        # the client is not kept alive by the scheduler thread without close()
+        client_ref = weakref.ref(client)
+        del client, scheduler
+        gc.collect()
+        self.assertIsNone(client_ref())
+
+    def test_state_transition_logging(self):
+        note_id, paragraph_ids = self.create_note('note_1', 1)
+        self.server.run_paragraph(note_id, paragraph_ids[0])
+        with self.assertLogs('pyzeppelin.poll_scheduler', level = 'DEBUG') as logs:
+            self.scheduler.watch_paragraph(note_id, paragraph_ids[0]).result(timeout = 5)
+        # one record per state change, not per poll
+        transitions = [(r.old_state, r.state) for r in logs.records if hasattr(r, 'state')]
+        self.assertEqual([(None, 'RUNNING'), ('RUNNING', 'FINISHED')], transitions)
+        self.assertEqual(paragraph_ids[0], logs.records[0].paragraph_id)
+
+    def test_subscribe_failure(self):
+        def subscribe(note_id):
+            raise Exception("websocket is not available")
+        self.client._subscribe_note = subscribe
+        note_id, paragraph_ids = self.create_note('note_1', 1)
+        self.server.run_paragraph(note_id, paragraph_ids[0])
+        self.server.reset_counts()
+        # falls back to polling at the interval of the poll strategy
+        self.assertEqual('FINISHED', self.scheduler.watch_paragraph(note_id, paragraph_ids[0]).result(timeout = 5).status)
+        self.assertLessEqual(self.server.request_counts[('GET', 'paragraph_status')], 10)
+
+    def test_failure(self):
+        note_id, paragraph_ids = self.create_note('note_1', 1)
+        self.server.run_paragraph(note_id, paragraph_ids[0])
+        paragraph_futures = [self.scheduler.watch_paragraph(note_id, paragraph_id)
+                             for paragraph_id in [paragraph_ids[0], 'invalid_paragraph_id']]
+        self.assertEqual('FINISHED', paragraph_futures[0].result(timeout = 5).status)
+        self.assertTrue('not found' in str(paragraph_futures[1].exception(timeout = 5)))
+
+        future = self.scheduler.watch_note('invalid_note_id')
+        self.assertTrue('No such note' in str(future.exception(timeout = 5)))
+
+    def test_cancel_and_close(self):
+        note_id, paragraph_ids = self.create_note('note_1', 2)
+        self.server.run_note(note_id)
+        cancelled = self.scheduler.watch_paragraph(note_id, paragraph_ids[0])
+        pending = self.scheduler.watch_paragraph(note_id, paragraph_ids[1])
+        self.assertTrue(cancelled.cancel())
+        self.client.close()
+        with self.assertRaises(futures.CancelledError):
+            cancelled.result()
+        self.assertTrue('closed' in str(pending.exception(timeout = 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
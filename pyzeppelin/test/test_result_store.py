@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import unittest
+
+from pyzeppelin.notebook import Paragraph
+from pyzeppelin.result_store import ResultStore, StoredResult
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ResultStore(threshold = 10, max_bytes = 100)
+        self.addCleanup(self.store.close)
+
+    def test_spill(self):
+        self.assertEqual('small', self.store.put('small'))
+        data = 'large é' * 3
+        result = self.store.put(data)
+        self.assertIsInstance(result, StoredResult)
+        self.assertEqual(len(data.encode('utf-8')), result.size)
+        self.assertEqual(data.encode('utf-8'), result.buffer().tobytes())
+        self.assertEqual(data, result.read())
+        self.assertEqual(data, str(result))
+        self.assertEqual(result, data)
+        with result.open() as f:
+            self.assertEqual(data, f.read())
+
+        paragraph = Paragraph(self.store.spill_paragraph(
+            {'id': 'paragraph_1', 'status': 'FINISHED',
+             'results': {'msg': [{'type': 'TEXT', 'data': 'small'}, {'type': 'TEXT', 'data': data}]}}))
+        self.assertEqual([('TEXT', 'small'), ('TEXT', data)], paragraph.results)
+        self.assertIsInstance(paragraph.results[1][1], StoredResult)
+        self.assertIn('StoredResult', repr(paragraph))
+        # size is in bytes whether the data is spilled or not
+        in_memory = Paragraph({'id': 'paragraph_2', 'status': 'FINISHED',
+                               'results': {'msg': [{'type': 'TEXT', 'data': data}]}})
+        self.assertEqual(len(data.encode('utf-8')), in_memory.results[0].size)
+        self.assertEqual(in_memory.results[0].size, paragraph.results[1].size)
+        self.assertEqual(in_memory.results[0].bytes(), paragraph.results[1].bytes())
+        self.assertEqual(2, self.store.stats()['count'])
+
+    def test_eviction(self):
+        results = [self.store.put(str(i) * 40) for i in range(2)]
+        # the first one is read recently
+        results[0].read()
+        results.append(self.store.put('2' * 40))
+        self.assertEqual({'spills': 3, 'evictions': 1, 'count': 2, 'bytes': 80}, self.store.stats())
+        with self.assertRaises(Exception):
+            results[1].read()
+        self.assertFalse(os.path.exists(results[1].path))
+        self.assertEqual('0' * 40, results[0].read())
+        # larger than the disk budget
+        self.assertIsInstance(self.store.put('3' * 200), str)
+
+    def test_cleanup(self):
+        result = self.store.put('0' * 40)
+        path = result.path
+        del result
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(0, self.store.stats()['bytes'])
+
+        result = self.store.put('1' * 40)
+        directory = self.store.directory
+        self.store.close()
+        self.assertFalse(os.path.exists(directory))
+        with self.assertRaises(Exception):
+            result.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+
+from pyzeppelin.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def run_concurrently(self, single_flight, fn, threads = 8, key = 'key'):
+        barrier = threading.Barrier(threads)
+
+        def call():
+            barrier.wait()
+            return single_flight.do(key, fn)
+
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [executor.submit(call) for _ in range(threads)]
+            return [future.exception() or future.result() for future in futures]
+
+    def test_concurrent_calls_share_result(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.2)
+            return object()
+
+        results = self.run_concurrently(single_flight, fn)
+        self.assertEqual(1, len(calls))
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual({'calls': 1, 'shared': 7}, single_flight.stats())
+
+        # not kept after it is finished
+        self.assertIsNot(results[0], single_flight.do('key', fn))
+        self.assertEqual(2, len(calls))
+
+    def test_exception_is_shared(self):
+        single_flight = SingleFlight(freshness = 10)
+
+        def fn():
+            time.sleep(0.2)
+            raise Exception("fail to query")
+
+        results = self.run_concurrently(single_flight, fn)
+        self.assertTrue(all(str(result) == "fail to query" for result in results))
+        self.assertEqual(1, single_flight.calls)
+        # failure is not reused even within freshness
+        with self.assertRaises(Exception):
+            single_flight.do('key', fn)
+        self.assertEqual(2, single_flight.calls)
+
+    def test_interrupted_call(self):
+        single_flight = SingleFlight(freshness = 10)
+        started = threading.Event()
+
+        def interrupted():
+            started.set()
+            time.sleep(0.2)
+            raise KeyboardInterrupt()
+
+        with ThreadPoolExecutor(1) as executor:
+            waiter = executor.submit(lambda: started.wait() and single_flight.do('key', lambda: 'other'))
+            with self.assertRaises(KeyboardInterrupt):
+                single_flight.do('key', interrupted)
+            self.assertTrue('interrupted' in str(waiter.exception(timeout = 5)))
+        # the interrupted call isn't kept, the next caller runs the function again
+        self.assertEqual('value', single_flight.do('key', lambda: 'value'))
+
+    def test_freshness(self):
+        single_flight = SingleFlight(freshness = 0.2)
+        counter = iter(range(100))
+        self.assertEqual(0, single_flight.do('key', lambda: next(counter)))
+        self.assertEqual(0, single_flight.do('key', lambda: next(counter)))
+        self.assertEqual(1, single_flight.do('other_key', lambda: next(counter)))
+        time.sleep(0.3)
+        self.assertEqual(2, single_flight.do('key', lambda: next(counter)))
+        # expired entries are evicted
+        self.assertEqual(['key'], list(single_flight._calls))
+
+    def test_forget(self):
+        single_flight = SingleFlight(freshness = 10)
+        counter = iter(range(100))
+        self.assertEqual(0, single_flight.do(('note_1', 'a'), lambda: next(counter)))
+        self.assertEqual(1, single_flight.do(('note_2', 'a'), lambda: next(counter)))
+        single_flight.forget(lambda key: key[0] == 'note_1')
+        self.assertEqual(2, single_flight.do(('note_1', 'a'), lambda: next(counter)))
+        self.assertEqual(1, single_flight.do(('note_2', 'a'), lambda: next(counter)))
+
+
+if __name__ == '__main__':
+    unittest.main()
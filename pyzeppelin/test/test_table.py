@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import unittest
+import warnings
+
+from pyzeppelin.notebook import ExecuteResult, Paragraph
+from pyzeppelin import table
+
+TABLE_DATA = "id\tscore\tname\tactive\tcount\n" \
+             "1\t0.5\talice\ttrue\t10\n" \
+             "2\t1e3\tbob\tfalse\t\n" \
+             "3\tnull\t\tTrue\t30\n"
+
+
+@unittest.skipIf(table.np is None, "numpy is not installed")
+class TestTable(unittest.TestCase):
+
+    def test_parse_table(self):
+        t = table.parse_table(TABLE_DATA)
+        self.assertEqual(['id', 'score', 'name', 'active', 'count'], t.columns)
+        self.assertEqual({'id': 'int', 'score': 'float', 'name': 'str', 'active': 'bool', 'count': 'float'}, t.types)
+        self.assertEqual(3, len(t))
+        self.assertEqual('int64', t['id'].dtype.name)
+        self.assertEqual([1, 2, 3], t['id'].tolist())
+        self.assertEqual([0.5, 1000.0], t['score'][:2].tolist())
+        self.assertTrue(math.isnan(t['score'][2]))
+        self.assertEqual(['alice', 'bob', None], t['name'].tolist())
+        self.assertEqual([True, False, True], t['active'].tolist())
+        # int column with null is float
+        self.assertEqual('float64', t['count'].dtype.name)
+        self.assertTrue(math.isnan(t['count'][1]))
+
+        # given types, ragged rows
+        t = table.parse_table("a\tb\n1\t2\n3\n4\t5\t6", types = {'a': 'str'})
+        self.assertEqual(['1', '3', '4'], t['a'].tolist())
+        self.assertEqual([2, None, 5], [None if math.isnan(v) else v for v in t['b'].tolist()])
+        self.assertEqual(0, len(table.parse_table("a\tb\n")))
+
+    def assert_same_without_pandas(self, data):
+        expected = table.parse_table(data)
+        pd = table.pd
+        table.pd = None
+        try:
+            t = table.parse_table(data)
+        finally:
+            table.pd = pd
+        self.assertEqual(expected.types, t.types)
+        for column in t.columns:
+            self.assertEqual(expected[column].dtype, t[column].dtype)
+            self.assertEqual(repr(expected[column].tolist()), repr(t[column].tolist()))
+        return t
+
+    def test_numpy_fallback(self):
+        # same result without pandas
+        self.assert_same_without_pandas(TABLE_DATA + "4\t2\tdave\t\t\n")
+        # integers beyond int64 and uint64
+        t = self.assert_same_without_pandas("a\tb\n99999999999999999999\t18000000000000000000\n1\t2\n")
+        self.assertEqual({'a': 'float', 'b': 'float'}, t.types)
+        # nan is not a null value, but it is a float
+        t = self.assert_same_without_pandas("a\tb\tc\nnan\tnan\ttrue\n1.5\tx\tmaybe\n")
+        self.assertEqual({'a': 'float', 'b': 'str', 'c': 'str'}, t.types)
+        # extra cells are dropped without warning
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            t = self.assert_same_without_pandas("a\tb\n1\t2\n3\t4\t5\n")
+        self.assertEqual([[1, 3], [2, 4]], [t['a'].tolist(), t['b'].tolist()])
+
+    def test_iter_table_chunks(self):
+        data = "a\tb\n" + "".join("{}\t{}\n".format(i, i) for i in range(10)) + "1.5\tx\n"
+        chunks = list(table.iter_table_chunks(data, chunk_rows = 4))
+        self.assertEqual([4, 4, 3], [len(chunk) for chunk in chunks])
+        self.assertEqual(list(range(8)), [v for chunk in chunks[:2] for v in chunk['a'].tolist()])
+        # widened for the following chunks
+        self.assertEqual(('int', 'float'), (chunks[0].types['a'], chunks[2].types['a']))
+        self.assertEqual(['8', '9', 'x'], chunks[2]['b'].tolist())
+
+    def test_result_helpers(self):
+        paragraph = Paragraph({'id': 'paragraph_1', 'status': 'FINISHED',
+                               'results': {'msg': [{'type': 'TEXT', 'data': 'hello'},
+                                                   {'type': 'TABLE', 'data': TABLE_DATA},
+                                                   {'type': 'TABLE', 'data': "x\n1\n"}]}})
+        self.assertEqual(2, len(paragraph.get_tables()))
+        self.assertEqual(['x'], paragraph.get_table(1).columns)
+        result = ExecuteResult(paragraph)
+        self.assertEqual([3], [len(chunk) for chunk in result.iter_table_chunks()])
+        with self.assertRaises(Exception):
+            result.get_table(2)
+        if table.pd is not None:
+            df = result.get_dataframe()
+            self.assertEqual(['id', 'score', 'name', 'active', 'count'], list(df.columns))
+            self.assertEqual(3, len(df))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from pyzeppelin import tracing
+from pyzeppelin.tracing import InMemoryTracer, Tracer
+
+
+class TestTracing(unittest.TestCase):
+
+    def test_noop(self):
+        with Tracer().start_span('zsession.start', {'interpreter': 'sh'}) as span:
+            span.set_attribute('session_id', 'session_1')
+
+    def test_in_memory(self):
+        tracer = InMemoryTracer(max_spans = 3)
+        with tracer.start_span('parent', {'interpreter': 'sh'}) as parent:
+            with tracer.start_span('child') as child:
+                child.set_attribute('status', 'FINISHED')
+            parent.set_attribute('session_id', 'session_1')
+        child, parent = tracer.get_spans()
+        self.assertIs(parent, child.parent)
+        self.assertIsNone(parent.parent)
+        self.assertEqual({'interpreter': 'sh', 'session_id': 'session_1'}, parent.attributes)
+        self.assertGreaterEqual(parent.duration, child.duration)
+
+        with self.assertRaises(ValueError):
+            with tracer.start_span('failed'):
+                raise ValueError('invalid')
+        self.assertEqual("ValueError('invalid')", tracer.get_spans('failed')[0].error)
+        with tracer.start_span('next'):
+            pass
+        # the oldest span is dropped
+        self.assertEqual(['parent', 'failed', 'next'], [span.name for span in tracer.get_spans()])
+        self.assertIsNone(tracer.get_spans('next')[0].parent)
+
+    @unittest.skipIf(tracing.trace is not None, "opentelemetry is installed")
+    def test_open_telemetry_not_installed(self):
+        with self.assertRaises(Exception):
+            tracing.OpenTelemetryTracer()
+
+
+if __name__ == '__main__':
+    unittest.main()
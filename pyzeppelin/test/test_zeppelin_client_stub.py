@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from pyzeppelin.config import ClientConfig, TransportConfig
+from pyzeppelin.metrics import Instrumentation
+from pyzeppelin.notebook import ExecuteResult
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.result_store import ResultStore, StoredResult
+from pyzeppelin.test.stub_server import StubZeppelinServer, sized_result
+from pyzeppelin.zeppelin_client import ZeppelinClient
+
+
+class TestZeppelinClientWithStub(unittest.TestCase):
+    """
+    ZeppelinClient tests which run against StubZeppelinServer instead of a real Zeppelin.
+    """
+
+    def setUp(self):
+        self.server = StubZeppelinServer(job_duration = 0.3).start()
+        self.client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02)))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_wait_paragraph_with_status_only_polling(self):
+        note_id = self.client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = self.client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+        self.client.submit_paragraph(note_id, paragraph_id)
+        self.server.reset_counts()
+
+        paragraph_result = self.client.wait_until_paragraph_finished(note_id, paragraph_id)
+        self.assertEqual('FINISHED', paragraph_result.status)
+        self.assertEqual("echo 'hello world'\n", paragraph_result.results[0][1])
+        self.assertGreater(paragraph_result.poll_count, 1)
+        self.assertEqual(paragraph_result.poll_count, self.server.request_counts[('GET', 'paragraph_status')])
+        # the full paragraph is only fetched once at the end
+        self.assertEqual(1, self.server.request_counts[('GET', 'get_paragraph')])
+
+    def test_wait_note_with_status_only_polling(self):
+        note_id = self.client.create_note('/pyzeppelin/test/note_1')
+        self.client.add_paragraph(note_id, 'p1', "%sh echo 1")
+        self.client.add_paragraph(note_id, 'p2', "%sh invalid_command")
+        self.client.submit_note(note_id)
+        self.server.reset_counts()
+
+        note_result = self.client.wait_until_note_finished(note_id)
+        self.assertEqual(False, note_result.is_running)
+        self.assertEqual(['FINISHED', 'ERROR'], [p.status for p in note_result.paragraphs])
+        self.assertFalse(note_result.is_success())
+        self.assertEqual(note_result.poll_count, self.server.request_counts[('GET', 'note_status')])
+        self.assertEqual(1, self.server.request_counts[('GET', 'get_note')])
+
+    def test_submit_paragraph_fetches_result_lazily(self):
+        note_id = self.client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = self.client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+        self.server.reset_counts()
+
+        paragraph_handle = self.client.submit_paragraph(note_id, paragraph_id)
+        execute_result = ExecuteResult(paragraph_handle)
+        self.assertEqual(paragraph_id, paragraph_handle.id)
+        self.assertEqual(paragraph_id, execute_result.statement_id)
+        self.assertEqual(1, self.server.total_requests())
+
+        self.assertEqual('RUNNING', execute_result.status)
+        self.assertFalse(paragraph_handle.is_completed())
+        self.assertEqual(1, self.server.request_counts[('GET', 'get_paragraph')])
+
+        self.client.wait_until_paragraph_finished(note_id, paragraph_id)
+        self.assertEqual('FINISHED', paragraph_handle.refresh().status)
+        self.assertEqual("echo 'hello world'\n", execute_result.results[0][1])
+
+    def test_submit_note_fetches_result_lazily(self):
+        note_id = self.client.create_note('/pyzeppelin/test/note_1')
+        self.client.add_paragraph(note_id, 'p1', "%sh echo 1")
+        self.server.reset_counts()
+
+        note_handle = self.client.submit_note(note_id)
+        self.assertEqual(note_id, note_handle.id)
+        self.assertEqual(1, self.server.total_requests())
+        self.assertEqual(True, note_handle.is_running)
+        self.assertEqual(1, len(note_handle.paragraphs))
+        self.assertEqual(1, self.server.request_counts[('GET', 'get_note')])
+
+        with self.assertRaises(Exception) as context:
+            self.client.submit_note('invalid_note_id')
+        self.assertTrue('No such note' in str(context.exception))
+
+    def create_client(self, **transport_kwargs):
+        transport = TransportConfig(backoff_factor = 0.01, **transport_kwargs)
+        client = ZeppelinClient(ClientConfig(self.server.url, transport = transport))
+        self.addCleanup(client.close)
+        return client
+
+    def test_retry_idempotent_request(self):
+        client = self.create_client()
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        self.server.reset_counts()
+        self.server.inject_errors('get_note', 503, 2)
+        self.assertEqual(note_id, client.query_note_result(note_id).id)
+        self.assertEqual(3, self.server.request_counts[('GET', 'get_note')])
+
+        # give up after max_retries
+        self.server.inject_errors('get_note', 503, 4)
+        with self.assertRaises(Exception) as context:
+            client.query_note_result(note_id)
+        self.assertTrue('503' in str(context.exception))
+
+        # 500 is the error of request itself, not retried
+        self.server.reset_counts()
+        self.server.inject_errors('get_note', 500, 1)
+        with self.assertRaises(Exception):
+            client.query_note_result(note_id)
+        self.assertEqual(1, self.server.request_counts[('GET', 'get_note')])
+
+    def test_no_retry_for_non_idempotent_request(self):
+        client = self.create_client()
+        self.server.inject_errors('create_note', 503, 1)
+        with self.assertRaises(Exception):
+            client.create_note('/pyzeppelin/test/note_1')
+        self.assertEqual(1, self.server.request_counts[('POST', 'create_note')])
+
+    def test_read_timeout(self):
+        client = self.create_client(read_timeout = 0.1, max_retries = 0)
+        self.server.latency = 0.5
+        with self.assertRaises(requests.exceptions.RequestException):
+            client.get_version()
+
+    def test_pool_stats(self):
+        client = self.create_client(pool_maxsize = 4)
+        for i in range(5):
+            client.get_version()
+        stats = list(client.pool_stats().values())
+        self.assertEqual(1, len(stats))
+        # connection is kept alive and reused
+        self.assertEqual({'connections': 1, 'requests': 5, 'idle': 1, 'maxsize': 4}, stats[0])
+
+    def test_thread_safe_client(self):
+        server = StubZeppelinServer(latency = 0.1, credentials = {'user1': 'password1'}).start()
+        self.addCleanup(server.stop)
+        client_config = ClientConfig(server.url, transport = TransportConfig(pool_maxsize = 64), thread_safe = True)
+        client = ZeppelinClient(client_config)
+        self.addCleanup(client.close)
+        with self.assertRaises(Exception):
+            client.create_note('/pyzeppelin/test/note_1')
+        client.login('user1', 'password1')
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+
+        sessions = set()
+
+        def query(count):
+            sessions.add(id(client.session))
+            for i in range(count):
+                self.assertEqual(note_id, client.query_note_status(note_id).id)
+                # the login cookie is shared by all the threads
+                self.assertEqual('user1', client.get_ticket()['principal'])
+
+        def run(threads, count):
+            server.reset_counts()
+            sessions.clear()
+            barrier = threading.Barrier(threads)
+
+            def task():
+                barrier.wait()
+                query(count)
+            with ThreadPoolExecutor(threads) as executor:
+                # result() raises the failure of any thread
+                for future in [executor.submit(task) for _ in range(threads)]:
+                    future.result()
+            self.assertEqual(threads * count * 2, server.total_requests())
+            # each thread has its own session, and their requests are sent concurrently
+            self.assertEqual(threads, len(sessions))
+            return server.max_in_flight
+
+        self.assertEqual(1, run(1, 3))
+        self.assertGreater(run(16, 3), 1)
+        run(64, 2)
+        stats = list(client.pool_stats().values())[0]
+        self.assertLessEqual(stats['connections'], 64)
+
+    def test_environment_proxies(self):
+        # nothing listens on the proxy, only the hosts in no_proxy are reachable
+        with mock.patch.dict(os.environ, {'http_proxy': 'http://127.0.0.1:9', 'no_proxy': '127.0.0.1'}):
+            client = ZeppelinClient(ClientConfig(self.server.url, transport = TransportConfig(max_retries = 0)))
+        self.addCleanup(client.close)
+        self.assertIsNotNone(client.get_version())
+        # the proxies of the other hosts are not the ones of Zeppelin
+        knox_sso = self.server.url.replace('127.0.0.1', 'localhost') + '/gateway/knoxsso/api/v1/websso'
+        with mock.patch.dict(os.environ, {'http_proxy': 'http://127.0.0.1:9', 'no_proxy': '127.0.0.1'}):
+            with self.assertRaises(requests.exceptions.ProxyError):
+                client.login('user1', 'password1', knox_sso = knox_sso)
+
+    def test_coalesce_reads(self):
+        self.server.latency = 0.2
+        client = ZeppelinClient(ClientConfig(self.server.url, thread_safe = True, coalesce_reads = True, coalesce_window = 0.5,
+                                             poll_strategy = FixedPollStrategy(0.02)))
+        self.addCleanup(client.close)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+        self.server.reset_counts()
+
+        with ThreadPoolExecutor(16) as executor:
+            notes = list(executor.map(lambda i: client.query_note_result(note_id), range(16)))
+        self.assertTrue(all(note is notes[0] for note in notes))
+        self.assertLess(self.server.request_counts[('GET', 'get_note')], 16)
+
+        # the final result of wait is not shared with the queries issued before completion
+        self.server.latency = 0
+        client.submit_paragraph(note_id, paragraph_id)
+        self.assertEqual('RUNNING', client.query_paragraph_result(note_id, paragraph_id).status)
+        paragraph = client.wait_until_paragraph_finished(note_id, paragraph_id)
+        self.assertEqual('FINISHED', paragraph.status)
+
+    def test_response_cache(self):
+        client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02), cache_ttl = 10))
+        self.addCleanup(client.close)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+        self.server.reset_counts()
+
+        for i in range(5):
+            self.assertEqual(1, len(client.get_note(note_id)['paragraphs']))
+            self.assertEqual(1, len(client.query_note_result(note_id).paragraphs))
+            self.assertEqual(note_id, client.reload_note_list()[0]['id'])
+        self.assertEqual(3, self.server.total_requests())
+        self.assertEqual({'hits': 12, 'misses': 3, 'revalidations': 0, 'evictions': 0, 'size': 3},
+                         client.cache_stats())
+
+        # writes invalidate the cached reads of the note
+        client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+        self.assertEqual(2, len(client.get_note(note_id)['paragraphs']))
+        client.update_paragraph(note_id, paragraph_id, 'title', "%sh echo 'updated'")
+        self.assertEqual("%sh echo 'updated'", client.query_paragraph_result(note_id, paragraph_id).text)
+        paragraph = client.execute_paragraph(note_id, paragraph_id)
+        self.assertEqual('FINISHED', paragraph.status)
+        self.assertEqual('FINISHED', client.query_paragraph_result(note_id, paragraph_id).status)
+        client.create_note('/pyzeppelin/test/note_2')
+        self.assertEqual(2, len(client.reload_note_list()))
+        client.delete_note(note_id)
+        with self.assertRaises(Exception):
+            client.get_note(note_id)
+
+        # fresh bypasses the cache
+        self.server.reset_counts()
+        client.reload_note_list(fresh = True)
+        self.assertEqual(1, self.server.total_requests())
+
+    def test_response_cache_per_note_and_session(self):
+        client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02), cache_ttl = 10))
+        self.addCleanup(client.close)
+        note_ids = [client.create_note('/pyzeppelin/test/note_' + str(i)) for i in range(2)]
+        client.add_paragraph(note_ids[1], 'shell example', "%sh echo 'hello world'")
+        for _ in range(2):
+            for note_id, paragraph_count in zip(note_ids, [0, 1]):
+                self.assertEqual(note_id, client.query_note_result(note_id).id)
+                self.assertEqual(paragraph_count, len(client.get_note(note_id)['paragraphs']))
+
+        session_ids = [client.new_session('sh').session_id for _ in range(2)]
+        for _ in range(2):
+            for session_id in session_ids:
+                self.assertEqual(session_id, client.get_session(session_id).session_id)
+        self.assertEqual(6, client.cache_stats()['misses'])
+        self.assertEqual(6, client.cache_stats()['hits'])
+
+    def test_websocket_unavailable(self):
+        # the ticket for websocket can't be queried, and websocket-client may not be installed either
+        self.server.inject_errors('ticket', 500, 100)
+        client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02),
+                                             use_websocket = True, websocket_check_interval = 10))
+        self.addCleanup(client.close)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'shell example', "%sh echo 'hello world'")
+        self.assertIsNone(client._subscribe_note(note_id))
+        self.server.reset_counts()
+
+        # falls back to polling, the websocket isn't retried until websocket_check_interval
+        self.assertEqual('FINISHED', client.execute_paragraph(note_id, paragraph_id).status)
+        self.assertEqual('FINISHED', client.execute_note(note_id).paragraphs[0].status)
+        self.assertEqual(0, self.server.request_counts[('GET', 'ticket')])
+
+    def test_stream_results(self):
+        note_id = self.server.create_note('/pyzeppelin/test/note_1', ["%sh echo 1", "%sh echo 2", "%sh invalid"])
+        self.server.job_duration = 0.01
+        self.client.execute_note(note_id)
+
+        paragraphs = list(self.client.stream_note_paragraphs(note_id, chunk_size = 64))
+        self.assertEqual(['FINISHED', 'FINISHED', 'ERROR'], [p.status for p in paragraphs])
+        self.assertEqual([('TEXT', 'echo 1\n')], paragraphs[0].results)
+        paragraphs = list(self.client.stream_note_paragraphs(note_id, result_types = []))
+        self.assertEqual([0, 0, 0], [len(p.results) for p in paragraphs])
+
+        paragraph_id = paragraphs[1].id
+        self.assertEqual([('TEXT', 'echo 2\n')], list(self.client.stream_paragraph_results(note_id, paragraph_id)))
+        with self.assertRaises(Exception):
+            list(self.client.stream_note_paragraphs('invalid_note'))
+
+    def test_result_store(self):
+        store = ResultStore(threshold = 5)
+        self.addCleanup(store.close)
+        client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02),
+                                             result_store = store))
+        self.addCleanup(client.close)
+        self.server.job_duration = 0.01
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        paragraph_id = client.add_paragraph(note_id, 'title', '%sh echo hello')
+        result = client.execute_paragraph(note_id, paragraph_id)
+        self.assertIsInstance(result.results[0][1], StoredResult)
+        self.assertEqual([('TEXT', 'echo hello\n')], result.results)
+        self.assertIsInstance(client.query_note_result(note_id).paragraphs[0].results[0][1], StoredResult)
+        self.assertEqual([('TEXT', 'echo hello\n')], list(client.stream_paragraph_results(note_id, paragraph_id)))
+
+    def test_instrumentation(self):
+        instrumentation = Instrumentation()
+        events = []
+        instrumentation.add_pre_request_hook(lambda event: events.append(('pre', event.endpoint)))
+        instrumentation.add_post_request_hook(lambda event: events.append(('post', event.status_code)))
+        client = ZeppelinClient(ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02),
+                                             instrumentation = instrumentation))
+        self.addCleanup(client.close)
+        self.server.job_duration = 0.1
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        self.assertEqual([('pre', '/api/notebook'), ('post', 200)], events)
+        paragraph_id = client.add_paragraph(note_id, 'title', '%sh echo hello')
+        client.execute_paragraph(note_id, paragraph_id)
+
+        metrics = instrumentation.registry.to_dict()
+        requests_total = dict((tuple(sorted(sample['labels'].items())), sample['value'])
+                              for sample in metrics['zeppelin_requests_total'])
+        self.assertEqual(1, requests_total[(('endpoint', '/api/notebook/{noteId}/paragraph'), ('method', 'POST'),
+                                            ('status', '200'))])
+        polls = metrics['zeppelin_wait_polls'][0]
+        self.assertEqual(({'kind': 'paragraph'}, 1), (polls['labels'], polls['count']))
+        self.assertGreater(polls['sum'], 1)
+        decode_endpoints = [sample['labels']['endpoint'] for sample in metrics['zeppelin_decode_duration_seconds']]
+        self.assertIn('/api/notebook/{noteId}/paragraph/{paragraphId}', decode_endpoints)
+        self.assertTrue(all(sample['value'] > 0 for sample in metrics['zeppelin_response_bytes_total']))
+        self.assertIn('zeppelin_request_duration_seconds_bucket{endpoint="/api/notebook",method="POST",le="+Inf"} 1',
+                      instrumentation.registry.to_prometheus())
+
+    def test_response_cache_revalidation(self):
+        self.server.etags = True
+        client = ZeppelinClient(ClientConfig(self.server.url, cache_ttl = 0.1))
+        self.addCleanup(client.close)
+        note_id = client.create_note('/pyzeppelin/test/note_1')
+        note = client.get_note(note_id)
+        time.sleep(0.2)
+        # not modified, the cached note is reused
+        self.assertIs(note, client.get_note(note_id))
+        self.assertEqual(1, client.cache_stats()['revalidations'])
+        time.sleep(0.2)
+        # modified by others
+        self.server.add_paragraph(note_id, 'title', '%sh pwd')
+        self.assertEqual(1, len(client.get_note(note_id)['paragraphs']))
+        self.assertEqual(1, client.cache_stats()['revalidations'])
+
+    def test_stub_error_rate_and_result_size(self):
+        server = StubZeppelinServer(job_duration = lambda text: 0.2 if 'slow' in text else 0.01,
+                                    result_fn = sized_result(100000), error_rate = 0.5, seed = 1).start()
+        self.addCleanup(server.stop)
+        client = ZeppelinClient(ClientConfig(server.url, poll_strategy = FixedPollStrategy(0.01),
+                                             transport = TransportConfig(max_retries = 0)))
+        self.addCleanup(client.close)
+        note_id = server.create_note('/pyzeppelin/test/note_1', ['%sh echo fast', '%sh echo slow'])
+        failures = 0
+        for _ in range(20):
+            try:
+                client.query_note_status(note_id)
+            except Exception:
+                failures += 1
+        self.assertTrue(0 < failures < 20)
+
+        server.error_rate = 0
+        start = time.time()
+        fast = client.execute_paragraph(note_id, server.notes[note_id]['paragraphs'][0]['id'])
+        self.assertLess(time.time() - start, 0.2)
+        self.assertEqual(100000, len(fast.results[0][1]))
+        start = time.time()
+        client.execute_paragraph(note_id, server.notes[note_id]['paragraphs'][1]['id'])
+        self.assertGreaterEqual(time.time() - start, 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
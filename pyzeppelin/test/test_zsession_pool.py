@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import unittest
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.zsession_pool import ZSessionPool
+
+
+class TestZSessionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubZeppelinServer(job_duration = 0.02).start()
+        # cleanups run after tearDown, stop the server after the sessions are stopped
+        self.addCleanup(self.server.stop)
+        self.client_config = ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.01))
+
+    def create_pool(self, **kwargs):
+        pool = ZSessionPool(self.client_config, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def wait_for_idle(self, pool, key, idle):
+        deadline = time.monotonic() + 5
+        while pool.stats().get(key, {}).get('idle') != idle and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(idle, pool.stats()[key]['idle'])
+
+    def count_stopped(self, sessions):
+        return len([s for s in sessions if self.server.sessions[s.session_id()]['state'] == 'STOPPED'])
+
+    def test_checkout_and_checkin(self):
+        pool = self.create_pool(min_size = 0, max_size = 2)
+        with pool.session('sh') as session:
+            result = session.execute("echo 'hello world'")
+            self.assertEqual('FINISHED', result.status)
+            session_id = session.session_id()
+        # the same started session is reused
+        with pool.session('sh') as session:
+            self.assertEqual(session_id, session.session_id())
+        # different properties use different sessions
+        with pool.session('sh', {'k': 'v'}) as session:
+            self.assertNotEqual(session_id, session.session_id())
+        self.assertEqual(2, len(pool.stats()))
+
+    def test_prewarm(self):
+        pool = self.create_pool(min_size = 2, max_size = 3)
+        pool.prewarm('sh')
+        self.wait_for_idle(pool, ('sh', ()), 2)
+        session = pool.checkout('sh')
+        self.assertEqual('RUNNING', self.server.sessions[session.session_id()]['state'])
+        # replenished up to min_size idle sessions in background
+        self.wait_for_idle(pool, ('sh', ()), 2)
+        self.assertEqual(3, len(self.server.sessions))
+        pool.checkin(session)
+        self.assertEqual({'idle': 3, 'in_use': 0, 'starting': 0}, pool.stats()[('sh', ())])
+
+    def test_checkout_prewarmed_session(self):
+        pool = self.create_pool(min_size = 1, max_size = 1)
+        pool.prewarm('sh')
+        self.wait_for_idle(pool, ('sh', ()), 1)
+        self.server.reset_counts()
+        pool.checkout('sh')
+        # only the health check, no interpreter startup in the request path
+        self.assertEqual({('GET', 'get_session'): 1}, dict(self.server.request_counts))
+
+    def test_max_size(self):
+        pool = self.create_pool(min_size = 0, max_size = 1)
+        session = pool.checkout('sh')
+        start = time.monotonic()
+        with self.assertRaises(Exception):
+            pool.checkout('sh', timeout = 0.1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        pool.checkin(session)
+        self.assertIs(session, pool.checkout('sh', timeout = 0.1))
+
+    def test_health_check(self):
+        pool = self.create_pool(min_size = 0, max_size = 2)
+        session = pool.checkout('sh')
+        pool.checkin(session)
+        self.server.sessions[session.session_id()]['state'] = 'STOPPED'
+        new_session = pool.checkout('sh')
+        self.assertNotEqual(session.session_id(), new_session.session_id())
+        self.assertEqual({'idle': 0, 'in_use': 1, 'starting': 0}, pool.stats()[('sh', ())])
+
+    def test_idle_eviction(self):
+        pool = self.create_pool(min_size = 1, max_size = 3, idle_timeout = 0.1)
+        sessions = [pool.checkout('sh') for _ in range(3)]
+        for session in sessions:
+            pool.checkin(session)
+        # only min_size sessions are kept
+        self.wait_for_idle(pool, ('sh', ()), 1)
+        deadline = time.monotonic() + 5
+        while self.count_stopped(sessions) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(2, self.count_stopped(sessions))
+
+    def test_close(self):
+        pool = self.create_pool(min_size = 0, max_size = 2)
+        session1 = pool.checkout('sh')
+        session2 = pool.checkout('sh')
+        pool.checkin(session1)
+        pool.close()
+        self.assertEqual('STOPPED', self.server.sessions[session1.session_id()]['state'])
+        self.assertEqual('RUNNING', self.server.sessions[session2.session_id()]['state'])
+        pool.checkin(session2)
+        self.assertEqual('STOPPED', self.server.sessions[session2.session_id()]['state'])
+        with self.assertRaises(Exception):
+            pool.checkout('sh')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent import futures
+import time
+import unittest
+
+from pyzeppelin.config import ClientConfig
+from pyzeppelin.poll import FixedPollStrategy
+from pyzeppelin.test.stub_server import StubZeppelinServer
+from pyzeppelin.tracing import InMemoryTracer
+from pyzeppelin.zsession import ZSession
+
+
+class TestZSessionWithStub(unittest.TestCase):
+    """
+    ZSession tests which run against StubZeppelinServer instead of a real Zeppelin.
+    """
+
+    def setUp(self):
+        self.server = StubZeppelinServer(job_duration = 0.05).start()
+        # cleanups run after tearDown, stop the server after the sessions are stopped
+        self.addCleanup(self.server.stop)
+        self.client_config = ClientConfig(self.server.url, poll_strategy = FixedPollStrategy(0.02))
+
+    def start_session(self, **kwargs):
+        session = ZSession(self.client_config, 'sh', **kwargs)
+        session.start()
+        self.addCleanup(session.stop)
+        return session
+
+    def test_execute(self):
+        session = self.start_session()
+        self.assertIsNotNone(session.session_id())
+
+        result = session.execute("echo 'hello world'")
+        self.assertEqual('FINISHED', result.status)
+        self.assertEqual(1, len(result.results))
+        self.assertEqual('TEXT', result.results[0][0])
+        self.assertEqual("echo 'hello world'\n", result.results[0][1])
+
+        result = session.execute("invalid_command")
+        self.assertEqual('ERROR', result.status, result)
+
+    def test_tracing(self):
+        tracer = InMemoryTracer()
+        self.client_config.tracer = tracer
+        session = self.start_session()
+        start = tracer.get_spans('zsession.start')[0]
+        self.assertEqual(['zsession.new_session', 'zsession.configure', 'zsession.init', 'zsession.get_session'],
+                         [span.name for span in tracer.get_spans() if span.parent is start])
+        self.assertEqual(session.session_id(), start.attributes['session_id'])
+
+        tracer.clear()
+        result = session.execute("echo 1")
+        execute = tracer.get_spans('zsession.execute')[0]
+        self.assertEqual(['zsession.next_paragraph', 'zsession.update_paragraph', 'zsession.execute_paragraph'],
+                         [span.name for span in tracer.get_spans() if span.parent is execute])
+        self.assertEqual({'interpreter': 'sh', 'fast_execute': False, 'session_id': session.session_id(),
+                          'note_id': session.session_info.note_id, 'paragraph_id': result.statement_id,
+                          'status': 'FINISHED', 'poll_count': result.poll_count}, execute.attributes)
+        self.assertGreater(result.poll_count, 0)
+
+    def test_fast_execute(self):
+        session = self.start_session(fast_execute = True)
+        self.server.reset_counts()
+
+        result = session.execute("echo 'hello world'")
+        self.assertEqual('FINISHED', result.status)
+        self.assertEqual("echo 'hello world'\n", result.results[0][1])
+        # next paragraph, update paragraph and run paragraph
+        self.assertEqual(3, self.server.total_requests())
+
+        result = session.execute("invalid_command")
+        self.assertEqual('ERROR', result.status, result)
+        self.assertEqual('invalid_command: command not found\n', result.results[0][1])
+
+    def test_prefetch_paragraphs(self):
+        session = self.start_session(max_statement = 6, prefetch_paragraphs = 10)
+        # capped at half of max_statement
+        self.assertEqual(3, session.prefetch_paragraphs)
+        deadline = time.monotonic() + 5
+        while session._paragraph_pool.qsize() < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(3, session._paragraph_pool.qsize())
+
+        # paragraphs are recycled without running out of available paragraph
+        for i in range(10):
+            result = session.execute("echo " + str(i))
+            self.assertEqual('FINISHED', result.status)
+            self.assertEqual("echo " + str(i) + "\n", result.results[0][1])
+        note = self.server.notes[session.session_info.note_id]
+        self.assertLessEqual(len(note['paragraphs']), 6)
+
+        session.stop()
+        self.assertIsNone(session._prefetch_thread)
+
+    def test_submit_future(self):
+        session = self.start_session()
+        self.server.reset_counts()
+        statements = [session.submit("echo " + str(i)) for i in range(5)]
+        self.assertTrue(all(isinstance(f, futures.Future) for f in statements))
+        for i, future in enumerate(futures.as_completed(statements, timeout = 5)):
+            self.assertEqual('FINISHED', future.result().status)
+        for i, future in enumerate(statements):
+            self.assertEqual("echo " + str(i) + "\n", future.result().results[0][1])
+            self.assertEqual(future.statement_id, future.result().statement_id)
+            # attributes of ExecuteResult are still available on the future
+            self.assertEqual('FINISHED', future.status)
+        # the status of the statements is queried together via the note job status
+        self.assertLessEqual(self.server.request_counts[('GET', 'note_status')] +
+                             self.server.request_counts[('GET', 'paragraph_status')], 5)
+        self.assertEqual(5, self.server.request_counts[('GET', 'get_paragraph')])
+
+        future = session.submit("invalid_command")
+        self.assertEqual('ERROR', future.result(timeout = 5).status)
+
+    def test_cancel_future(self):
+        session = self.start_session()
+        self.server.job_duration = 1
+        future = session.submit("echo 1")
+        self.assertTrue(future.cancel())
+        self.assertTrue(future.cancelled())
+        with self.assertRaises(futures.CancelledError):
+            future.result()
+        paragraph = self.server.find_paragraph(session.session_info.note_id, future.statement_id)
+        self.assertEqual('ABORTED', paragraph['status'])
+
+    def test_map(self):
+        session = self.start_session(max_statement = 10)
+        codes = ["echo " + str(i) for i in range(12)]
+        results = list(session.map(codes, max_in_flight = 3))
+        self.assertEqual([code + "\n" for code in codes], [r.results[0][1] for r in results])
+
+        results = session.execute_many(codes, max_in_flight = 8, ordered = False)
+        self.assertEqual(sorted(code + "\n" for code in codes), sorted(r.results[0][1] for r in results))
+
+    def test_map_with_prefetch_paragraphs(self):
+        self.client_config.poll_strategy = FixedPollStrategy(0.1)
+        session = self.start_session(max_statement = 10, prefetch_paragraphs = 5)
+        deadline = time.monotonic() + 5
+        while not session._paragraph_pool.full() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # no paragraph is allocated while results are pending, Zeppelin could recycle a completed one not read yet
+        self.server.job_duration = 0.5
+        self.server.reset_counts()
+        statements = [session.submit("echo " + str(i)) for i in range(3)]
+        time.sleep(0.3)
+        self.assertEqual(0, self.server.request_counts[('POST', 'next_paragraph')])
+        self.assertEqual(2, session._paragraph_pool.qsize())
+        self.assertEqual(['FINISHED'] * 3, [f.result(timeout = 5).status for f in statements])
+
+        # prefetched and running paragraphs share the paragraphs of the session note
+        self.server.job_duration = 0.2
+        codes = ["echo " + str(i) for i in range(20)]
+        results = session.execute_many(codes, max_in_flight = 5)
+        self.assertEqual([code + "\n" for code in codes], [r.results[0][1] for r in results])
+        self.assertLessEqual(len(self.server.notes[session.session_info.note_id]['paragraphs']), 10)
+
+    def test_stop_with_pending_statement(self):
+        session = ZSession(self.client_config, 'sh')
+        session.start()
+        self.server.job_duration = 1
+        future = session.submit("echo 1")
+        session.stop()
+        with self.assertRaises(Exception):
+            future.result(timeout = 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
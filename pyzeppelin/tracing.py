@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+class _NoopSpan:
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Tracer of the phases of ZSession, set it as ClientConfig.tracer. start_span(name, attributes) returns
+    a context manager of the span, which is nested in the span of the enclosing context manager in the same thread.
+    The span has set_attribute(key, value) and record_exception(exception), in the same way as OpenTelemetry spans.
+
+    This base class doesn't trace anything, use OpenTelemetryTracer to export the spans via OpenTelemetry,
+    or InMemoryTracer to inspect them in process.
+    """
+    def start_span(self, name, attributes = None):
+        return _NOOP_SPAN
+
+
+def _valid_attributes(attributes):
+    # OpenTelemetry doesn't accept None values
+    return dict((key, value) for key, value in attributes.items() if value is not None) if attributes else None
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer which creates the spans by an OpenTelemetry tracer, requires opentelemetry-api. The spans are started
+    as the current span, so they are nested in the span of the caller too.
+    """
+    def __init__(self, tracer = None):
+        if trace is None:
+            raise Exception("opentelemetry-api is required for OpenTelemetryTracer, "
+                            "please install it via 'pip install pyzeppelin[tracing]'")
+        self.tracer = tracer if tracer is not None else trace.get_tracer('pyzeppelin')
+
+    def start_span(self, name, attributes = None):
+        return self.tracer.start_as_current_span(name, attributes = _valid_attributes(attributes))
+
+
+class FinishedSpan:
+    """
+    Span recorded by InMemoryTracer, start_time and end_time are time.perf_counter() seconds.
+    error is the repr of the exception raised in the span, None if it succeeded.
+    """
+    def __init__(self, name, attributes, parent, start_time):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start_time = start_time
+        self.end_time = None
+        self.error = None
+
+    @property
+    def duration(self):
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def __repr__(self):
+        return "FinishedSpan(name={}, attributes={}, duration={}, error={})".format(
+            self.name, self.attributes, self.duration, self.error)
+
+
+class _InMemorySpan:
+
+    def __init__(self, tracer, name, attributes):
+        self._tracer = tracer
+        self._name = name
+        self._attributes = dict(attributes or {})
+        self.span = None
+
+    def set_attribute(self, key, value):
+        self.span.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.span.error = repr(exception)
+
+    def __enter__(self):
+        stack = self._tracer._stack()
+        self.span = FinishedSpan(self._name, self._attributes, stack[-1] if stack else None, time.perf_counter())
+        stack.append(self.span)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.span.end_time = time.perf_counter()
+        if exc_value is not None:
+            self.record_exception(exc_value)
+        stack = self._tracer._stack()
+        if stack and stack[-1] is self.span:
+            stack.pop()
+        self._tracer._finish(self.span)
+        return False
+
+
+class InMemoryTracer(Tracer):
+    """
+    Tracer which keeps the finished spans in memory (at most max_spans, the oldest ones are dropped),
+    e.g. to find the dominant phase in tests and benchmarks.
+    """
+    def __init__(self, max_spans = 10000):
+        self.max_spans = max_spans
+        self._spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def _finish(self, span):
+        with self._lock:
+            self._spans.append(span)
+            if len(self._spans) > self.max_spans:
+                del self._spans[:len(self._spans) - self.max_spans]
+
+    def start_span(self, name, attributes = None):
+        return _InMemorySpan(self, name, attributes)
+
+    def get_spans(self, name = None):
+        """
+        Return the finished spans in the order they finished, only the spans of name if it is given.
+        :param name:
+        :return:
+        """
+        with self._lock:
+            return [span for span in self._spans if name is None or span.name == name]
+
+    def clear(self):
+        with self._lock:
+            self._spans = []
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+class TransportAdapter(HTTPAdapter):
+    """
+    HTTPAdapter configured by TransportConfig: pool size, retries and TCP keepalive socket options.
+    """
+    def __init__(self, transport_config):
+        self.transport_config = transport_config
+        super().__init__(pool_connections = transport_config.pool_connections,
+                         pool_maxsize = transport_config.pool_maxsize,
+                         pool_block = transport_config.pool_block,
+                         max_retries = transport_config.get_retry())
+
+    def _socket_options(self):
+        options = list(HTTPConnection.default_socket_options)
+        config = self.transport_config
+        if config.tcp_keepalive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            # not all the platforms support tuning the keepalive probes
+            for name, value in [('TCP_KEEPIDLE', config.tcp_keepalive_idle),
+                                ('TCP_KEEPINTVL', config.tcp_keepalive_interval),
+                                ('TCP_KEEPCNT', config.tcp_keepalive_count)]:
+                if hasattr(socket, name) and value:
+                    options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+        return options
+
+    def init_poolmanager(self, connections, maxsize, block = False, **pool_kwargs):
+        pool_kwargs['socket_options'] = self._socket_options()
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+    def pool_stats(self):
+        """
+        Usage of the connection pools, one pool per host.
+        connections: connections opened so far, requests: requests sent so far,
+        idle: connections kept alive in the pool, maxsize: max number of connections kept alive.
+        :return:
+        """
+        stats = {}
+        for key in self.poolmanager.pools.keys():
+            pool = self.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            stats["{}://{}:{}".format(pool.scheme, pool.host, pool.port)] = {
+                'connections': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': idle,
+                'maxsize': pool.pool.maxsize if pool.pool else 0}
+        return stats
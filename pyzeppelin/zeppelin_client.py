@@ -17,12 +17,34 @@
 # limitations under the License.
 
 import requests
+from pyzeppelin.cache import ResponseCache
 from pyzeppelin.config import ClientConfig
+from pyzeppelin.json_stream import iter_note_paragraphs, iter_paragraph_messages
 from pyzeppelin.notebook import Note
 from pyzeppelin.notebook import Paragraph
+from pyzeppelin.notebook import NoteJobStatus
+from pyzeppelin.notebook import ParagraphJobStatus
+from pyzeppelin.notebook_socket import NotebookSocket
+from pyzeppelin.poll_scheduler import PollScheduler
+from pyzeppelin.singleflight import SingleFlight
+from pyzeppelin.transport import TransportAdapter
+import threading
 import time
 import logging
 
+logger = logging.getLogger(__name__)
+
+# cache tag of the note list
+NOTE_LIST = ('note_list',)
+
+
+def _note_tag(note_id):
+    return ('note', note_id)
+
+
+def _session_tag(session_id):
+    return ('session', session_id)
+
 
 class SessionInfo:
 
@@ -52,26 +74,343 @@ class SessionInfo:
             self.start_time = resp_json['startTime']
 
 
+class NoteHandle:
+    """
+    Handle of the note returned by submit_note. The note is only fetched from Zeppelin when one of the Note
+    attributes (e.g. is_running, paragraphs) is accessed for the first time, call refresh() to fetch it again.
+    """
+    def __init__(self, zeppelin_client, note_id):
+        self.id = note_id
+        self._zeppelin_client = zeppelin_client
+        self._note = None
+
+    def get(self):
+        if self._note is None:
+            self._note = self._zeppelin_client.query_note_result(self.id)
+        return self._note
+
+    def refresh(self):
+        self._note = self._zeppelin_client.query_note_result(self.id, fresh = True)
+        return self._note
+
+    def __getattr__(self, name):
+        # only invoked for the attributes which are not defined in the handle itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        if self._note is None:
+            return "NoteHandle(id={})".format(self.id)
+        return repr(self._note)
+
+
+class ParagraphHandle:
+    """
+    Handle of the paragraph returned by submit_paragraph. The paragraph is only fetched from Zeppelin when one of
+    the Paragraph attributes (e.g. status, results) is accessed for the first time, call refresh() to fetch it again.
+    """
+    def __init__(self, zeppelin_client, note_id, paragraph_id):
+        self.id = paragraph_id
+        self.note_id = note_id
+        self._zeppelin_client = zeppelin_client
+        self._paragraph = None
+
+    def get(self):
+        if self._paragraph is None:
+            self._paragraph = self._zeppelin_client.query_paragraph_result(self.note_id, self.id)
+        return self._paragraph
+
+    def refresh(self):
+        self._paragraph = self._zeppelin_client.query_paragraph_result(self.note_id, self.id, fresh = True)
+        return self._paragraph
+
+    def __getattr__(self, name):
+        # only invoked for the attributes which are not defined in the handle itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        if self._paragraph is None:
+            return "ParagraphHandle(note_id={}, id={})".format(self.note_id, self.id)
+        return repr(self._paragraph)
+
+
 class ZeppelinClient:
     """
     Low leve of Zeppelin SDK, this is used to interact with Zeppelin in note/paragraph abstraction layer.
+
+    When ClientConfig.coalesce_reads is True, concurrent identical read queries (note, paragraph, job status
+    and session) share one http call and its parsed result, see SingleFlight.
+
+    When ClientConfig.cache_ttl > 0, note, paragraph, note list and session reads are served from a ResponseCache,
+    the writes via this client invalidate the entries of the note they change. Reads with fresh = True always
+    go to Zeppelin. The cached objects are shared by the callers, don't modify them.
+
+    When ClientConfig.thread_safe is True, one client can be shared by many threads: each thread sends requests via
+    its own requests.Session, all of them share the same connection pool, cookie jar and auth, and login is
+    serialized by a lock. Otherwise all the threads share one requests.Session which is not documented as thread-safe.
     """
     def __init__(self, client_config):
         self.client_config = client_config
         self.zeppelin_rest_url = client_config.get_zeppelin_rest_url()
-        self.session = requests.Session()
+        self.transport = client_config.get_transport()
+        self.adapter = TransportAdapter(self.transport)
+        self._auth = None
+        self._login_lock = threading.Lock()
+        self._local = threading.local()
+        self._environment = self._resolve_environment()
+        self._session = self._new_session()
+        self._notebook_socket = None
+        self._notebook_socket_lock = threading.Lock()
+        self._next_socket_connect_time = 0
+        self._poll_scheduler = None
+        self.single_flight = SingleFlight(client_config.coalesce_window) if client_config.coalesce_reads else None
+        self.response_cache = ResponseCache(client_config.cache_ttl, client_config.cache_size) \
+            if client_config.cache_ttl > 0 else None
+
+    def _resolve_environment(self):
+        """
+        Resolve proxies, ca bundle and netrc auth of zeppelin_rest_url from environment once, requests does it
+        for every request by scanning all the environment variables, which is costly and serialized by GIL under
+        many threads. The proxies of the other urls are resolved per request, see _proxies.
+        :return:
+        """
+        environment = requests.Session().merge_environment_settings(self.zeppelin_rest_url, {}, None, None, None)
+        environment['auth'] = requests.utils.get_netrc_auth(self.zeppelin_rest_url)
+        return environment
+
+    def _proxies(self, url):
+        """
+        Proxies of the url from environment, the resolved ones are reused for the urls of Zeppelin rest api.
+        :param url:
+        :return:
+        """
+        if url.startswith(self.zeppelin_rest_url):
+            return self._environment['proxies']
+        return requests.utils.get_environ_proxies(url)
+
+    def _new_session(self, cookies = None):
+        session = requests.Session()
+        # proxies are passed per request, they depend on the host because of no_proxy
+        session.trust_env = False
+        session.verify = self._environment['verify']
+        session.auth = self._environment['auth']
+        session.mount('http://', self.adapter)
+        session.mount('https://', self.adapter)
+        if cookies is not None:
+            session.cookies = cookies
+        return session
+
+    @property
+    def session(self):
+        """
+        requests.Session of current thread in thread safe mode, otherwise the only session of this client.
+        :return:
+        """
+        if not self.client_config.thread_safe:
+            return self._session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            # the cookie jar is protected by its own lock, so it can be shared
+            session = self._new_session(self._session.cookies)
+            self._local.session = session
+        return session
+
+    def _request(self, method, path, **kwargs):
+        """
+        Send request to Zeppelin rest api with the timeout of TransportConfig, retries are done by the adapter.
+        :param method:
+        :param path:
+        :param kwargs:
+        :return:
+        """
+        kwargs.setdefault('timeout', self.transport.get_timeout())
+        kwargs.setdefault('proxies', self._environment['proxies'])
+        if self._auth is not None:
+            kwargs.setdefault('auth', self._auth)
+        instrumentation = self.client_config.instrumentation
+        if instrumentation is None:
+            return self.session.request(method, self.zeppelin_rest_url + path, **kwargs)
+        event = instrumentation.before_request(method, path)
+        try:
+            resp = self.session.request(method, self.zeppelin_rest_url + path, **kwargs)
+        except Exception as e:
+            instrumentation.after_request(event, error = e)
+            raise
+        body = resp.request.body
+        if kwargs.get('stream'):
+            # don't read the streamed content
+            bytes_received = int(resp.headers.get('Content-Length') or 0)
+        else:
+            bytes_received = len(resp.content)
+        instrumentation.after_request(event, resp.status_code, len(body) if body else 0, bytes_received)
+        return resp
+
+    def _decode(self, path, parse, resp):
+        """
+        Convert the response to the result by parse, and record the time of it when instrumentation is enabled.
+        :param path:
+        :param parse:
+        :param resp:
+        :return:
+        """
+        instrumentation = self.client_config.instrumentation
+        if instrumentation is None:
+            return parse(resp)
+        start_time = time.perf_counter()
+        result = parse(resp)
+        instrumentation.observe_decode(path, time.perf_counter() - start_time)
+        return result
+
+    def _coalesce(self, key, query, fresh = False):
+        """
+        Run the read query, share it with the concurrent identical queries when coalesce_reads is enabled.
+        :param key:
+        :param query:
+        :param fresh: always run the query, e.g. to fetch the final result of a job
+        :return:
+        """
+        if self.single_flight is None or fresh:
+            return query()
+        return self.single_flight.do(key, query)
+
+    def _read(self, tag, key, path, parse, fresh = False, params = None):
+        """
+        Send the read only GET request, serve it from the response cache when it is enabled. An expired entry which
+        has validators is revalidated with a conditional request, and reused if Zeppelin replies 304 Not Modified.
+        :param tag: the cache entry is invalidated together with the other entries of the tag
+        :param key: identifies the read within the tag, e.g. the paragraph id
+        :param path:
+        :param parse: convert the response to the result
+        :param fresh: don't use the cache or the result of other identical query
+        :param params:
+        :return:
+        """
+        # the tag contains the note or session id
+        key = (tag,) + key
+        cache = self.response_cache
+        entry = None
+        if cache is not None and not fresh:
+            entry = cache.get(key)
+            if entry is not None and entry.is_fresh():
+                return entry.value
+
+        def query():
+            version = cache.version(tag) if cache is not None else None
+            headers = entry.conditional_headers() if entry is not None else None
+            resp = self._request('GET', path, params = params, headers = headers)
+            if resp.status_code == 304 and entry is not None:
+                cache.revalidated(key, entry, version)
+                return entry.value
+            result = self._decode(path, parse, resp)
+            if cache is not None:
+                cache.put(key, result, tag, version, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+            return result
+        return self._coalesce(key, query, fresh)
+
+    def _invalidate(self, *tags):
+        """
+        Drop the cached and coalesced reads of the tags, must be called after the write request is sent.
+        :param tags:
+        :return:
+        """
+        if self.response_cache is not None:
+            for tag in tags:
+                self.response_cache.invalidate(tag)
+        if self.single_flight is not None:
+            self.single_flight.forget(lambda key: key[0] in tags)
+
+    def cache_stats(self):
+        """
+        Hit and miss counters of the response cache, see ResponseCache.stats, None if the cache is disabled.
+        :return:
+        """
+        if self.response_cache is None:
+            return None
+        return self.response_cache.stats()
+
+    def pool_stats(self):
+        """
+        Usage of the http connection pools, see TransportAdapter.pool_stats.
+        :return:
+        """
+        return self.adapter.pool_stats()
 
     def _check_response(self, resp):
         if resp.status_code != 200:
             raise Exception("Invoke rest api failed, status code: {}, status text: {}".format(
                 resp.status_code, resp.text))
 
+    def _parse_body(self, resp):
+        self._check_response(resp)
+        return resp.json()['body']
+
+    def close(self):
+        """
+        Stop the poll scheduler and close the notebook websocket if they are started,
+        the jobs which are still waited fail. Then close the connection pool.
+        :return:
+        """
+        with self._notebook_socket_lock:
+            poll_scheduler = self._poll_scheduler
+            self._poll_scheduler = None
+        if poll_scheduler:
+            poll_scheduler.close()
+        with self._notebook_socket_lock:
+            if self._notebook_socket:
+                self._notebook_socket.close()
+                self._notebook_socket = None
+        self.adapter.close()
+
+    def get_poll_scheduler(self):
+        """
+        Return the PollScheduler which waits for all the jobs of this client in one thread.
+        :return:
+        """
+        with self._notebook_socket_lock:
+            if self._poll_scheduler is None:
+                self._poll_scheduler = PollScheduler(self)
+            return self._poll_scheduler
+
+    def _subscribe_note(self, note_id):
+        """
+        Subscribe the status of note via websocket, return the NotebookSocket if it succeeds,
+        return None if websocket is disabled or not available, then caller should fall back to polling.
+        :param note_id:
+        :return:
+        """
+        if not self.client_config.use_websocket:
+            return None
+        with self._notebook_socket_lock:
+            notebook_socket = self._notebook_socket
+            if notebook_socket is None or not notebook_socket.is_connected():
+                # don't retry on every poll when Zeppelin websocket is not reachable
+                if time.monotonic() < self._next_socket_connect_time:
+                    return None
+                try:
+                    if notebook_socket is None:
+                        # websocket-client may be missing, or the ticket query may fail
+                        cookie = '; '.join(name + '=' + value for name, value in self.session.cookies.items())
+                        notebook_socket = NotebookSocket(self.client_config.get_websocket_url(), self.get_ticket(),
+                                                         cookie = cookie or None)
+                        self._notebook_socket = notebook_socket
+                    notebook_socket.connect()
+                except Exception as e:
+                    logger.warning("Fail to connect Zeppelin websocket, fall back to polling: %s", e)
+                    self._next_socket_connect_time = time.monotonic() + self.client_config.websocket_check_interval
+                    return None
+        if notebook_socket.subscribe(note_id):
+            return notebook_socket
+        return None
+
     def get_version(self):
         """
         Return Zeppelin version
         :return:
         """
-        resp = self.session.get(self.zeppelin_rest_url + "/api/version")
+        resp = self._request('GET', "/api/version")
         self._check_response(resp)
         return resp.json()['body']['version']
 
@@ -83,20 +422,35 @@ class ZeppelinClient:
         :param knox_sso:
         :return:
         """
-        if knox_sso:
-            self.session.auth = (user_name, password)
-            resp = self.session.get(knox_sso + "?originalUrl=" + self.zeppelin_rest_url, verify=False)
-            if resp.status_code != 200:
-                raise Exception("Knox SSO login fails, status: {}, status_text: {}" \
-                    .format(resp.status_code, resp.text))
-            resp = self.session.get(self.zeppelin_rest_url + "/api/security/ticket")
-            if resp.status_code != 200:
-                raise Exception("Fail to get ticket after Knox SSO, status: {}, status_text: {}" \
-                                .format(resp.status_code, resp.text))
-        else:
-            resp = self.session.post(self.zeppelin_rest_url + "/api/login",
+        with self._login_lock:
+            if knox_sso:
+                self._auth = (user_name, password)
+                resp = self.session.get(knox_sso + "?originalUrl=" + self.zeppelin_rest_url, verify=False,
+                                        auth = self._auth, timeout = self.transport.get_timeout(),
+                                        proxies = self._proxies(knox_sso))
+                if resp.status_code != 200:
+                    raise Exception("Knox SSO login fails, status: {}, status_text: {}" \
+                        .format(resp.status_code, resp.text))
+                resp = self._request('GET', "/api/security/ticket")
+                if resp.status_code != 200:
+                    raise Exception("Fail to get ticket after Knox SSO, status: {}, status_text: {}" \
+                                    .format(resp.status_code, resp.text))
+            else:
+                resp = self._request('POST', "/api/login",
                                      data = {'userName': user_name, 'password': password})
-            self._check_response(resp)
+                self._check_response(resp)
+            # the notes visible to the new user are different
+            if self.response_cache is not None:
+                self.response_cache.clear()
+
+    def get_ticket(self):
+        """
+        Return the ticket of current user (principal, ticket and roles), it is used by websocket.
+        :return:
+        """
+        resp = self._request('GET', "/api/security/ticket")
+        self._check_response(resp)
+        return resp.json()['body']
 
     def create_note(self, note_path, default_interpreter_group = 'spark'):
         """
@@ -105,8 +459,9 @@ class ZeppelinClient:
         :param default_interpreter_group:
         :return:
         """
-        resp = self.session.post(self.zeppelin_rest_url + "/api/notebook",
-                                 json =  {'name' : note_path, 'defaultInterpreterGroup': default_interpreter_group})
+        resp = self._request('POST', "/api/notebook",
+                             json =  {'name' : note_path, 'defaultInterpreterGroup': default_interpreter_group})
+        self._invalidate(NOTE_LIST)
         self._check_response(resp)
         return resp.json()['body']
 
@@ -116,19 +471,40 @@ class ZeppelinClient:
         :param note_id:
         :return:
         """
-        resp = self.session.delete(self.zeppelin_rest_url + "/api/notebook/" + note_id)
+        resp = self._request('DELETE', "/api/notebook/" + note_id)
+        self._invalidate(_note_tag(note_id), NOTE_LIST)
         self._check_response(resp)
 
-    def query_note_result(self, note_id):
+    def query_note_result(self, note_id, fresh = False):
         """
         Query note result via Zeppelin rest api and convert the returned json to NoteResult
         :param note_id:
+        :param fresh: don't use the response cache or the result of other identical query
         :return:
         """
-        resp = self.session.get(self.zeppelin_rest_url + "/api/notebook/" + note_id)
-        self._check_response(resp)
-        note_json = resp.json()['body']
-        return Note(note_json)
+        def parse(resp):
+            self._check_response(resp)
+            note_json = resp.json()['body']
+            if self.client_config.result_store is not None:
+                self.client_config.result_store.spill_note(note_json)
+            return Note(note_json, self.client_config.keep_json)
+        return self._read(_note_tag(note_id), ('query_note_result',), "/api/notebook/" + note_id, parse, fresh)
+
+    def query_note_status(self, note_id):
+        """
+        Query the job status of note, it doesn't include paragraph text and results,
+        so it is much cheaper than query_note_result.
+        :param note_id:
+        :return:
+        """
+        def parse(resp):
+            self._check_response(resp)
+            return NoteJobStatus(resp.json()['body'])
+
+        def query():
+            path = "/api/notebook/job/" + note_id
+            return self._decode(path, parse, self._request('GET', path))
+        return self._coalesce((_note_tag(note_id), 'query_note_status'), query)
 
     def execute_note(self, note_id, params = {}):
         """
@@ -143,17 +519,19 @@ class ZeppelinClient:
     def submit_note(self, note_id, params = {}):
         """
         Execute give note with params, return once submission is finished. It is non-blocking api,
-        won't wait for the completion of note execution.
+        won't wait for the completion of note execution. The returned NoteHandle only queries the note
+        result when it is accessed.
         :param note_id:
         :param params:
         :return:
         """
-        logging.info("Submitting note: " + note_id + " with params: " + str(params))
-        resp = self.session.post(self.zeppelin_rest_url + "/api/notebook/job/" + note_id,
-                          params = {'blocking': 'false', 'isolated': 'true', 'reload': 'true'},
-                          json = {'params': params})
+        logger.info("Submitting note: %s with params: %s", note_id, params)
+        resp = self._request('POST', "/api/notebook/job/" + note_id,
+                             params = {'blocking': 'false', 'isolated': 'true', 'reload': 'true'},
+                             json = {'params': params})
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
-        return self.query_note_result(note_id)
+        return NoteHandle(self, note_id)
 
     def wait_until_note_finished(self, note_id):
         """
@@ -161,29 +539,27 @@ class ZeppelinClient:
         :param note_id:
         :return:
         """
-        while True:
-            note_result = self.query_note_result(note_id)
-            logging.info("note_is_running: " + str(note_result.is_running) + ", jobURL: " +
-                         str(list(map(lambda p: p.jobUrls, filter(lambda p: p.jobUrls, note_result.paragraphs)))))
-            if not note_result.is_running:
-                return note_result
-            time.sleep(self.client_config.get_query_interval())
+        return self.get_poll_scheduler().watch_note(note_id).result()
 
-    def reload_note_list(self):
-        resp = self.session.get(self.zeppelin_rest_url + "/api/notebook", params = {'reload': 'true'})
-        self._check_response(resp)
-        return resp.json()['body']
+    def reload_note_list(self, fresh = False):
+        """
+        List the id and path of all the notes.
+        :param fresh: don't use the response cache or the result of other identical query
+        :return:
+        """
+        return self._read(NOTE_LIST, ('reload_note_list',), "/api/notebook", self._parse_body, fresh,
+                          params = {'reload': 'true'})
 
-    def get_note(self, note_id, reload = False):
+    def get_note(self, note_id, reload = False, fresh = False):
         """
         Get specified note.
         :param note_id:
         :param reload:
+        :param fresh: don't use the response cache or the result of other identical query
         :return:
         """
-        resp = self.session.get(self.zeppelin_rest_url + "/api/notebook/" + note_id, params = {'reload': reload})
-        self._check_response(resp)
-        return resp.json()['body']
+        return self._read(_note_tag(note_id), ('get_note', reload), "/api/notebook/" + note_id, self._parse_body,
+                          fresh, params = {'reload': reload})
 
     def clone_note(self, note_id, dest_note_path):
         """
@@ -192,7 +568,8 @@ class ZeppelinClient:
         :param dest_note_path:
         :return:
         """
-        resp = self.session.post(self.zeppelin_rest_url + "/api/notebook/" + note_id, json = {'name': dest_note_path})
+        resp = self._request('POST', "/api/notebook/" + note_id, json = {'name': dest_note_path})
+        self._invalidate(NOTE_LIST)
         self._check_response(resp)
         return resp.json()['body']
 
@@ -204,7 +581,8 @@ class ZeppelinClient:
         :param text:
         :return:
         """
-        resp = self.session.post(self.zeppelin_rest_url + "/api/notebook/" + note_id + "/paragraph", json = {'title': title, 'text': text})
+        resp = self._request('POST', "/api/notebook/" + note_id + "/paragraph", json = {'title': title, 'text': text})
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
         return resp.json()['body']
 
@@ -217,8 +595,9 @@ class ZeppelinClient:
         :param text:
         :return:
         """
-        resp = self.session.put(self.zeppelin_rest_url + "/api/notebook/" + note_id + "/paragraph/" + paragraph_id,
-                                json = {'title' : title, 'text' : text})
+        resp = self._request('PUT', "/api/notebook/" + note_id + "/paragraph/" + paragraph_id,
+                             json = {'title' : title, 'text' : text})
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
 
     def execute_paragraph(self, note_id, paragraph_id, params = {}, session_id = "", isolated = False):
@@ -236,7 +615,8 @@ class ZeppelinClient:
 
     def submit_paragraph(self, note_id, paragraph_id, params = {}, session_id = "", isolated = False):
         """
-        Non-blocking api, execute specified paragraph with given params.
+        Non-blocking api, execute specified paragraph with given params. The returned ParagraphHandle
+        only queries the paragraph result when it is accessed.
         :param note_id:
         :param paragraph_id:
         :param params:
@@ -244,23 +624,110 @@ class ZeppelinClient:
         :param isolated:
         :return:
         """
-        logging.info("Submitting paragraph: " + paragraph_id + " with params: " + str(params))
-        resp = self.session.post(self.zeppelin_rest_url + "/api/notebook/job/" + note_id + "/" + paragraph_id,
-                                 params = {'sessionId': session_id, 'isolated': isolated, 'reload': 'true'},
-                                 json = {'params': params})
+        logger.info("Submitting paragraph: %s with params: %s", paragraph_id, params)
+        resp = self._request('POST', "/api/notebook/job/" + note_id + "/" + paragraph_id,
+                             params = {'sessionId': session_id, 'isolated': isolated, 'reload': 'true'},
+                             json = {'params': params})
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
-        return self.query_paragraph_result(note_id, paragraph_id)
+        return ParagraphHandle(self, note_id, paragraph_id)
 
-    def query_paragraph_result(self, note_id, paragraph_id):
+    def run_paragraph(self, note_id, paragraph_id, params = {}, session_id = ""):
+        """
+        Blocking api, execute specified paragraph via Zeppelin's synchronous run api, the result is returned
+        in the same http call so there's no polling. The returned Paragraph only contains id, status and results
+        (no text and job urls). The read timeout of TransportConfig doesn't apply as it lasts as long as the paragraph.
+        :param note_id:
+        :param paragraph_id:
+        :param params:
+        :param session_id:
+        :return:
+        """
+        resp = self._request('POST', "/api/notebook/run/" + note_id + "/" + paragraph_id,
+                             params = {'sessionId': session_id},
+                             json = {'params': params},
+                             timeout = (self.transport.connect_timeout, None))
+        self._invalidate(_note_tag(note_id))
+        # Zeppelin returns 500 with the interpreter result when paragraph is failed
+        result_json = None
+        if resp.status_code in (200, 500):
+            try:
+                result_json = resp.json().get('body')
+            except ValueError:
+                pass
+        if not isinstance(result_json, dict) or 'code' not in result_json:
+            self._check_response(resp)
+            raise Exception("Unexpected response of running paragraph {}: {}".format(paragraph_id, resp.text))
+        status = 'FINISHED' if result_json['code'] == 'SUCCESS' else 'ERROR'
+        paragraph_json = {'id': paragraph_id, 'status': status, 'progress': 100, 'results': result_json}
+        if self.client_config.result_store is not None:
+            self.client_config.result_store.spill_paragraph(paragraph_json)
+        return Paragraph(paragraph_json, self.client_config.keep_json)
+
+    def query_paragraph_result(self, note_id, paragraph_id, fresh = False):
         """
         Query specified paragraph result.
         :param note_id:
         :param paragraph_id:
+        :param fresh: don't use the response cache or the result of other identical query
         :return:
         """
-        resp = self.session.get(self.zeppelin_rest_url + "/api/notebook/" + note_id + "/paragraph/" + paragraph_id)
-        self._check_response(resp)
-        return Paragraph(resp.json()['body'])
+        def parse(resp):
+            self._check_response(resp)
+            paragraph_json = resp.json()['body']
+            if self.client_config.result_store is not None:
+                self.client_config.result_store.spill_paragraph(paragraph_json)
+            return Paragraph(paragraph_json, self.client_config.keep_json)
+        return self._read(_note_tag(note_id), ('query_paragraph_result', paragraph_id),
+                          "/api/notebook/" + note_id + "/paragraph/" + paragraph_id, parse, fresh)
+
+    def stream_note_paragraphs(self, note_id, result_types = None, chunk_size = 65536):
+        """
+        Generator of the Paragraphs of note, which are parsed one by one while the response is received, so the memory
+        is bounded by the largest paragraph instead of the whole note. The response cache is not used.
+        :param note_id:
+        :param result_types: only keep the result messages of these types (e.g. ['TEXT']), None to keep all,
+                             the other messages are skipped without decoding
+        :param chunk_size: bytes read from the socket at once
+        :return:
+        """
+        with self._request('GET', "/api/notebook/" + note_id, stream = True) as resp:
+            self._check_response(resp)
+            yield from iter_note_paragraphs(resp.iter_content(chunk_size), result_types, self.client_config.keep_json,
+                                            self.client_config.result_store)
+
+    def stream_paragraph_results(self, note_id, paragraph_id, result_types = None, chunk_size = 65536):
+        """
+        Generator of the (type, data) result messages of paragraph, which are parsed one by one while the response
+        is received, so the memory is bounded by the largest message. The response cache is not used.
+        :param note_id:
+        :param paragraph_id:
+        :param result_types: only keep the result messages of these types (e.g. ['TEXT']), None to keep all,
+                             the other messages are skipped without decoding
+        :param chunk_size: bytes read from the socket at once
+        :return:
+        """
+        with self._request('GET', "/api/notebook/" + note_id + "/paragraph/" + paragraph_id, stream = True) as resp:
+            self._check_response(resp)
+            yield from iter_paragraph_messages(resp.iter_content(chunk_size), result_types,
+                                               self.client_config.result_store)
+
+    def query_paragraph_status(self, note_id, paragraph_id):
+        """
+        Query the job status of specified paragraph, it doesn't include paragraph text and results,
+        so it is much cheaper than query_paragraph_result.
+        :param note_id:
+        :param paragraph_id:
+        :return:
+        """
+        def parse(resp):
+            self._check_response(resp)
+            return ParagraphJobStatus(resp.json()['body'])
+
+        def query():
+            path = "/api/notebook/job/" + note_id + "/" + paragraph_id
+            return self._decode(path, parse, self._request('GET', path))
+        return self._coalesce((_note_tag(note_id), 'query_paragraph_status', paragraph_id), query)
 
     def wait_until_paragraph_finished(self, note_id, paragraph_id):
         """
@@ -269,12 +736,7 @@ class ZeppelinClient:
         :param paragraph_id:
         :return:
         """
-        while True:
-            paragraph_result = self.query_paragraph_result(note_id, paragraph_id)
-            logging.info("paragraph_status: " + str(paragraph_result.status) + ", jobURL: " + str(paragraph_result.jobUrls))
-            if paragraph_result.is_completed():
-                return paragraph_result
-            time.sleep(self.client_config.get_query_interval())
+        return self.get_poll_scheduler().watch_paragraph(note_id, paragraph_id).result()
 
     def cancel_paragraph(self, note_id, paragraph_id):
         """
@@ -283,18 +745,21 @@ class ZeppelinClient:
         :param paragraph_id:
         :return:
         """
-        resp = self.session.delete(self.zeppelin_rest_url + "/api/notebook/job/" + note_id + "/" + paragraph_id)
+        resp = self._request('DELETE', "/api/notebook/job/" + note_id + "/" + paragraph_id)
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
 
     def cancel_note(self, note_id):
         """
-        Cancel specified note execution.
+        Cancel specified note execution. It is sent twice: cancelling the running paragraph lets the next paragraph
+        of the note start, the second one cancels it.
         :param note_id:
         :return:
         """
-        resp = self.session.delete(self.zeppelin_rest_url + "/api/notebook/job/" + note_id)
+        resp = self._request('DELETE', "/api/notebook/job/" + note_id)
         self._check_response(resp)
-        resp = self.session.delete(self.zeppelin_rest_url + "/api/notebook/job/" + note_id)
+        resp = self._request('DELETE', "/api/notebook/job/" + note_id)
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
 
     def new_session(self, interpreter):
@@ -303,8 +768,10 @@ class ZeppelinClient:
         :param interpreter:
         :return:
         """
-        resp = self.session.post(self.zeppelin_rest_url + "/api/session",
-                          params = {'interpreter': interpreter})
+        resp = self._request('POST', "/api/session",
+                             params = {'interpreter': interpreter})
+        # the session note is created
+        self._invalidate(NOTE_LIST)
         self._check_response(resp)
         return SessionInfo(resp.json()['body'])
 
@@ -314,21 +781,24 @@ class ZeppelinClient:
         :param session_id:
         :return:
         """
-        resp = self.session.delete(self.zeppelin_rest_url + "/api/session/" + session_id)
+        resp = self._request('DELETE', "/api/session/" + session_id)
+        self._invalidate(_session_tag(session_id))
         self._check_response(resp)
 
-    def get_session(self, session_id):
+    def get_session(self, session_id, fresh = False):
         """
         Get SessionInfo of specified session_id
         :param session_id:
+        :param fresh: don't use the response cache or the result of other identical query
         :return:
         """
-        resp = self.session.get(self.zeppelin_rest_url + "/api/session/" + session_id)
-        if resp.status_code == 404:
-            raise Exception("No such session: " + session_id)
+        def parse(resp):
+            if resp.status_code == 404:
+                raise Exception("No such session: " + session_id)
 
-        self._check_response(resp)
-        return SessionInfo(resp.json()['body'])
+            self._check_response(resp)
+            return SessionInfo(resp.json()['body'])
+        return self._read(_session_tag(session_id), ('get_session',), "/api/session/" + session_id, parse, fresh)
 
     def next_session_paragraph(self, note_id, max_statement):
         """
@@ -337,8 +807,9 @@ class ZeppelinClient:
         :param max_statement:
         :return:
         """
-        resp = self.session.post(self.zeppelin_rest_url + "/api/notebook/" + note_id +"/paragraph/next",
-                                 params= {'maxParagraph' : max_statement})
+        resp = self._request('POST', "/api/notebook/" + note_id +"/paragraph/next",
+                             params= {'maxParagraph' : max_statement})
+        self._invalidate(_note_tag(note_id))
         self._check_response(resp)
         return resp.json()['message']
 
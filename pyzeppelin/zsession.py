@@ -20,20 +20,97 @@ from pyzeppelin.config import ClientConfig
 from pyzeppelin.zeppelin_client import ZeppelinClient
 from pyzeppelin.notebook import ExecuteResult
 
+from concurrent import futures
+import collections
 import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StatementFuture(futures.Future):
+    """
+    Future of the statement submitted by ZSession.submit, its result is the ExecuteResult of the statement.
+    The ExecuteResult attributes (e.g. status, results) can still be read from the future directly,
+    they query the current state of the statement until it is completed.
+    """
+    def __init__(self, zsession, statement_id, paragraph_future):
+        super().__init__()
+        self.statement_id = statement_id
+        self._zsession = zsession
+        self._paragraph_future = paragraph_future
+        paragraph_future.add_done_callback(self._on_paragraph_done)
+
+    def _on_paragraph_done(self, paragraph_future):
+        if paragraph_future.cancelled():
+            return
+        try:
+            if paragraph_future.exception() is not None:
+                self.set_exception(paragraph_future.exception())
+            else:
+                self.set_result(ExecuteResult(paragraph_future.result()))
+        except futures.InvalidStateError:
+            # cancelled by user
+            pass
+
+    def cancel(self):
+        """
+        Cancel the statement in Zeppelin, return False if it is already completed.
+        :return:
+        """
+        if self.done():
+            return self.cancelled()
+        self._zsession.cancel(self.statement_id)
+        self._paragraph_future.cancel()
+        return super().cancel()
+
+    def __getattr__(self, name):
+        # only invoked for the attributes which are not defined in the future itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self.done() and not self.cancelled() and self.exception() is None:
+            return getattr(self.result(), name)
+        return getattr(self._zsession.query_statement(self.statement_id), name)
 
 
 class ZSession:
     """
     High abstraction layer of Zeppelin SDK, this is used to interact with Zeppelin in session layer.
     There's no Zeppelin concept(note, paragraph, etc) in this layer.
+
+    When fast_execute is True, execute runs each statement via Zeppelin's synchronous run api which returns
+    the result in the same http call instead of submitting and polling. The results then don't include job urls.
+
+    When prefetch_paragraphs > 0, a background thread keeps that many session paragraphs allocated ahead of time,
+    so that statements don't wait for the paragraph allocation. Zeppelin only recycles completed paragraphs
+    when the session note reaches max_statement paragraphs, so it is capped at half of max_statement, and
+    the prefetch pauses while statements are pending: allocating a paragraph may make Zeppelin recycle
+    a completed paragraph whose result isn't read yet.
+
+    submit returns a StatementFuture. The submitted statements are waited by the PollScheduler of the client,
+    which queries the job status of the session note once per round for all of them.
+
+    start, execute, submit and stop are traced by ClientConfig.tracer, each of them is a span with one child span
+    per interaction with Zeppelin, see pyzeppelin.tracing.
     """
-    def __init__(self, client_config, interpreter, intp_properties = {}, max_statement = 100):
+    def __init__(self, client_config, interpreter, intp_properties = {}, max_statement = 100, fast_execute = False,
+                 prefetch_paragraphs = 0):
         self.client_config = client_config
         self.zeppelin_client = ZeppelinClient(client_config)
+        self.tracer = client_config.get_tracer()
         self.interpreter = interpreter
         self.intp_properties = intp_properties
         self.max_statement = max_statement
+        self.fast_execute = fast_execute
+        self.prefetch_paragraphs = max(0, min(prefetch_paragraphs, max_statement // 2))
+        self.session_info = None
+        self._paragraph_pool = None
+        self._prefetch_thread = None
+        self._stopped = threading.Event()
+        # number of statements whose result isn't read yet
+        self._pending_statements = 0
+        self._statement_lock = threading.Condition()
 
     def login(self, user_name, password):
         """
@@ -49,41 +126,136 @@ class ZSession:
         Start this ZSession, underneath it starts a new isolated Zeppelin interpreter process.
         :return:
         """
-        logging.info("starting session for interpreter: {}, properties: {}".format(self.interpreter, str(self.intp_properties)))
-        self.session_info = self.zeppelin_client.new_session(self.interpreter)
-        conf_code = "%" + self.interpreter + ".conf\n"
-        conf_code += '\n'.join((k + " " + v) for (k, v) in self.intp_properties.items())
-        conf_paragraph_id = self.zeppelin_client.add_paragraph(self.session_info.note_id, "Session Configuration", conf_code)
-        conf_paragraph_result = self.zeppelin_client.execute_paragraph(self.session_info.note_id, conf_paragraph_id, session_id = self.session_info.session_id)
-        if conf_paragraph_result.status != 'FINISHED':
-            raise Exception("Fail to configure session: " + str(conf_paragraph_result))
+        logger.info("starting session for interpreter: %s, properties: %s", self.interpreter, self.intp_properties)
+        with self.tracer.start_span('zsession.start', {'interpreter': self.interpreter}) as span:
+            with self.tracer.start_span('zsession.new_session', {'interpreter': self.interpreter}) as phase:
+                self.session_info = self.zeppelin_client.new_session(self.interpreter)
+                self._set_session_attributes(phase)
+            self._set_session_attributes(span)
+            conf_code = "%" + self.interpreter + ".conf\n"
+            conf_code += '\n'.join((k + " " + v) for (k, v) in self.intp_properties.items())
+            conf_paragraph_result = self._run_session_paragraph('zsession.configure', "Session Configuration", conf_code)
+            if conf_paragraph_result.status != 'FINISHED':
+                raise Exception("Fail to configure session: " + str(conf_paragraph_result))
+
+            init_paragraph_result = self._run_session_paragraph('zsession.init', 'Session Init',
+                                                                "%" + self.interpreter + "(init=true)")
+            if init_paragraph_result.status != 'FINISHED':
+                raise Exception("Fail to init session: " + str(init_paragraph_result))
+
+            logger.info("session started")
+            with self.tracer.start_span('zsession.get_session', {'session_id': self.session_info.session_id}) as phase:
+                self.session_info = self.zeppelin_client.get_session(self.session_info.session_id);
+                phase.set_attribute('state', self.session_info.state)
 
-        init_paragraph_id = self.zeppelin_client.add_paragraph(self.session_info.note_id, 'Session Init', "%" + self.interpreter + "(init=true)")
-        init_paragraph_result = self.zeppelin_client.execute_paragraph(self.session_info.note_id, init_paragraph_id, session_id = self.session_info.session_id)
-        if init_paragraph_result.status != 'FINISHED':
-            raise Exception("Fail to init session: " + str(init_paragraph_result))
+        self._stopped.clear()
+        if self.prefetch_paragraphs > 0:
+            self._paragraph_pool = queue.Queue(self.prefetch_paragraphs)
+            self._prefetch_thread = threading.Thread(target = self._prefetch_paragraph_ids,
+                                                     name = "zsession-paragraph-prefetch", daemon = True)
+            self._prefetch_thread.start()
 
-        logging.info("session started")
-        self.session_info = self.zeppelin_client.get_session(self.session_info.session_id);
+    def _set_session_attributes(self, span):
+        if self.session_info.session_id:
+            span.set_attribute('session_id', self.session_info.session_id)
+        if self.session_info.note_id:
+            span.set_attribute('note_id', self.session_info.note_id)
+
+    def _set_result_attributes(self, span, paragraph_result):
+        span.set_attribute('status', paragraph_result.status)
+        span.set_attribute('poll_count', paragraph_result.poll_count)
+
+    def _run_session_paragraph(self, span_name, title, text):
+        """
+        Add and execute the configuration or init paragraph of session in the span of span_name.
+        :param span_name:
+        :param title:
+        :param text:
+        :return:
+        """
+        note_id = self.session_info.note_id
+        with self.tracer.start_span(span_name, {'session_id': self.session_info.session_id, 'note_id': note_id}) \
+                as span:
+            with self.tracer.start_span('zsession.add_paragraph', {'note_id': note_id}) as phase:
+                paragraph_id = self.zeppelin_client.add_paragraph(note_id, title, text)
+                phase.set_attribute('paragraph_id', paragraph_id)
+            span.set_attribute('paragraph_id', paragraph_id)
+            with self.tracer.start_span('zsession.execute_paragraph', {'paragraph_id': paragraph_id}) as phase:
+                paragraph_result = self.zeppelin_client.execute_paragraph(note_id, paragraph_id,
+                                                                          session_id = self.session_info.session_id)
+                self._set_result_attributes(phase, paragraph_result)
+            self._set_result_attributes(span, paragraph_result)
+            return paragraph_result
 
     def stop(self):
         """
         Stop this ZSession, underneath it stop the associated Zeppelin interpreter process.
         :return:
         """
-        if self.session_info and self.session_info.session_id:
-            self.zeppelin_client.stop_session(self.session_info.session_id)
-            logging.info("session {} is stopped".format(self.session_info.session_id))
+        with self.tracer.start_span('zsession.stop', {'session_id': self.session_id()}):
+            self._stopped.set()
+            if self._prefetch_thread:
+                self._prefetch_thread.join()
+                self._prefetch_thread = None
+                self._paragraph_pool = None
+            if self.session_info and self.session_info.session_id:
+                self.zeppelin_client.stop_session(self.session_info.session_id)
+                logger.info("session %s is stopped", self.session_info.session_id)
+            self.zeppelin_client.close()
 
-    def execute(self, code, sub_interpreter = None, local_properties = None):
+    def _prefetch_paragraph_ids(self):
         """
-        Blocking api, execute a piece of code with specified sub_interpreter & local_properties,
-        wait until the execution is finished.
-        :param code:
-        :param sub_interpreter:
-        :param local_properties:
+        Body of the prefetch thread, keep the paragraph pool filled until the session is stopped.
+        :return:
+        """
+        while not self._stopped.is_set():
+            with self._statement_lock:
+                if self._pending_statements or self._paragraph_pool.full():
+                    # the pool is only taken from, nothing notifies when it is no longer full
+                    self._statement_lock.wait(0.1)
+                    continue
+            try:
+                paragraph_id = self.zeppelin_client.next_session_paragraph(self.session_info.note_id, self.max_statement)
+            except Exception as e:
+                logger.warning("Fail to prefetch session paragraph: %s", e)
+                self._stopped.wait(self.client_config.get_query_interval())
+                continue
+            # this thread is the only producer, there's room for it
+            self._paragraph_pool.put_nowait(paragraph_id)
+
+    def _begin_statement(self):
+        with self._statement_lock:
+            self._pending_statements += 1
+
+    def _end_statement(self, future = None):
+        with self._statement_lock:
+            self._pending_statements -= 1
+            self._statement_lock.notify_all()
+
+    def _next_paragraph_id(self):
+        """
+        Take a prefetched paragraph id, allocate one directly if the pool is empty or disabled.
         :return:
         """
+        with self.tracer.start_span('zsession.next_paragraph', {'note_id': self.session_info.note_id}) as span:
+            if self._paragraph_pool is not None:
+                try:
+                    paragraph_id = self._paragraph_pool.get_nowait()
+                    span.set_attribute('prefetched', True)
+                    span.set_attribute('paragraph_id', paragraph_id)
+                    return paragraph_id
+                except queue.Empty:
+                    pass
+            span.set_attribute('prefetched', False)
+            paragraph_id = self.zeppelin_client.next_session_paragraph(self.session_info.note_id, self.max_statement)
+            span.set_attribute('paragraph_id', paragraph_id)
+            return paragraph_id
+
+    def _update_paragraph(self, paragraph_id, script_text):
+        with self.tracer.start_span('zsession.update_paragraph', {'paragraph_id': paragraph_id}):
+            self.zeppelin_client.update_paragraph(self.session_info.note_id, paragraph_id, "", script_text)
+
+    def _build_script_text(self, code, sub_interpreter, local_properties):
         script_text = "%" + self.interpreter
         if sub_interpreter:
             script_text += "." + sub_interpreter
@@ -92,34 +264,118 @@ class ZSession:
                           ','.join([(k + '=' + v) for (k, v) in local_properties.items()]) + \
                           ')'
 
-        script_text = script_text + ' ' + code
-        next_paragraph_id = self.zeppelin_client.next_session_paragraph(self.session_info.note_id, self.max_statement)
-        self.zeppelin_client.update_paragraph(self.session_info.note_id, next_paragraph_id, "", script_text)
-        paragraph_result = self.zeppelin_client.execute_paragraph(self.session_info.note_id, next_paragraph_id, session_id = self.session_info.session_id)
-        return ExecuteResult(paragraph_result)
+        return script_text + ' ' + code
+
+    def execute(self, code, sub_interpreter = None, local_properties = None):
+        """
+        Blocking api, execute a piece of code with specified sub_interpreter & local_properties,
+        wait until the execution is finished.
+        :param code:
+        :param sub_interpreter:
+        :param local_properties:
+        :return:
+        """
+        script_text = self._build_script_text(code, sub_interpreter, local_properties)
+        with self.tracer.start_span('zsession.execute', {'interpreter': self.interpreter,
+                                                         'fast_execute': self.fast_execute}) as span:
+            self._set_session_attributes(span)
+            self._begin_statement()
+            try:
+                next_paragraph_id = self._next_paragraph_id()
+                span.set_attribute('paragraph_id', next_paragraph_id)
+                self._update_paragraph(next_paragraph_id, script_text)
+                if self.fast_execute:
+                    with self.tracer.start_span('zsession.run_paragraph', {'paragraph_id': next_paragraph_id}) as phase:
+                        paragraph_result = self.zeppelin_client.run_paragraph(self.session_info.note_id, next_paragraph_id, session_id = self.session_info.session_id)
+                        self._set_result_attributes(phase, paragraph_result)
+                else:
+                    with self.tracer.start_span('zsession.execute_paragraph', {'paragraph_id': next_paragraph_id}) as phase:
+                        paragraph_result = self.zeppelin_client.execute_paragraph(self.session_info.note_id, next_paragraph_id, session_id = self.session_info.session_id)
+                        self._set_result_attributes(phase, paragraph_result)
+            finally:
+                self._end_statement()
+            self._set_result_attributes(span, paragraph_result)
+            return ExecuteResult(paragraph_result)
 
     def submit(self, code, sub_interpreter = None, local_properties = None):
         """
         Non-blocking api, submit a piece of code with specified sub_interpreter & local_properties.
-        Won't wait for the execution completion.
+        Won't wait for the execution completion, return a StatementFuture whose result is the ExecuteResult.
         :param code:
         :param sub_interpreter:
         :param local_properties:
         :return:
         """
-        script_text = "%" + self.interpreter
-        if sub_interpreter:
-            script_text += "." + sub_interpreter
-        if local_properties:
-            script_text = script_text + '(' + \
-                          ','.join([(k + '=' + v) for (k, v) in local_properties.items()]) + \
-                          ')'
+        script_text = self._build_script_text(code, sub_interpreter, local_properties)
+        with self.tracer.start_span('zsession.submit', {'interpreter': self.interpreter}) as span:
+            self._set_session_attributes(span)
+            self._begin_statement()
+            try:
+                next_paragraph_id = self._next_paragraph_id()
+                span.set_attribute('paragraph_id', next_paragraph_id)
+                self._update_paragraph(next_paragraph_id, script_text)
+                with self.tracer.start_span('zsession.submit_paragraph', {'paragraph_id': next_paragraph_id}):
+                    self.zeppelin_client.submit_paragraph(self.session_info.note_id, next_paragraph_id, session_id = self.session_info.session_id)
+                paragraph_future = self.zeppelin_client.get_poll_scheduler().watch_paragraph(self.session_info.note_id, next_paragraph_id)
+            except BaseException:
+                self._end_statement()
+                raise
+            future = StatementFuture(self, next_paragraph_id, paragraph_future)
+            # the result is read once the future is done
+            future.add_done_callback(self._end_statement)
+            return future
 
-        script_text = script_text + ' ' + code
-        next_paragraph_id = self.zeppelin_client.next_session_paragraph(self.session_info.note_id, self.max_statement)
-        self.zeppelin_client.update_paragraph(self.session_info.note_id, next_paragraph_id, "", script_text)
-        paragraph_result = self.zeppelin_client.submit_paragraph(self.session_info.note_id, next_paragraph_id, session_id = self.session_info.session_id)
-        return ExecuteResult(paragraph_result)
+    def map(self, codes, max_in_flight = 4, ordered = True, sub_interpreter = None, local_properties = None):
+        """
+        Execute codes concurrently, keep at most max_in_flight statements running at the same time.
+        max_in_flight is capped so that the running and the prefetched paragraphs don't exceed half of max_statement.
+        This is a generator of ExecuteResult, in the order of codes, or in the completion order if ordered is False.
+        Only useful for interpreters which run paragraphs concurrently, e.g. sh, jdbc, spark with FAIR scheduler.
+        :param codes:
+        :param max_in_flight:
+        :param ordered:
+        :param sub_interpreter:
+        :param local_properties:
+        :return:
+        """
+        # running and prefetched paragraphs can't be recycled by Zeppelin
+        max_in_flight = max(1, min(max_in_flight, self.max_statement // 2 - self.prefetch_paragraphs))
+        codes = iter(codes)
+        submitted = collections.deque()
+        exhausted = False
+        while True:
+            running = sum(1 for future in submitted if not future.done())
+            while not exhausted and running < max_in_flight:
+                try:
+                    code = next(codes)
+                except StopIteration:
+                    exhausted = True
+                    break
+                submitted.append(self.submit(code, sub_interpreter, local_properties))
+                running += 1
+
+            if ordered:
+                while submitted and submitted[0].done():
+                    yield submitted.popleft().result()
+            else:
+                for future in [future for future in submitted if future.done()]:
+                    submitted.remove(future)
+                    yield future.result()
+            if not submitted:
+                return
+            futures.wait([future for future in submitted if not future.done()], return_when = futures.FIRST_COMPLETED)
+
+    def execute_many(self, codes, max_in_flight = 4, ordered = True, sub_interpreter = None, local_properties = None):
+        """
+        Blocking version of map, return the list of ExecuteResult.
+        :param codes:
+        :param max_in_flight:
+        :param ordered:
+        :param sub_interpreter:
+        :param local_properties:
+        :return:
+        """
+        return list(self.map(codes, max_in_flight, ordered, sub_interpreter, local_properties))
 
     def wait_util_finished(self, statement_id):
         """
@@ -136,7 +392,7 @@ class ZSession:
         :param statement_id:
         :return:
         """
-        self.zeppelin_client.cancel(self.session_info.note_id, statement_id)
+        self.zeppelin_client.cancel_paragraph(self.session_info.note_id, statement_id)
 
     def query_statement(self, statement_id):
         """
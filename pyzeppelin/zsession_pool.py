@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pyzeppelin.zsession import ZSession
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _SessionGroup:
+    """
+    Sessions of the same interpreter and interpreter properties.
+    """
+    def __init__(self, interpreter, intp_properties):
+        self.interpreter = interpreter
+        self.intp_properties = intp_properties
+        # list of (session, last checkin time), the most recently used one is at the end
+        self.idle = []
+        self.in_use = 0
+        self.starting = 0
+
+    def total(self):
+        return len(self.idle) + self.in_use + self.starting
+
+
+class ZSessionPool:
+    """
+    Pool of started ZSessions, so that the interpreter startup is not paid by each request.
+    Sessions are keyed by (interpreter, intp_properties). For each key the pool keeps min_size idle sessions
+    started in the background and never creates more than max_size sessions. Idle sessions beyond min_size
+    are stopped after idle_timeout seconds, and each session is checked via get_session before it is handed out.
+
+        pool = ZSessionPool(client_config, min_size = 2, max_size = 8)
+        with pool.session('python') as session:
+            session.execute("1+1")
+        pool.close()
+    """
+    def __init__(self, client_config, min_size = 1, max_size = 4, idle_timeout = 600, health_check = True,
+                 user_name = None, password = None, session_kwargs = {}, max_workers = 4):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size, min_size: {}, max_size: {}".format(min_size, max_size))
+        self.client_config = client_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.user_name = user_name
+        self.password = password
+        self.session_kwargs = session_kwargs
+        self._groups = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "zsession-pool")
+        self._evictor = threading.Thread(target = self._evict_idle_sessions, name = "zsession-pool-evictor", daemon = True)
+        self._evictor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _key(self, interpreter, intp_properties):
+        return interpreter, tuple(sorted(intp_properties.items()))
+
+    def _get_group(self, interpreter, intp_properties):
+        key = self._key(interpreter, intp_properties)
+        group = self._groups.get(key)
+        if group is None:
+            group = _SessionGroup(interpreter, dict(intp_properties))
+            self._groups[key] = group
+        return group
+
+    def _create_session(self, group):
+        session = ZSession(self.client_config, group.interpreter, group.intp_properties, **self.session_kwargs)
+        if self.user_name:
+            session.login(self.user_name, self.password)
+        session.start()
+        return session
+
+    def _stop_session(self, session):
+        try:
+            session.stop()
+        except Exception as e:
+            logger.warning("Fail to stop session %s: %s", session.session_id(), e)
+
+    def _is_healthy(self, session):
+        try:
+            session_info = session.zeppelin_client.get_session(session.session_id(), fresh = True)
+        except Exception as e:
+            logger.warning("Session %s is not available: %s", session.session_id(), e)
+            return False
+        return (session_info.state or '').upper() != 'STOPPED'
+
+    def _replenish(self, group):
+        """
+        Start sessions in background until there're min_size idle sessions, must be called with the lock held.
+        :param group:
+        :return:
+        """
+        while not self._closed and len(group.idle) + group.starting < self.min_size and group.total() < self.max_size:
+            group.starting += 1
+            self._executor.submit(self._start_idle_session, group)
+
+    def _start_idle_session(self, group):
+        session = None
+        try:
+            session = self._create_session(group)
+        except Exception as e:
+            logger.warning("Fail to start session for interpreter %s: %s", group.interpreter, e)
+        with self._condition:
+            group.starting -= 1
+            if session is not None and not self._closed:
+                group.idle.append((session, time.monotonic()))
+                session = None
+            self._condition.notify_all()
+        if session is not None:
+            self._stop_session(session)
+
+    def prewarm(self, interpreter, intp_properties = {}):
+        """
+        Start min_size sessions of the interpreter in background, without waiting for them.
+        :param interpreter:
+        :param intp_properties:
+        :return:
+        """
+        with self._condition:
+            self._replenish(self._get_group(interpreter, intp_properties))
+
+    def checkout(self, interpreter, intp_properties = {}, timeout = None):
+        """
+        Take a started session of the interpreter from the pool. Start a new one if there's no idle session
+        and the pool is not full, otherwise wait at most timeout seconds for a session to be checked in.
+        :param interpreter:
+        :param intp_properties:
+        :param timeout:
+        :return:
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            session = None
+            with self._condition:
+                if self._closed:
+                    raise Exception("ZSessionPool is closed")
+                group = self._get_group(interpreter, intp_properties)
+                if group.idle:
+                    session, _ = group.idle.pop()
+                    group.in_use += 1
+                elif group.total() < self.max_size:
+                    group.in_use += 1
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Exception("Timeout to checkout session of interpreter {}, all the {} sessions are in use"
+                                        .format(interpreter, self.max_size))
+                    self._condition.wait(remaining)
+                    continue
+                self._replenish(group)
+
+            if session is None:
+                try:
+                    return self._create_session(group)
+                except Exception:
+                    self._release(group)
+                    raise
+            if not self.health_check or self._is_healthy(session):
+                return session
+            self._release(group)
+            self._stop_session(session)
+
+    def _release(self, group):
+        with self._condition:
+            group.in_use -= 1
+            self._replenish(group)
+            self._condition.notify_all()
+
+    def checkin(self, session, discard = False):
+        """
+        Return the session to the pool, it is stopped instead if discard is True or the pool is closed.
+        :param session:
+        :param discard:
+        :return:
+        """
+        with self._condition:
+            group = self._get_group(session.interpreter, session.intp_properties)
+            group.in_use -= 1
+            if not discard and not self._closed:
+                group.idle.append((session, time.monotonic()))
+                session = None
+            self._replenish(group)
+            self._condition.notify_all()
+        if session is not None:
+            self._stop_session(session)
+
+    @contextmanager
+    def session(self, interpreter, intp_properties = {}, timeout = None):
+        """
+        Checkout a session and check it in when the with block exits.
+        :param interpreter:
+        :param intp_properties:
+        :param timeout:
+        :return:
+        """
+        session = self.checkout(interpreter, intp_properties, timeout)
+        try:
+            yield session
+        finally:
+            self.checkin(session)
+
+    def stats(self):
+        """
+        Number of idle, in use and starting sessions per (interpreter, intp_properties).
+        :return:
+        """
+        with self._condition:
+            return {key: {'idle': len(group.idle), 'in_use': group.in_use, 'starting': group.starting}
+                    for key, group in self._groups.items()}
+
+    def _evict_idle_sessions(self):
+        while True:
+            with self._condition:
+                self._condition.wait(max(self.idle_timeout / 2, 0.01))
+                if self._closed:
+                    return
+                expired = []
+                now = time.monotonic()
+                for group in self._groups.values():
+                    # the least recently used sessions are at the front
+                    while len(group.idle) > self.min_size and now - group.idle[0][1] > self.idle_timeout:
+                        expired.append(group.idle.pop(0)[0])
+            for session in expired:
+                logger.info("stop idle session %s", session.session_id())
+                self._stop_session(session)
+
+    def close(self):
+        """
+        Stop all the idle sessions, sessions in use are stopped when they are checked in.
+        :return:
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            sessions = [session for group in self._groups.values() for session, _ in group.idle]
+            for group in self._groups.values():
+                group.idle = []
+            self._condition.notify_all()
+        self._executor.shutdown(wait = True)
+        for session in sessions:
+            self._stop_session(session)
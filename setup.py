@@ -35,6 +35,13 @@ INSTALL_REQUIRES = [
       'requests'
 ]
 
+EXTRAS_REQUIRE = {
+      'async': ['aiohttp'],
+      'websocket': ['websocket-client'],
+      'table': ['numpy', 'pandas'],
+      'tracing': ['opentelemetry-api']
+}
+
 setup(name=PACKAGE_NAME,
       version=VERSION,
       description=DESCRIPTION,
@@ -45,5 +52,6 @@ setup(name=PACKAGE_NAME,
       author_email=AUTHOR_EMAIL,
       url=URL,
       install_requires=INSTALL_REQUIRES,
-      packages=find_packages()
+      extras_require=EXTRAS_REQUIRE,
+      packages=find_packages(exclude=['benchmarks'])
       )